@@ -3,6 +3,84 @@ from py2neo import Graph
 
 NEO4J_URL = "bolt://localhost:7687"  # 推荐使用 bolt 协议
 NEO4J_AUTH = ("neo4j", "yw050130")  # 使用 auth 元组
+QA_BACKEND = "neo4j"  # 问答查询后端：neo4j；memory（进程内图引擎，直接加载 CSV/relation.txt，无需数据库）
+NEO4J_POOL_SIZE = 32  # /qa 异步会话池大小：同一进程内同时在途的 Neo4j 会话上限
+NEO4J_POOL_ACQUIRE_TIMEOUT = 5.0  # 等待空闲会话的最长秒数，超时即报错而不是无限排队
+
+# /qa 答案缓存：键为 (图谱代号, intent, params)，导入脚本自增代号即精确失效
+QA_CACHE_BACKEND = "memory"  # memory：进程内 LRU；sqlite：多个 uvicorn worker 共享同一文件
+QA_CACHE_SIZE = 2048  # 最多缓存条目数（LRU 淘汰）
+QA_CACHE_TTL = 3600.0  # 条目存活秒数（兜底，正常情况下由代号失效）
+QA_CACHE_PATH = ".cache/qa_cache.sqlite3"  # sqlite 后端文件
+QA_CACHE_GEN_CHECK_INTERVAL = 1.0  # 两次读取图谱代号的最小间隔（秒）
+QA_BATCH_MAX = 500  # /qa/batch 单次最多问题数
+
+# path 意图：进程内人物路径索引（RELATION + 共同事件），不走 Neo4j 遍历
+QA_PATH_MAX_HOPS = 4  # 最多跳数（与原 shortestPath 模板的 *..4 一致）
+QA_PATH_TOP_K = 3  # 返回的最短路径条数
+QA_PATH_APSP_MAX = 2000  # 人物数不超过此值时启动即预计算全源最短距离
+
+# GET /metrics：/qa 各阶段耗时直方图（秒）的桶上界
+QA_METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# /qa 性能剖析：请求体带 "profile": true 时以 PROFILE 执行并返回算子树与各阶段耗时
+QA_PROFILE_ENABLED = False  # 关闭时带 profile 的请求返回 403（剖析会绕过缓存并放大数据库开销）
+QA_PROFILE_SLOW_MS = 500.0  # 超过该耗时（毫秒）的请求在后台自动 PROFILE 一次并写日志；<= 0 关闭
+QA_PROFILE_SLOW_INTERVAL = 60.0  # 同一模板（cypher_hash）两次自动剖析的最小间隔（秒），期间的慢请求只计数
+
+# /qa 查询日志：每个请求追加一行 JSON（问句、意图与实体、Cypher 摘要、耗时、行数、是否命中缓存），后台线程批量写入
+QA_LOG_ENABLED = True
+QA_LOG_PATH = "logs/requests.jsonl"  # 根目录的 requests.jsonl 另有用途，日志单独放在 logs/ 下
+QA_LOG_MAX_BYTES = 50 * 1024 * 1024  # 超过该大小即轮转为 requests.jsonl.1、.2 …
+QA_LOG_BACKUPS = 5  # 保留的轮转文件数
+QA_LOG_QUEUE_SIZE = 10000  # 待写队列上限；写盘跟不上时丢弃新记录而不阻塞请求
+
+# HTTP：/ui、/photos 静态资源按内容哈希生成 ETag，启动时预压缩 gzip/brotli；/qa JSON 超过阈值时压缩
+QA_STATIC_MAX_AGE = 365 * 24 * 3600  # 带版本号（?v=内容哈希）的资源缓存秒数；不带版本号的每次以 ETag 协商
+QA_COMPRESS_MIN_BYTES = 1024  # 响应体不小于该字节数才压缩（静态资源与 /qa JSON 共用）
+
+# /photos/{name}?w=…&format=…：Pillow 按需生成缩放/WebP 变体，按内容寻址缓存在磁盘上
+QA_PHOTO_CACHE_DIR = ".cache/photos"
+QA_PHOTO_WIDTHS = (320, 640, 1080, 1600, 2160)  # 请求宽度向上取到这些档位之一，限制变体数量；不放大原图
+QA_PHOTO_QUALITY = 80  # WebP/JPEG 编码质量
+
+# 启动预热：加载词典、建立并校验会话池、每个模板各执行一次、按查询日志预热最热问句；完成前 /ready 返回 503
+QA_WARMUP_ENABLED = True
+QA_WARMUP_HOT_QUESTIONS = 50  # 从 logs/requests.jsonl 取最热的前 N 个问句写入答案缓存；0 表示跳过
+QA_WARMUP_LOG_RECORDS = 100_000  # 热门问句只统计当前日志文件的最后 N 条记录（不读轮转文件）
+QA_WARMUP_RETRY_INTERVAL = 5.0  # 预热失败（如 Neo4j 尚未启动）后的重试间隔（秒）
+
+# /graph/ego：以人物为中心的关系子图（ECharts 格式）
+QA_GRAPH_MAX_DEPTH = 3  # depth 参数上限
+QA_GRAPH_MAX_NODES = 150  # 子图最多节点数（limit 参数上限），超出部分按距离、度数截断
+
+# /suggest 输入联想：人名与事件标题的前缀字典树
+QA_SUGGEST_LIMIT = 10  # 每个前缀最多返回的候选数（limit 参数上限）
+
+# /qa 准入控制：相同查询合并为一次执行；按意图限制同时执行数，排队有上限，超出返回 503 + Retry-After
+QA_ADMISSION_CONCURRENCY = 32  # 每个意图默认的同时执行上限（会话池 NEO4J_POOL_SIZE 为全部意图共用）
+QA_ADMISSION_LIMITS = {"search": 16, "chapter_events": 16}  # 个别意图的上限（开销大的模板可调低）
+QA_ADMISSION_QUEUE = 64  # 每个意图最多排队的请求数，队列满即拒绝
+QA_ADMISSION_QUEUE_TIMEOUT = 2.0  # 排队最长秒数，超时即拒绝
+QA_ADMISSION_RETRY_AFTER = 1  # 503 响应的 Retry-After（秒）
+
+# 生产入口 python -m scripts.qa_prefork：主进程预加载词典与索引后 fork 多个 worker，写时复制共享
+QA_HOST = "127.0.0.1"  # 监听地址（scripts.qa_service.main 与 qa_prefork 共用）
+QA_PORT = 8000
+QA_WORKERS = 0  # worker 进程数；0 表示取 CPU 核数
+QA_PREFORK_RELOAD_INTERVAL = 2.0  # 主进程检查数据文件变化的间隔（秒），变化即平滑重启 worker；<= 0 只响应 SIGHUP
+QA_PREFORK_READY_TIMEOUT = 60.0  # 平滑重启时等待新 worker 开始监听的最长秒数，超时仍替换旧 worker
+
+# Neo4j 故障保护：查询超时 + 熔断；熔断期间由进程内图引擎（kg_events.csv 等本地快照）降级回答，响应带 degraded
+QA_QUERY_TIMEOUT = 3.0  # 单次查询的事务超时（秒），服务端到时终止事务
+QA_QUERY_TIMEOUTS = {"search": 5.0, "chapter_events": 5.0}  # 个别意图的超时（开销大的模板可调高）
+QA_QUERY_BATCH_TIMEOUT = 15.0  # /qa/batch 每组 UNWIND 查询的超时
+QA_BREAKER_FAILURES = 5  # 连续多少次故障（超时、连接失败）后熔断
+QA_BREAKER_RESET_TIMEOUT = 10.0  # 熔断后多少秒放行一个探测请求；探测成功即恢复访问 Neo4j
+
+# 运行时制品（人名词典、输入联想字典树、抽取模型）热更新：源文件变化后后台重建、原子替换
+QA_ARTIFACT_CHECK_INTERVAL = 2.0  # 检查源文件是否变化的最小间隔（秒）
+QA_ADMIN_TOKEN = ""  # POST /admin/reload 的口令（请求头 X-Admin-Token）；为空时该接口停用
 
 _graph = None
 
@@ -13,6 +91,14 @@ def get_graph() -> Graph:
     if _graph is None:
         _graph = Graph(NEO4J_URL, auth=NEO4J_AUTH)
     return _graph
+
+
+def reset_graph() -> None:
+    """丢弃当前连接（数据库重启、网络中断后），下次 get_graph 重新连接。"""
+    global _graph
+    _graph = None
+
+
 CA_LIST = {"贾家荣国府":0,"贾家宁国府":1,"王家":2,"史家":3,"薛家":4,"其他":5,"林家":6}
 similar_words = {
     "爸爸": "父亲",
@@ -1,19 +1,27 @@
 #create_graph.py
-from py2neo import Graph, Node, Relationship
-from config import graph
+# 早期的人物关系导入脚本。现已与 scripts.import_relations_from_txt 保持同一建模：
+# (:Person {name, cate})-[:RELATION {type}]->(:Person)，name 上有唯一约束。
+from config import get_graph, similar_words
+from scripts.graph_generation import bump_generation
+
+graph = get_graph()
 
 # 显式指定 encoding='utf-8'
 with open("relation.txt", encoding='utf-8') as f:
     for line in f.readlines():
-        rela_array=line.strip("\n").split(",")
+        rela_array = [x.strip() for x in line.strip("\n").split(",")]
+        if len(rela_array) < 5:
+            continue
         print(rela_array)
-        graph.run("MERGE(p: Person{cate:'%s',Name: '%s'})"%(rela_array[3],rela_array[0]))
-        graph.run("MERGE(p: Person{cate:'%s',Name: '%s'})" % (rela_array[4], rela_array[1]))
         graph.run(
-            "MATCH(e: Person), (cc: Person) \
-            WHERE e.Name='%s' AND cc.Name='%s'\
-            CREATE(e)-[r:%s{relation: '%s'}]->(cc)\
-            RETURN r" % (rela_array[0], rela_array[1], rela_array[2],rela_array[2])
-
+            "MERGE (e:Person {name:$a}) SET e.cate = coalesce(e.cate, $a_cate) "
+            "MERGE (cc:Person {name:$b}) SET cc.cate = coalesce(cc.cate, $b_cate) "
+            "MERGE (e)-[r:RELATION {type:$rel}]->(cc)",
+            a=rela_array[0], b=rela_array[1],
+            a_cate=rela_array[3], b_cate=rela_array[4],
+            rel=similar_words.get(rela_array[2], rela_array[2]),
         )
-        
+
+# 图谱已改动：自增代号，问答服务的答案缓存随之失效（同其他导入脚本）
+gen = bump_generation(graph)
+print(f"[Neo4j] 人物关系导入完成（图谱代号 {gen}）")
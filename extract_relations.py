@@ -4,17 +4,20 @@ import pickle
 import argparse
 from typing import List, Tuple, Optional
 from train_crf_model import predict_with_crf
+from scripts.name_matcher import NameMatcher
+from scripts.qa_artifacts import get_artifacts
 
+ROOT = os.path.dirname(__file__) or '.'
+NER_MODEL_FILE = os.path.join(ROOT, 'crf_ner_model.pkl')
+REL_MODEL_FILE = os.path.join(ROOT, 'relation_classifier.pkl')
 
-print('加载 NER 模型...')
-with open('crf_ner_model.pkl', 'rb') as f:
-    ner_model = pickle.load(f)
-print('NER 模型加载完成')
 
-print('加载关系分类模型...')
-with open('relation_classifier.pkl', 'rb') as f:
-    rel_model = pickle.load(f)
-print('关系分类模型加载完成')
+def _load_pickle(path: str, label: str):
+    print(f'加载 {label}...')
+    with open(path, 'rb') as f:
+        model = pickle.load(f)
+    print(f'{label} 加载完成')
+    return model
 
 
 # 高精度关键词规则（优先）
@@ -70,10 +73,19 @@ def _load_name_dict() -> List[str]:
     return uniq
 
 
-_NAME_DICT = _load_name_dict()
+# 模型与词典由制品注册表管理（登记与源文件见 scripts.qa_artifacts.EXTRACT_ARTIFACTS）：首次使用时加载，
+# 文件更新（重新训练、补充词典）后后台重建并替换，长时间运行的进程（如 extract_relations_all）无需重启；
+# 每次 extract_relations 调用内使用同一版本
+ARTIFACT_LOADERS = {
+    'crf_ner': lambda: _load_pickle(NER_MODEL_FILE, 'NER 模型'),
+    'relation_classifier': lambda: _load_pickle(REL_MODEL_FILE, '关系分类模型'),
+    # 词典编译一次：文本中出现的词典名单遍扫描得到，“包含 e 的最长名”查子串表
+    'relation_names': lambda: NameMatcher(_load_name_dict()),
+}
+_ARTIFACTS = get_artifacts()
 
 
-def _normalize_entities(text: str, entities: List[str]) -> List[str]:
+def _normalize_entities(text: str, entities: List[str], matcher: NameMatcher) -> List[str]:
     """将 CRF 抽取的人名纠正为出现在文本中的词典“最长匹配”。
 
     规则：
@@ -82,7 +94,7 @@ def _normalize_entities(text: str, entities: List[str]) -> List[str]:
     - 若无候选，保留原样。
     - 保持顺序去重。
     """
-    if not entities or not _NAME_DICT:
+    if not entities or not len(matcher):
         # 无词典或无实体，原样返回
         seen = set()
         ordered = []
@@ -92,21 +104,16 @@ def _normalize_entities(text: str, entities: List[str]) -> List[str]:
                 ordered.append(e)
         return ordered
 
+    in_text = set(matcher.names_in(text))
     normed: List[str] = []
     for e in entities:
         cand = e
-        if e in _NAME_DICT and e in text:
+        if e in in_text:
             cand = e
         else:
             # 在词典中找“包含 e 的名字”。不强制要求全文出现全名，
             # 以便将“士隐/雨村”等截断规范到“甄士隐/贾雨村”。
-            best = None
-            best_len = -1
-            for name in _NAME_DICT:
-                if e and (e in name):
-                    if len(name) > best_len:
-                        best = name
-                        best_len = len(name)
+            best = matcher.containing(e) if e else None
             cand = best or e
         normed.append(cand)
 
@@ -166,10 +173,12 @@ def rule_predict(sentence: str, ent1: str, ent2: str) -> Optional[str]:
 
 
 def extract_relations(text: str, proba_threshold: float = 0.6, debug: bool = False) -> List[Tuple[str, str, str]]:
+    ner_model = _ARTIFACTS.get('crf_ner')
+    rel_model = _ARTIFACTS.get('relation_classifier')
     # 1) NER
     entities = predict_with_crf(ner_model, text)
     # 1.1) 词典最长匹配纠正（修复 贾雨 -> 贾雨村 等截断问题）
-    entities = _normalize_entities(text, entities)
+    entities = _normalize_entities(text, entities, _ARTIFACTS.get('relation_names'))
     results: List[Tuple[str, str, str]] = []
     if len(entities) < 2:
         return results
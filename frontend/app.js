@@ -1,30 +1,106 @@
 const $ = (s)=>document.querySelector(s);
 
+let inflight = null;
+
+// 流式问答：/qa/stream 按行返回 NDJSON（intent → row… → answer），边到边渲染
 async function ask(){
   const q = $('#q').value.trim();
   if(!q){ $('#answer').textContent = '请先输入问题'; return; }
+  if(inflight) inflight.abort();   // 新问题取消尚未结束的旧查询
+  const ctrl = inflight = new AbortController();
   $('#btn').disabled = true; $('#btn').textContent = '查询中…';
+  $('#answer').textContent = '查询中…';
+  const rows = [];
+  let finished = false;
+  const fail = (detail, retryAfter)=>{
+    finished = true;
+    $('#answer').textContent = '查询失败：' + (detail || '未知错误') + (retryAfter ? `（请 ${retryAfter} 秒后重试）` : '');
+  };
+  const onFrame = (f)=>{
+    if(f.type === 'intent'){
+      $('#intent').textContent = f.intent ?? '';
+      $('#payload').textContent = JSON.stringify(f.payload ?? {}, null, 2);
+      $('#cypher').textContent = f.cypher ?? (f.engine ? `（由进程内引擎 ${f.engine} 回答，未执行 Cypher）` : '');
+      $('#params').textContent = JSON.stringify(f.params ?? {}, null, 2);
+      $('#rows').textContent = '[]';
+    }else if(f.type === 'row'){
+      rows.push(f.row);
+      $('#answer').textContent = `查询中…（已返回 ${rows.length} 行）`;
+      $('#rows').textContent = JSON.stringify(rows.slice(0, 10), null, 2);
+    }else if(f.type === 'answer'){
+      finished = true;
+      $('#answer').textContent = f.answer;
+    }else if(f.type === 'error'){
+      fail(typeof f.detail === 'string' ? f.detail : JSON.stringify(f.detail), f.retry_after);
+    }
+  };
   try{
-    const res = await fetch('/qa',{
+    const res = await fetch('/qa/stream',{
       method:'POST',
       headers:{'Content-Type':'application/json'},
-      body: JSON.stringify({question:q})
+      body: JSON.stringify({question:q}),
+      signal: ctrl.signal
     });
-    const data = await res.json();
-    $('#answer').textContent = data.answer ?? JSON.stringify(data, null, 2);
-    $('#intent').textContent = data.intent ?? '';
-    $('#payload').textContent = JSON.stringify(data.payload ?? {}, null, 2);
-    $('#cypher').textContent = data.cypher ?? '';
-    $('#params').textContent = JSON.stringify(data.params ?? {}, null, 2);
-    $('#rows').textContent = JSON.stringify(data.rows ?? [], null, 2);
+    // 非 2xx（参数校验 422、排队超时 503 等）返回的是 JSON 错误体而不是 NDJSON 流
+    if(!res.ok){
+      let detail = `HTTP ${res.status}`;
+      try{
+        const body = await res.json();
+        if(body.detail) detail = typeof body.detail === 'string' ? body.detail : JSON.stringify(body.detail);
+      }catch(_){}
+      fail(detail, res.headers.get('Retry-After'));
+      return;
+    }
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buf = '';
+    for(;;){
+      const {value, done} = await reader.read();
+      if(done) break;
+      buf += decoder.decode(value, {stream:true});
+      let i;
+      while((i = buf.indexOf('\n')) >= 0){
+        const line = buf.slice(0, i).trim();
+        buf = buf.slice(i + 1);
+        if(line) onFrame(JSON.parse(line));
+      }
+    }
+    // 流提前结束（既无 answer 也无 error 帧），不能停在“查询中…”
+    if(!finished && inflight === ctrl) fail('连接中断，未收到完整结果');
   }catch(err){
-    $('#answer').textContent = '请求失败：' + err;
+    if(err.name !== 'AbortError') $('#answer').textContent = '请求失败：' + err;
   }finally{
-    $('#btn').disabled = false; $('#btn').textContent = '提问';
+    if(inflight === ctrl){
+      inflight = null;
+      $('#btn').disabled = false; $('#btn').textContent = '提问';
+    }
   }
 }
 
+// 输入联想：对输入末尾的片段（最后一个标点/空格之后）请求 /suggest，候选补全到整句
+let suggestSeq = 0;
+async function suggest(){
+  const v = $('#q').value;
+  const m = v.match(/[^\s，。？！、,.?!]+$/);
+  const list = $('#suggest');
+  if(!m){ list.replaceChildren(); return; }
+  const seq = ++suggestSeq;
+  try{
+    const res = await fetch('/suggest?q=' + encodeURIComponent(m[0]));
+    const data = await res.json();
+    if(seq !== suggestSeq) return;   // 已有更新的输入
+    const head = v.slice(0, v.length - m[0].length);
+    list.replaceChildren(...data.items.map(it=>{
+      const o = document.createElement('option');
+      o.value = head + it.text;
+      o.label = it.type === 'event' ? '事件' : '人物';
+      return o;
+    }));
+  }catch(_){ /* 联想失败不影响提问 */ }
+}
+
 $('#btn').addEventListener('click', ask);
+$('#q').addEventListener('input', suggest);
 $('#q').addEventListener('keydown', e=>{ if(e.key==='Enter') ask(); });
 
 document.querySelectorAll('.hint').forEach(el=>{
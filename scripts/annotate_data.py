@@ -4,12 +4,16 @@
 - 优先使用项目根目录下的 name_dict.txt 作为实体列表；若不存在则回退到 entity_list.txt。
 - 自动合并 reddream_chapters_clean/*.txt 生成全文（无须 hongloumeng.txt）。
 - 生成 annotated_data.txt、train.txt、dev.txt、test.txt。
+
+用法（在项目根目录执行）：python -m scripts.annotate_data
 """
 import re
 import random
 from collections import Counter
 from pathlib import Path
 
+from scripts.name_matcher import NameMatcher
+
 ROOT = Path(__file__).resolve().parents[1]
 NAME_DICT = ROOT / 'name_dict.txt'
 ENTITY_LIST = ROOT / 'entity_list.txt'
@@ -60,24 +64,15 @@ def load_full_text():
     return text
 
 
-def annotate_sentence(sentence, entity_list):
-    """对单个句子进行 BIO 标注（字符级），长实体优先并避免重叠。"""
-    sorted_entities = sorted(entity_list, key=len, reverse=True)
+def annotate_sentence(sentence, matcher):
+    """对单个句子进行 BIO 标注（字符级），长实体优先并避免重叠。matcher 为实体列表编译的 NameMatcher。"""
     tokens = list(sentence)
     labels = ['O'] * len(tokens)
 
-    for entity in sorted_entities:
-        if not entity:
-            continue
-        start_idx = sentence.find(entity)
-        while start_idx != -1:
-            end_idx = start_idx + len(entity)
-            # 检查位置是否未被标注
-            if all(labels[i] == 'O' for i in range(start_idx, end_idx)):
-                labels[start_idx] = 'B-PER'
-                for i in range(start_idx + 1, end_idx):
-                    labels[i] = 'I-PER'
-            start_idx = sentence.find(entity, start_idx + 1)
+    for start_idx, end_idx, _ in matcher.longest(sentence):
+        labels[start_idx] = 'B-PER'
+        for i in range(start_idx + 1, end_idx):
+            labels[i] = 'I-PER'
 
     return list(zip(tokens, labels))
 
@@ -99,9 +94,11 @@ def process_full_text(text, entity_list, output_file, sample_ratio=0.3):
 
     annotated_data = []
     entity_count = Counter()
+    # 实体列表只编译一次，每个句子单遍扫描
+    matcher = NameMatcher(entity_list)
 
     for i, sentence in enumerate(sampled_sentences):
-        annotated = annotate_sentence(sentence, entity_list)
+        annotated = annotate_sentence(sentence, matcher)
         # 只保留包含实体的句子
         if any(label != 'O' for _, label in annotated):
             annotated_data.append(annotated)
@@ -0,0 +1,103 @@
+"""
+人名匹配基准：NameMatcher（Aho-Corasick 单遍扫描）对比逐个 name in text，并校验两者结果一致。
+
+- 词典：name_dict.txt + persons_unique.txt 的真实人名，再用章节正文中的常见字组合补足到 --names 个
+  （2~4 字，固定随机种子），模拟大词典
+- 文本：reddream_chapters_clean/*.txt 分句后的前 --sentences 句
+- 分别统计“全部命中”（names_in / 逐个 in）与“长词优先不重叠”（longest / 按长度降序逐个 find 并跳过已标注位置）
+  每句耗时；逐个 in 的耗时随词典大小线性增长，自动机只与句长有关
+
+用法（在项目根目录执行）：
+  python -m scripts.bench_name_matcher [--names 10000] [--sentences 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+from scripts.name_matcher import NameMatcher, load_names
+
+ROOT = Path(__file__).resolve().parent.parent
+CHAPTERS = ROOT / "reddream_chapters_clean"
+
+
+def load_sentences(limit: int) -> List[str]:
+    sents: List[str] = []
+    for p in sorted(CHAPTERS.glob("*.txt")):
+        text = p.read_text(encoding="utf-8")
+        sents.extend(s.strip() for s in re.split(r"[。！？!?\n]", text) if len(s.strip()) > 5)
+        if len(sents) >= limit:
+            break
+    return sents[:limit]
+
+
+def build_names(n: int, sentences: List[str]) -> List[str]:
+    names = list(dict.fromkeys(load_names()))
+    chars = [c for c, _ in Counter("".join(sentences)).most_common(600) if "一" <= c <= "鿿"]
+    rng = random.Random(42)
+    seen = set(names)
+    while len(names) < n:
+        name = "".join(rng.choice(chars) for _ in range(rng.choice((2, 3, 3, 4))))
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def naive_longest(sentence: str, by_len: List[str]) -> List[tuple]:
+    taken = [False] * len(sentence)
+    out = []
+    for name in by_len:
+        start = sentence.find(name)
+        while start != -1:
+            end = start + len(name)
+            if not any(taken[start:end]):
+                for i in range(start, end):
+                    taken[i] = True
+                out.append((start, end, name))
+            start = sentence.find(name, start + 1)
+    return sorted(out)
+
+
+def timed(fn, sentences: List[str]) -> tuple:
+    t0 = time.perf_counter()
+    results = [fn(s) for s in sentences]
+    return results, (time.perf_counter() - t0) / len(sentences) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--names", type=int, default=10000, help="词典规模")
+    ap.add_argument("--sentences", type=int, default=2000, help="参与测试的句子数")
+    args = ap.parse_args()
+
+    sentences = load_sentences(args.sentences)
+    if not sentences:
+        raise SystemExit(f"未找到章节文本：{CHAPTERS}")
+    names = build_names(args.names, sentences)
+    t0 = time.perf_counter()
+    matcher = NameMatcher(names)
+    build_ms = (time.perf_counter() - t0) * 1000
+    avg_len = sum(map(len, sentences)) / len(sentences)
+    print(f"词典 {len(matcher)} 个人名，编译 {build_ms:.1f} ms | {len(sentences)} 句，平均 {avg_len:.1f} 字")
+
+    by_len = sorted(names, key=len, reverse=True)
+    old_all, old_us = timed(lambda s: {n for n in names if n in s}, sentences)
+    new_all, new_us = timed(matcher.names_in, sentences)
+    mismatch = sum(a != set(b) for a, b in zip(old_all, new_all))
+    print(f"[全部命中] 逐个 in {old_us:9.1f} us/句 | 自动机 {new_us:7.1f} us/句 | {old_us / new_us:6.1f}x | 不一致 {mismatch}")
+
+    old_long, old_us = timed(lambda s: naive_longest(s, by_len), sentences)
+    new_long, new_us = timed(matcher.longest, sentences)
+    # 逐条比较 (起, 止, 人名)：同长度重叠命中的取舍也须一致
+    mismatch = sum(a != b for a, b in zip(old_long, new_long))
+    print(f"[最长匹配] 逐个 find {old_us:7.1f} us/句 | 自动机 {new_us:7.1f} us/句 | {old_us / new_us:6.1f}x | 不一致 {mismatch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+prefork 扩展性压测：依次以 1、2、4 … 个 worker 启动 scripts.qa_prefork，用多个压测进程同时打 /qa，
+统计总 req/s 与 p50/p99，观察吞吐随 worker 数（CPU 核数）的变化。
+
+- 问句语料与请求循环复用 bench_qa_load（generate_corpus / _drive）
+- 压测客户端为 --clients 个独立进程（单个 Python 客户端进程本身就会先于服务端跑满一个核）；
+  客户端与服务端在同一台机器上时会争用 CPU，核数较少时建议 --clients 不超过空闲核数
+- 服务端以 --backend（默认 memory）运行且不写查询日志
+
+结果写为 JSON（--out），每个 worker 数一项，含相对 1 个 worker 的加速比。
+
+用法（在项目根目录执行，需要 os.fork）：
+  python -m scripts.bench_prefork --workers 1,2,4 --clients 4 --requests 4000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from scripts.bench_qa_load import INTENTS, _percentile, _drive, generate_corpus
+
+
+def _client(url: str, corpus: List[Tuple[str, str]], n: int, concurrency: int) -> Tuple[List[float], int, float]:
+    import httpx
+
+    async def go():
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, timeout=30.0, limits=limits) as client:
+            return await _drive(client, corpus, n, concurrency)
+
+    lat, errors, _, elapsed = asyncio.run(go())
+    return [x for i in INTENTS for x in lat[i]], sum(errors.values()), elapsed
+
+
+def _wait_ready(url: str, timeout: float = 60.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    ok = 0
+    while time.monotonic() < deadline:
+        try:
+            ok = ok + 1 if httpx.get(url + "/ready", timeout=2.0).status_code == 200 else 0
+        except httpx.HTTPError:
+            ok = 0
+        # 连续多次就绪，尽量覆盖到每个 worker
+        if ok >= 10:
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"服务在 {timeout} 秒内未就绪：{url}")
+
+
+def bench(workers: int, args, corpus) -> Dict:
+    url = f"http://127.0.0.1:{args.port}"
+    cmd = [sys.executable, "-m", "scripts.qa_prefork", "--workers", str(workers), "--port", str(args.port),
+           "--backend", args.backend, "--no-log"]
+    server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_ready(url)
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            # 预热：每个 worker 的答案缓存与惰性结构
+            pool.starmap(_client, [(url, corpus, args.warmup, 8)] * args.clients)
+            t0 = time.perf_counter()
+            parts = pool.starmap(_client, [(url, corpus, args.requests, args.concurrency)] * args.clients)
+            elapsed = time.perf_counter() - t0
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    lat = [x for p in parts for x in p[0]]
+    errors = sum(p[1] for p in parts)
+    return {
+        "workers": workers,
+        "requests": len(lat),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(lat) / elapsed, 1),
+        "p50_ms": round(_percentile(lat, 50) * 1000, 3) if lat else None,
+        "p99_ms": round(_percentile(lat, 99) * 1000, 3) if lat else None,
+    }
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = ",".join(str(1 << i) for i in range(cpus.bit_length()) if 1 << i <= cpus)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", default=default_workers, help="逗号分隔的 worker 数列表（默认 1、2、4 … 直到 CPU 核数）")
+    ap.add_argument("--clients", type=int, default=max(1, cpus // 2), help="压测客户端进程数")
+    ap.add_argument("--requests", type=int, default=4000, help="每个客户端进程的请求数（不含预热）")
+    ap.add_argument("--concurrency", type=int, default=32, help="每个客户端进程同时在途的请求数")
+    ap.add_argument("--warmup", type=int, default=300, help="每个客户端进程的预热请求数")
+    ap.add_argument("--per-intent", type=int, default=200, help="每类意图生成的问句数")
+    ap.add_argument("--backend", choices=["memory", "neo4j"], default="memory")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--out", default="qa_load_prefork.json", help="JSON 结果输出路径")
+    args = ap.parse_args()
+    if not hasattr(os, "fork"):
+        sys.exit("当前平台不支持 fork")
+
+    corpus, _ = generate_corpus(args.per_intent)
+    results = []
+    for n in (int(x) for x in args.workers.split(",") if x.strip()):
+        r = bench(n, args, corpus)
+        r["speedup"] = round(r["rps"] / results[0]["rps"], 2) if results else 1.0
+        results.append(r)
+        print(
+            f"workers={n:<3} {r['rps']:9.1f} req/s (x{r['speedup']:.2f}) | p50 {r['p50_ms']:7.2f} | "
+            f"p99 {r['p99_ms']:7.2f} ms | 错误 {r['errors']}"
+        )
+    meta = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "cpus": cpus, "clients": args.clients,
+            "concurrency": args.concurrency, "backend": args.backend}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+/qa 并发基准：对比同步路径（线程池 + py2neo 全局 Graph）与异步路径（会话池 + AsyncDriver）。
+
+- 同步路径：模拟 Starlette 默认线程池（40 个线程），每个请求阻塞一个线程直至查询返回
+- 异步路径：所有请求以协程并发，由 config.NEO4J_POOL_SIZE 限制同时在途的会话数
+
+输出每种路径的吞吐（req/s）与 p50/p99 延迟。需要 Neo4j 已启动并已导入数据。
+
+--batch-sizes 时改为对比 /qa/batch 的执行方式：逐条往返 vs. 按意图分组的 UNWIND 批量执行。
+
+用法（在项目根目录执行）：
+  python -m scripts.bench_qa_concurrency --requests 2000 --concurrency 400
+  python -m scripts.bench_qa_concurrency --batch-sizes 1,10,100,500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from scripts.qa_intent import detect_intent
+from scripts.qa_cypher import build_query, run_query, run_query_async, execute_batch
+from scripts.qa_pool import close_pool
+
+
+QUESTIONS = [
+    "王熙凤的判词是什么？",
+    "林黛玉的判词",
+    "林黛玉参与了什么？",
+    "贾政和贾宝玉是什么关系？",
+    "贾宝玉和林黛玉什么关系",
+    "第23回讲了什么？",
+    "谁和薛宝钗一起出现过？",
+]
+
+
+def _percentile(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    k = min(len(xs) - 1, max(0, int(round(p / 100.0 * (len(xs) - 1)))))
+    return xs[k]
+
+
+def _report(name: str, lat: List[float], elapsed: float) -> None:
+    print(
+        f"{name:<6} n={len(lat)} | {len(lat) / elapsed:8.1f} req/s | "
+        f"p50 {_percentile(lat, 50) * 1000:7.1f} ms | p99 {_percentile(lat, 99) * 1000:7.1f} ms | "
+        f"mean {statistics.mean(lat) * 1000:7.1f} ms"
+    )
+
+
+def _one_sync(q: str) -> float:
+    t0 = time.perf_counter()
+    payload = detect_intent(q)
+    cypher, params = build_query(payload)
+    run_query(cypher, params)
+    return time.perf_counter() - t0
+
+
+def bench_sync(n: int, threads: int) -> None:
+    qs = [QUESTIONS[i % len(QUESTIONS)] for i in range(n)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        lat = list(ex.map(_one_sync, qs))
+    _report("sync", lat, time.perf_counter() - t0)
+
+
+async def _one_async(q: str, sem: asyncio.Semaphore) -> float:
+    async with sem:
+        t0 = time.perf_counter()
+        payload = detect_intent(q)
+        cypher, params = build_query(payload)
+        await run_query_async(cypher, params)
+        return time.perf_counter() - t0
+
+
+async def bench_async(n: int, concurrency: int) -> None:
+    # 客户端并发上限：模拟同时在途的请求数
+    sem = asyncio.Semaphore(concurrency)
+    qs = [QUESTIONS[i % len(QUESTIONS)] for i in range(n)]
+    t0 = time.perf_counter()
+    lat = await asyncio.gather(*(_one_async(q, sem) for q in qs))
+    _report("async", list(lat), time.perf_counter() - t0)
+    await close_pool()
+
+
+async def bench_batch(sizes: List[int], rounds: int) -> None:
+    for size in sizes:
+        qs = [QUESTIONS[i % len(QUESTIONS)] for i in range(size)]
+        payloads = [detect_intent(q) for q in qs]
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for p in payloads:
+                await run_query_async(*build_query(p))
+        single = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            groups: dict = {}
+            for p in payloads:
+                groups.setdefault(p["intent"], []).append(build_query(p)[1])
+            await asyncio.gather(*(execute_batch(intent, ps) for intent, ps in groups.items()))
+        batched = time.perf_counter() - t0
+        n = size * rounds
+        print(f"batch={size:<4} 逐条 {n / single:8.1f} q/s | UNWIND {n / batched:8.1f} q/s | {single / batched:5.1f}x")
+    await close_pool()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=1000, help="总请求数")
+    ap.add_argument("--concurrency", type=int, default=200, help="异步路径的在途请求数")
+    ap.add_argument("--threads", type=int, default=40, help="同步路径线程数（Starlette 默认 40）")
+    ap.add_argument("--batch-sizes", default="", help="逗号分隔的批大小，指定时只跑批量基准")
+    ap.add_argument("--rounds", type=int, default=5, help="批量基准每个批大小的轮数")
+    args = ap.parse_args()
+
+    if args.batch_sizes:
+        sizes = [int(x) for x in args.batch_sizes.split(",") if x.strip()]
+        asyncio.run(bench_batch(sizes, args.rounds))
+        return
+
+    # 预热：建立连接、加载人名词典
+    _one_sync(QUESTIONS[0])
+
+    bench_sync(args.requests, args.threads)
+    asyncio.run(bench_async(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+/qa 压测：按七类意图生成问句语料，以指定并发打到服务上，按意图统计 p50/p95/p99 延迟与 req/s。
+
+语料来源：
+- 人名：name_dict.txt（约七成取自图谱中实际出现的人物，其余随机取词典人名，模拟查无结果的问题）
+- relation：relation.txt 中的人物对；path：relation.txt 人物中随机抽取的人物对
+- events / cooccur / panci：kg_events.csv 的 person 列与词典人名
+- chapter_events：reddream_chapters/ 下的章节列表
+- search：kg_events.csv 的事件标题套用几种问法
+生成后用 qa_intent.detect_intent 复核，意图不符的问句丢弃并计数。
+
+运行方式：
+- 默认进程内：通过 ASGI 直接调用 scripts.qa_service:app（不经网络），--backend memory（默认）
+  时使用进程内图引擎代替 Neo4j，无数据库的机器上也能跑
+- --url http://127.0.0.1:8000：对已启动的服务压测（后端由服务端 config 决定）
+
+结果写为 JSON（--out），--baseline 指定上一次的结果文件时打印各意图 p99 / req/s 的变化。
+
+用法（在项目根目录执行）：
+  python -m scripts.bench_qa_load --requests 5000 --concurrency 64 --out qa_load.json
+  python -m scripts.bench_qa_load --url http://127.0.0.1:8000 --baseline qa_load.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+INTENTS = ("panci", "events", "relation", "path", "cooccur", "chapter_events", "search")
+
+TEMPLATES = {
+    "panci": ["{a}的判词是什么？", "{a}的判词", "请问{a}的判语是哪句"],
+    "events": ["{a}参与了什么？", "{a}经历了哪些事", "{a}涉及哪些剧情", "{a}做了什么"],
+    "relation": ["{a}和{b}是什么关系？", "{a}与{b}什么关系", "{a}跟{b}有什么关系"],
+    "path": ["{a}和{b}有什么联系？", "{a}到{b}的路径", "{a}和{b}怎么连起来的"],
+    "cooccur": ["谁和{a}一起出现过？", "和{a}同场的有哪些人", "{a}和谁在同一事件里"],
+    "chapter_events": ["第{n}回讲了什么？", "第{n}回有哪些事件", "第{n}章节的情节"],
+    "search": ["{t}是怎么回事", "{t}", "讲讲{t}的故事"],
+}
+
+
+# ---------- 语料 ----------
+def _read_names() -> List[str]:
+    with open(ROOT / "name_dict.txt", encoding="utf-8") as f:
+        return [line.split()[0] for line in f if line.strip()]
+
+
+def _read_relations() -> List[Tuple[str, str]]:
+    out = []
+    with open(ROOT / "relation.txt", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) >= 3 and row[0].strip() and row[1].strip():
+                out.append((row[0].strip(), row[1].strip()))
+    return out
+
+
+def _read_events() -> Tuple[List[str], List[str]]:
+    persons, titles = [], []
+    with open(ROOT / "kg_events.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("person"):
+                persons.append(row["person"].strip())
+            if row.get("title"):
+                titles.append(row["title"].strip())
+    return sorted(set(persons)), titles
+
+
+def _read_chapters() -> List[int]:
+    return sorted(int(p.stem) for p in (ROOT / "reddream_chapters").glob("*.txt") if p.stem.isdigit())
+
+
+def generate_corpus(per_intent: int, seed: int = 42) -> Tuple[List[Tuple[str, str]], Counter]:
+    """返回 ([(意图, 问句)], 各意图被丢弃的问句数)。"""
+    from scripts.qa_intent import detect_intent
+
+    rnd = random.Random(seed)
+    names = _read_names()
+    pairs = _read_relations()
+    event_persons, titles = _read_events()
+    graph_persons = sorted({p for pair in pairs for p in pair} | set(event_persons))
+    chapters = _read_chapters() or list(range(1, 121))
+
+    def person() -> str:
+        return rnd.choice(graph_persons if rnd.random() < 0.7 else names)
+
+    def make(intent: str) -> str:
+        tpl = rnd.choice(TEMPLATES[intent])
+        if intent == "relation":
+            a, b = rnd.choice(pairs)
+            return tpl.format(a=a, b=b)
+        if intent == "path":
+            a, b = rnd.sample(graph_persons, 2)
+            return tpl.format(a=a, b=b)
+        if intent == "chapter_events":
+            return tpl.format(n=rnd.choice(chapters))
+        if intent == "search":
+            return tpl.format(t=rnd.choice(titles))
+        return tpl.format(a=rnd.choice(event_persons) if intent != "panci" else person())
+
+    corpus: List[Tuple[str, str]] = []
+    dropped: Counter = Counter()
+    for intent in INTENTS:
+        got = 0
+        # 人名互相包含等情况会让意图识别落到别的分支，多试几次补足数量
+        for _ in range(per_intent * 5):
+            if got >= per_intent:
+                break
+            q = make(intent)
+            if detect_intent(q)["intent"] != intent:
+                dropped[intent] += 1
+                continue
+            corpus.append((intent, q))
+            got += 1
+    rnd.shuffle(corpus)
+    return corpus, dropped
+
+
+# ---------- 压测 ----------
+def _percentile(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    k = min(len(xs) - 1, max(0, int(round(p / 100.0 * (len(xs) - 1)))))
+    return xs[k]
+
+
+async def _drive(client, corpus: List[Tuple[str, str]], n: int, concurrency: int):
+    lat: Dict[str, List[float]] = {i: [] for i in INTENTS}
+    errors: Counter = Counter()
+    cached: Counter = Counter()
+    counter = iter(range(n))
+
+    async def worker() -> None:
+        for k in counter:
+            intent, q = corpus[k % len(corpus)]
+            t0 = time.perf_counter()
+            try:
+                r = await client.post("/qa", json={"question": q})
+                ok = r.status_code == 200
+            except Exception:
+                ok = False
+            dt = time.perf_counter() - t0
+            if not ok:
+                errors[intent] += 1
+                continue
+            lat[intent].append(dt)
+            if r.json().get("cached"):
+                cached[intent] += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return lat, errors, cached, time.perf_counter() - t0
+
+
+def _summary(xs: List[float], elapsed: float, errors: int, cached: int) -> Dict[str, float]:
+    if not xs:
+        return {"count": 0, "errors": errors}
+    return {
+        "count": len(xs),
+        "errors": errors,
+        "cached": cached,
+        "rps": round(len(xs) / elapsed, 1),
+        "p50_ms": round(_percentile(xs, 50) * 1000, 3),
+        "p95_ms": round(_percentile(xs, 95) * 1000, 3),
+        "p99_ms": round(_percentile(xs, 99) * 1000, 3),
+        "mean_ms": round(statistics.mean(xs) * 1000, 3),
+    }
+
+
+async def run(args) -> Dict:
+    import httpx
+
+    corpus, dropped = generate_corpus(args.per_intent, args.seed)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=httpx.Limits(max_connections=args.concurrency))
+        lifespan = None
+    else:
+        import config
+
+        config.QA_BACKEND = args.backend
+        config.QA_LOG_ENABLED = False  # 压测请求不写入查询日志
+        if args.no_cache:
+            config.QA_CACHE_SIZE = 0
+        from scripts.qa_service import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout)
+        lifespan = app.router.lifespan_context(app)
+
+    if lifespan is not None:
+        await lifespan.__aenter__()
+    try:
+        async with client:
+            # 预热：加载人名词典、图引擎与连接
+            await _drive(client, corpus, min(args.warmup, len(corpus)), min(args.concurrency, 8))
+            lat, errors, cached, elapsed = await _drive(client, corpus, args.requests, args.concurrency)
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+
+    all_lat = [x for xs in lat.values() for x in xs]
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "target": args.url or f"asgi:{args.backend}",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cache": not args.no_cache if not args.url else "server",
+            "corpus_size": len(corpus),
+            "dropped": dict(dropped),
+            "elapsed_s": round(elapsed, 3),
+        },
+        "overall": _summary(all_lat, elapsed, sum(errors.values()), sum(cached.values())),
+        "intents": {i: _summary(lat[i], elapsed, errors[i], cached[i]) for i in INTENTS},
+    }
+
+
+def _print(result: Dict, baseline: Optional[Dict]) -> None:
+    print(f"== {result['meta']['target']} | 并发 {result['meta']['concurrency']} | {result['meta']['elapsed_s']} s ==")
+    rows = [("overall", result["overall"])] + list(result["intents"].items())
+    for name, s in rows:
+        if not s.get("count"):
+            print(f"{name:<15} 无成功请求（错误 {s.get('errors', 0)}）")
+            continue
+        line = (
+            f"{name:<15} n={s['count']:>6} | {s['rps']:9.1f} req/s | p50 {s['p50_ms']:8.2f} | "
+            f"p95 {s['p95_ms']:8.2f} | p99 {s['p99_ms']:8.2f} ms | 错误 {s['errors']}"
+        )
+        old = (baseline or {}).get("overall" if name == "overall" else "intents", {})
+        old = old if name == "overall" else old.get(name, {})
+        if old.get("count"):
+            line += f" | p99 {s['p99_ms'] - old['p99_ms']:+.2f} ms, req/s {s['rps'] - old['rps']:+.1f}"
+        print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", help="服务地址；不指定时进程内经 ASGI 调用")
+    ap.add_argument("--backend", choices=["memory", "neo4j"], default="memory", help="进程内模式的查询后端")
+    ap.add_argument("--requests", type=int, default=5000, help="总请求数（不含预热）")
+    ap.add_argument("--concurrency", type=int, default=64, help="同时在途的请求数")
+    ap.add_argument("--per-intent", type=int, default=200, help="每类意图生成的问句数")
+    ap.add_argument("--warmup", type=int, default=200, help="预热请求数")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--timeout", type=float, default=30.0, help="单个请求超时（秒）")
+    ap.add_argument("--no-cache", action="store_true", help="进程内模式下关闭答案缓存，测量实际查询开销")
+    ap.add_argument("--out", default="qa_load.json", help="JSON 结果输出路径")
+    ap.add_argument("--baseline", help="上一次的 JSON 结果，用于对比")
+    args = ap.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    result = asyncio.run(run(args))
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    _print(result, baseline)
+
+
+if __name__ == "__main__":
+    main()
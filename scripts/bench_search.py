@@ -0,0 +1,126 @@
+"""
+search 意图基准：全文索引检索 vs. 原先的 CONTAINS 全量扫描，事件规模取当前的 1×/10×/100×。
+
+- 默认只测进程内实现：TextIndex（二字组倒排）vs. 逐条 CONTAINS
+- --neo4j 时另把放大后的事件写入 Neo4j 的 :BenchEvent 标签（独立全文索引 bench_event_text），
+  对比 db.index.fulltext.queryNodes 与 CONTAINS 扫描，结束后删除（--keep 保留）
+
+用法（在项目根目录执行）：
+  python -m scripts.bench_search [--scales 1,10,100] [--neo4j]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable, List, Tuple
+
+from scripts.qa_fulltext import TextIndex, extract_keywords, lucene_query
+from scripts.qa_memgraph import get_memgraph
+
+QUERIES = ["林黛玉葬花是怎么回事", "宝玉挨打", "秦可卿去世", "大观园", "判词", "元春省亲", "刘姥姥"]
+
+
+def _docs(scale: int) -> List[Tuple[str, str, str]]:
+    g = get_memgraph()
+    base = [(eid, e.get("title") or "", e.get("sentence") or "") for eid, e in g.events.items()]
+    return [(f"{eid}#{k}", t, s) for k in range(scale) for eid, t, s in base]
+
+
+def _median_us(fn: Callable[[], object], repeat: int) -> float:
+    xs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        xs.append(time.perf_counter() - t0)
+    return statistics.median(xs) * 1e6
+
+
+def bench_memory(scales: List[int], repeat: int) -> None:
+    names = list(get_memgraph().persons)
+    term_sets = [extract_keywords(q, names) for q in QUERIES]
+    for scale in scales:
+        docs = _docs(scale)
+        t0 = time.perf_counter()
+        idx = TextIndex(docs)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        def indexed():
+            for terms in term_sets:
+                idx.search(terms, 10)
+
+        def scan():
+            for q in QUERIES:
+                [d for d in docs if q in d[1] or q in d[2]][:10]
+
+        per_q = len(QUERIES)
+        print(
+            f"[内存] 事件 {len(docs):>6} | 建索引 {build_ms:7.1f} ms | "
+            f"全文 {_median_us(indexed, repeat) / per_q:8.1f} us/次 | CONTAINS {_median_us(scan, repeat) / per_q:8.1f} us/次"
+        )
+
+
+def bench_neo4j(scales: List[int], repeat: int, keep: bool) -> None:
+    from config import get_graph
+
+    graph = get_graph()
+    graph.run(
+        """
+        CREATE FULLTEXT INDEX bench_event_text IF NOT EXISTS
+        FOR (e:BenchEvent) ON EACH [e.title, e.sentence]
+        OPTIONS {indexConfig: {`fulltext.analyzer`: 'cjk'}}
+        """
+    )
+    names = list(get_memgraph().persons)
+    queries = [lucene_query(extract_keywords(q, names)) for q in QUERIES]
+    try:
+        for scale in scales:
+            graph.run("MATCH (e:BenchEvent) DETACH DELETE e")
+            docs = [{"id": i, "title": t, "sentence": s} for i, t, s in _docs(scale)]
+            for k in range(0, len(docs), 1000):
+                graph.run("UNWIND $rows AS r CREATE (e:BenchEvent) SET e = r", rows=docs[k:k + 1000])
+            graph.run("CALL db.awaitIndexes(300)")
+
+            def indexed():
+                for q in queries:
+                    graph.run(
+                        "CALL db.index.fulltext.queryNodes('bench_event_text', $q, {limit: 10}) "
+                        "YIELD node, score RETURN node.title, score",
+                        q=q,
+                    ).data()
+
+            def scan():
+                for q in QUERIES:
+                    graph.run(
+                        "MATCH (e:BenchEvent) WHERE e.title CONTAINS $kw OR e.sentence CONTAINS $kw "
+                        "RETURN e.title LIMIT 10",
+                        kw=q,
+                    ).data()
+
+            per_q = len(QUERIES)
+            print(
+                f"[Neo4j] 事件 {len(docs):>6} | 全文 {_median_us(indexed, repeat) / per_q / 1000:8.2f} ms/次 | "
+                f"CONTAINS {_median_us(scan, repeat) / per_q / 1000:8.2f} ms/次"
+            )
+    finally:
+        if not keep:
+            graph.run("MATCH (e:BenchEvent) DETACH DELETE e")
+            graph.run("DROP INDEX bench_event_text IF EXISTS")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scales", default="1,10,100", help="事件放大倍数，逗号分隔")
+    ap.add_argument("--repeat", type=int, default=20, help="每项重复次数（取中位数）")
+    ap.add_argument("--neo4j", action="store_true", help="同时在 Neo4j 上测试")
+    ap.add_argument("--keep", action="store_true", help="保留 :BenchEvent 测试数据与索引")
+    args = ap.parse_args()
+    scales = [int(x) for x in args.scales.split(",") if x.strip()]
+
+    bench_memory(scales, args.repeat)
+    if args.neo4j:
+        bench_neo4j(scales, args.repeat, args.keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+加载耗时基准：解析 CSV/relation.txt 建图 vs. mmap 打开二进制快照。
+
+- csv          MemGraph.from_files()：逐行解析三个数据文件并建索引
+- mmap         GraphSnapshot(verify=False)：仅映射文件、读段表（worker 间共享物理页）
+- mmap+crc     GraphSnapshot(verify=True)：额外校验 crc32
+- mmap->graph  在快照上建 SnapshotGraph（进程内图引擎的实际启动路径：只建人名/事件 ID 查找表）
+
+--scale N 时把事件与边复制 N 份（改写 ID），观察数据量增长后的差距。
+
+用法（在项目根目录执行）：
+  python -m scripts.bench_snapshot_load [--repeat 20] [--scale 1]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from scripts.graph_snapshot import GraphSnapshot, SnapshotGraph, write_snapshot
+from scripts.qa_memgraph import MemGraph, EVENTS_CSV, EDGES_CSV, RELATION_TXT
+
+
+def _scaled_files(tmp: Path, scale: int) -> tuple:
+    """把事件与事件边复制 scale 份，ID 加后缀。"""
+    ev_lines = EVENTS_CSV.read_text(encoding="utf-8").splitlines()
+    ed_lines = EDGES_CSV.read_text(encoding="utf-8").splitlines()
+    ev_out, ed_out = [ev_lines[0]], [ed_lines[0]]
+    for k in range(scale):
+        suffix = "" if k == 0 else f"_x{k}"
+        for line in ev_lines[1:]:
+            rid, rest = line.split(",", 1)
+            ev_out.append(f"{rid}{suffix},{rest}")
+        for line in ed_lines[1:]:
+            parts = line.split(",")
+            if len(parts) >= 3:
+                parts[1] += suffix
+            ed_out.append(",".join(parts))
+    ev, ed = tmp / "events.csv", tmp / "edges.csv"
+    ev.write_text("\n".join(ev_out) + "\n", encoding="utf-8")
+    ed.write_text("\n".join(ed_out) + "\n", encoding="utf-8")
+    return ev, ed
+
+
+def _time(fn, repeat: int) -> float:
+    xs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        obj = fn()
+        xs.append(time.perf_counter() - t0)
+        if isinstance(obj, (GraphSnapshot, SnapshotGraph)):
+            obj.close()
+    return statistics.median(xs) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20, help="每项重复次数（取中位数）")
+    ap.add_argument("--scale", type=int, default=1, help="事件数据放大倍数")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        tmp = Path(d)
+        ev, ed = _scaled_files(tmp, args.scale)
+        snap_path = tmp / "kg_snapshot.bin"
+        g = MemGraph.from_files(ev, ed, RELATION_TXT)
+        size = write_snapshot(g, snap_path)
+        print(f"事件 {len(g.events)} | INVOLVED {sum(map(len, g.inv_by_person.values()))} | 快照 {size / 1024:.1f} KiB")
+
+        results = {
+            "csv": _time(lambda: MemGraph.from_files(ev, ed, RELATION_TXT), args.repeat),
+            "mmap": _time(lambda: GraphSnapshot(snap_path, verify=False), args.repeat),
+            "mmap+crc": _time(lambda: GraphSnapshot(snap_path, verify=True), args.repeat),
+            "mmap->graph": _time(lambda: GraphSnapshot(snap_path, verify=False).to_memgraph(), args.repeat),
+        }
+    base = results["csv"]
+    for name, ms in results.items():
+        print(f"{name:<12} {ms:9.3f} ms  ({base / ms:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+/suggest 基准：逐字输入每个人名与事件标题（模拟按键），统计字典树查找与完整 HTTP 请求的耗时。
+
+- 查找：SuggestIndex.suggest 的 p50/p99（微秒），另以 --scales 倍放大词条测构建耗时与查找耗时的变化
+- 端点：进程内经 ASGI 以 --concurrency 并发请求 /suggest（memory 后端，无需数据库），统计 p50/p99 与 req/s；
+  延迟含客户端开销，并发大于 CPU 核数时还包含排队时间，单次请求的处理耗时看 --concurrency 1
+
+用法（在项目根目录执行）：
+  python -m scripts.bench_suggest [--scales 1,10,100] [--requests 20000] [--concurrency 64]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from scripts.qa_suggest import SuggestIndex, _load_entries
+
+
+def _percentile(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, max(0, int(round(p / 100.0 * (len(xs) - 1)))))]
+
+
+def keystrokes(entries) -> List[str]:
+    return [text[:k] for text, _, _ in entries for k in range(1, len(text) + 1)]
+
+
+def bench_lookup(scales: List[int]) -> None:
+    base = _load_entries()
+    for scale in scales:
+        entries = [(f"{t}{k}" if k else t, kind, s) for k in range(scale) for t, kind, s in base]
+        t0 = time.perf_counter()
+        idx = SuggestIndex(entries)
+        build_ms = (time.perf_counter() - t0) * 1000
+        lat = []
+        for q in keystrokes(base):
+            t0 = time.perf_counter()
+            idx.suggest(q)
+            lat.append((time.perf_counter() - t0) * 1e6)
+        print(
+            f"[查找] 词条 {len(entries):>7} | 构建 {build_ms:8.1f} ms | "
+            f"p50 {_percentile(lat, 50):6.2f} us | p99 {_percentile(lat, 99):6.2f} us"
+        )
+
+
+async def bench_endpoint(n: int, concurrency: int) -> None:
+    import httpx
+
+    import config
+
+    config.QA_BACKEND = "memory"
+    config.QA_LOG_ENABLED = False
+    from scripts.qa_service import app
+
+    queries = keystrokes(_load_entries())
+    lat: List[float] = []
+    counter = iter(range(n))
+
+    async def worker(client) -> None:
+        for k in counter:
+            t0 = time.perf_counter()
+            r = await client.get("/suggest", params={"q": queries[k % len(queries)]})
+            r.raise_for_status()
+            lat.append((time.perf_counter() - t0) * 1000)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - t0
+    print(
+        f"[端点] {len(lat)} 次请求，并发 {concurrency} | {len(lat) / elapsed:9.1f} req/s | "
+        f"p50 {_percentile(lat, 50):6.3f} ms | p99 {_percentile(lat, 99):6.3f} ms"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scales", default="1,10,100", help="词条放大倍数，逗号分隔")
+    ap.add_argument("--requests", type=int, default=20000, help="端点请求数；0 表示只测查找")
+    ap.add_argument("--concurrency", type=int, default=64)
+    args = ap.parse_args()
+    bench_lookup([int(x) for x in args.scales.split(",") if x.strip()])
+    if args.requests > 0:
+        asyncio.run(bench_endpoint(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+校验进程内图引擎（qa_memgraph）与 Neo4j 上 Cypher 模板的结果一致性。
+
+对七类意图分别生成一批参数（全部人物、relation.txt 中的全部关系对、随机人物对、
+1~120 回、事件标题关键词等），两边各跑一次并比较：
+- 无 ORDER BY 的模板：Neo4j 返回哪几行不确定，因此去掉 LIMIT 取完整结果作参照，
+  要求引擎结果是参照的子集，且行数 = min(LIMIT, 参照行数)
+- events / cooccur / chapter_events：模板带 ORDER BY 与 LIMIT $limit（键集分页，见 qa_page），
+  逐行比较首页，另沿下一页令牌翻完全部页再逐行比较
+- path：最短路径可能不唯一，比较跳数与两端人物，并要求两边路径的每一跳都是图中真实存在的边
+- search：Lucene 与进程内索引的打分不同，取完整命中（limit 放大）比较命中事件集合
+
+需要 Neo4j 已导入与本地文件一致的数据，属于可选的全量对照；不连库的回归测试见 tests/test_memgraph_parity.py
+（夹具图谱上七类意图的期望结果，python -m pytest 运行）。用法（在项目根目录执行）：
+  python -m scripts.check_memgraph_parity [--pairs 50]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from scripts.qa_cypher import build_query, run_query_async
+from scripts.qa_fulltext import extract_keywords
+from scripts.qa_memgraph import MemGraph
+from scripts.qa_page import PAGED_INTENTS, decode_token, split_page
+from scripts.qa_pool import close_pool
+
+
+def _canon(row: dict) -> str:
+    return json.dumps(row, ensure_ascii=False, sort_keys=True)
+
+
+def _limit_of(cypher: str) -> int:
+    m = re.search(r"LIMIT\s+(\d+)", cypher)
+    return int(m.group(1)) if m else 0
+
+
+def _strip_limit(cypher: str) -> str:
+    return re.sub(r"LIMIT\s+\d+", "", cypher)
+
+
+def sample_payloads(g: MemGraph, n_pairs: int) -> List[Dict]:
+    rnd = random.Random(42)
+    persons = list(g.persons)
+    out: List[Dict] = []
+    for who in persons + [None, "不存在的人"]:
+        out.append({"intent": "panci", "who": who})
+        out.append({"intent": "events", "who": who})
+        out.append({"intent": "cooccur", "who": who})
+    for a, b, _ in g.rel_edges:
+        out.append({"intent": "relation", "A": a, "B": b})
+        out.append({"intent": "relation", "A": b, "B": a})
+    for _ in range(n_pairs):
+        a, b = rnd.sample(persons, 2)
+        out.append({"intent": "relation", "A": a, "B": b})
+        out.append({"intent": "path", "A": a, "B": b})
+    for i in range(1, 121):
+        out.append({"intent": "chapter_events", "chap": str(i)})
+    kws = {e["title"][:2] for e in g.events.values() if e.get("title")}
+    for kw in sorted(kws) + ["葬花", "林黛玉葬花是怎么回事"]:
+        out.append({"intent": "search", "kw": kw, "terms": extract_keywords(kw, g.persons)})
+    return out
+
+
+def _node(props: dict) -> Tuple[str, str]:
+    return ("E", props["id"]) if "id" in props else ("P", props.get("name"))
+
+
+def _real_path(g: MemGraph, p: list) -> bool:
+    """p 为 [节点, 关系类型, 节点, …]，每一跳都须是图中存在的边（无向）。"""
+    return all(
+        (_node(p[i + 2]), p[i + 1]) in set(g._neighbors(_node(p[i])))
+        for i in range(0, len(p) - 2, 2)
+    )
+
+
+def compare(g: MemGraph, intent: str, cypher: str, mem: List[dict], ref: List[dict]) -> Tuple[bool, str]:
+    if intent == "path":
+        if not mem or not ref:
+            return (not mem and not ref), f"mem={len(mem)} neo4j={len(ref)}"
+        pm, pr = mem[0]["p"], ref[0]["p"]
+        same = len(pm) == len(pr) and pm[0] == pr[0] and pm[-1] == pr[-1]
+        valid = _real_path(g, pm) and _real_path(g, pr)
+        return same and valid, f"跳数 mem={len(pm) // 2} neo4j={len(pr) // 2} 边均存在={valid}"
+    if intent == "search":
+        titles = lambda rows: sorted(_canon({k: r[k] for k in ("title", "sentence", "chapter")}) for r in rows)
+        return titles(mem) == titles(ref), f"mem={len(mem)} neo4j={len(ref)}"
+    if intent in PAGED_INTENTS:
+        return list(map(_canon, mem)) == list(map(_canon, ref)), f"mem={len(mem)} neo4j={len(ref)}"
+    limit = _limit_of(cypher)
+    ref_count = Counter(map(_canon, ref))
+    mem_count = Counter(map(_canon, mem))
+    subset = all(ref_count[k] >= v for k, v in mem_count.items())
+    return subset and len(mem) == min(limit, len(ref)), f"mem={len(mem)} neo4j(无LIMIT)={len(ref)}"
+
+
+async def _compare_pages(g: MemGraph, payload: Dict) -> Tuple[bool, str]:
+    """两边各自沿 next 令牌翻完全部页，逐行比较。"""
+    intent = payload["intent"]
+    pages = {}
+    for name in ("mem", "neo4j"):
+        rows: List[dict] = []
+        after = None
+        while True:
+            cypher, params = build_query({**payload, "after": after})
+            page = g.query(intent, params) if name == "mem" else await run_query_async(cypher, params)
+            page, token = split_page(intent, params, page)
+            rows.extend(page)
+            if token is None:
+                break
+            after = decode_token(token, intent, params)
+        pages[name] = list(map(_canon, rows))
+    return pages["mem"] == pages["neo4j"], f"翻页 mem={len(pages['mem'])} neo4j={len(pages['neo4j'])}"
+
+
+async def run(n_pairs: int) -> int:
+    g = MemGraph.from_files()
+    failures = 0
+    stats: Counter = Counter()
+    for payload in sample_payloads(g, n_pairs):
+        intent = payload["intent"]
+        cypher, params = build_query(payload)
+        if intent == "search":
+            params["limit"] = 10000
+        mem = g.query(intent, params)
+        ref_cypher = cypher if intent in ("path", "search") or intent in PAGED_INTENTS else _strip_limit(cypher)
+        ref = await run_query_async(ref_cypher, params)
+        ok, detail = compare(g, intent, cypher, mem, ref)
+        if ok and intent in PAGED_INTENTS and intent != "search":
+            ok, detail = await _compare_pages(g, payload)
+        stats[(intent, ok)] += 1
+        if not ok:
+            failures += 1
+            print(f"[不一致] {intent} {params} | {detail}")
+    await close_pool()
+
+    print("== 一致性统计 ==")
+    for intent in ("panci", "events", "relation", "path", "cooccur", "chapter_events", "search"):
+        print(f"{intent:<15} 通过 {stats[(intent, True)]:>4} | 不一致 {stats[(intent, False)]:>3}")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pairs", type=int, default=50, help="随机人物对数量（relation/path）")
+    args = ap.parse_args()
+    failures = asyncio.run(run(args.pairs))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+查询计划检查：对 qa_cypher.build_query 生成的每个模板（及其 UNWIND 批量形式）执行 EXPLAIN，
+解析执行计划并标出退化的算子。
+
+判定规则：
+- NodeByLabelScan / AllNodesScan / DirectedRelationshipTypeScan 等全量扫描：模板没有用上索引
+- CartesianProduct：仅当其下出现扫描时判为退化（两侧都是唯一索引查找时只是两行相乘）
+- VarLengthExpand / ShortestPath 没有跳数上限：遍历规模不受控
+
+EXPLAIN 之前先做不连库的静态检查（--static 只做这一步，可在 CI 中无数据库执行）：
+- SKIP/LIMIT 只接受常量或 $参数，批量形式中不能出现 item.xxx
+- 批量形式中 WITH 会重新划定作用域，之后仍引用 item 的，WITH 必须带上 item
+EXPLAIN 本身报错（语法错误、变量未定义）的模板记为 error。
+
+模板依赖的索引（REQUIRED_INDEXES）缺失时先创建再检查（--no-create 只检查）。
+输出机器可读的 JSON 报告（--out 写文件，否则打印到标准输出）；任一模板退化时以非零状态退出，
+可直接接在导入脚本之后或 CI 中执行。
+
+用法（在项目根目录执行）：
+  python -m scripts.check_query_plans [--out plan_report.json] [--no-create] [--static]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from py2neo import Graph
+
+from config import get_graph
+from scripts.qa_cypher import build_batch_query, build_query
+from scripts.qa_fulltext import extract_keywords
+
+# 模板所需的索引：(名称, 创建语句)。约束 person_name_unique / event_id_unique 由导入脚本创建，
+# 这里同样确保存在，以便单独执行本脚本时也能得到正确的计划
+REQUIRED_INDEXES: List[Tuple[str, str]] = [
+    ("person_name_unique", "CREATE CONSTRAINT person_name_unique IF NOT EXISTS FOR (p:Person) REQUIRE p.name IS UNIQUE"),
+    ("event_id_unique", "CREATE CONSTRAINT event_id_unique IF NOT EXISTS FOR (e:Event) REQUIRE e.id IS UNIQUE"),
+    # chapter_events 用 CONTAINS 过滤，需要文本索引才能走 NodeIndexContainsScan
+    ("event_chapter_text", "CREATE TEXT INDEX event_chapter_text IF NOT EXISTS FOR (e:Event) ON (e.chapter)"),
+    ("involved_type", "CREATE INDEX involved_type IF NOT EXISTS FOR ()-[r:INVOLVED]-() ON (r.type)"),
+    ("relation_type", "CREATE INDEX relation_type IF NOT EXISTS FOR ()-[r:RELATION]-() ON (r.type)"),
+]
+
+INTENTS = ("panci", "events", "relation", "path", "cooccur", "chapter_events", "search")
+
+# 代表性参数：与 verify_graph 的样例人物一致
+SAMPLE_PAYLOAD: Dict[str, Any] = {"who": "林黛玉", "A": "贾宝玉", "B": "林黛玉", "chap": "3", "kw": "林黛玉葬花"}
+
+SCAN_OPS = {
+    "AllNodesScan",
+    "NodeByLabelScan",
+    "UnionNodeByLabelsScan",
+    "IntersectionNodeByLabelsScan",
+    "DirectedRelationshipTypeScan",
+    "UndirectedRelationshipTypeScan",
+    "DirectedAllRelationshipsScan",
+    "UndirectedAllRelationshipsScan",
+}
+
+
+def _op_name(plan: Dict[str, Any]) -> str:
+    # Neo4j 5 起算子名带 “@neo4j” 后缀
+    return (plan.get("operatorType") or "").split("@")[0]
+
+
+def _details(plan: Dict[str, Any]) -> str:
+    args = plan.get("args") or {}
+    return str(args.get("Details") or args.get("ExpandExpression") or "")
+
+
+def _has_scan(plan: Dict[str, Any]) -> bool:
+    return _op_name(plan) in SCAN_OPS or any(_has_scan(c) for c in plan.get("children") or [])
+
+
+def _unbounded(op: str, details: str) -> bool:
+    if op.startswith("VarLengthExpand") or op.startswith("ShortestPath") or op.startswith("StatefulShortestPath"):
+        # 有上限的形如 *..4 / *1..4；无上限为 * 或 *1..
+        m = re.search(r"\*(\d*)(\.\.(\d*))?", details)
+        return m is None or (m.group(2) is not None and not m.group(3)) or (m.group(2) is None and not m.group(1))
+    return False
+
+
+def analyze(plan: Dict[str, Any]) -> Tuple[List[str], List[Dict[str, str]]]:
+    """返回 (算子序列, 问题列表)。"""
+    ops: List[str] = []
+    issues: List[Dict[str, str]] = []
+
+    def walk(node: Dict[str, Any]) -> None:
+        op, details = _op_name(node), _details(node)
+        ops.append(op)
+        if op in SCAN_OPS:
+            issues.append({"kind": "scan", "operator": op, "details": details})
+        elif op == "CartesianProduct" and _has_scan(node):
+            issues.append({"kind": "cartesian_product", "operator": op, "details": details})
+        elif _unbounded(op, details):
+            issues.append({"kind": "unbounded_expand", "operator": op, "details": details})
+        for child in node.get("children") or []:
+            walk(child)
+
+    walk(plan)
+    return ops, issues
+
+
+def lint(cypher: str) -> List[Dict[str, str]]:
+    """不连库的静态检查，返回问题列表。"""
+    issues: List[Dict[str, str]] = []
+    for m in re.finditer(r"\b(SKIP|LIMIT)\s+(item\.\w+)", cypher):
+        issues.append({"kind": "variable_in_skip_limit", "operator": m.group(1), "details": m.group(0)})
+    if "UNWIND $batch AS item" in cypher:
+        for m in re.finditer(r"\bWITH\s+(?!item\b(?!\.))[^\n]*", cypher):
+            if "item." in cypher[m.end():]:
+                issues.append({"kind": "item_out_of_scope", "operator": "WITH", "details": m.group(0).strip()})
+    return issues
+
+
+def explain(graph: Graph, cypher: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    cursor = graph.run("EXPLAIN " + cypher.strip(), **params)
+    cursor.data()
+    return cursor.plan() or {}
+
+
+def templates() -> List[Tuple[str, str, Dict[str, Any]]]:
+    """[(名称, Cypher, 参数)]：七类单条模板 + 对应的批量形式。"""
+    out = []
+    for intent in INTENTS:
+        payload = {"intent": intent, **SAMPLE_PAYLOAD}
+        if intent == "search":
+            payload["terms"] = extract_keywords(payload["kw"], [SAMPLE_PAYLOAD["who"]])
+        cypher, params = build_query(payload)
+        out.append((intent, cypher, params))
+        batch_cypher, batch_params = build_batch_query(intent, [{"idx": 0, **params}])
+        out.append((f"{intent}[batch]", batch_cypher, batch_params))
+    return out
+
+
+def ensure_indexes(graph: Graph) -> List[str]:
+    """创建缺失的索引/约束，返回本次新建的名称。"""
+    existing = {r["name"] for r in graph.run("SHOW INDEXES YIELD name RETURN name").data()}
+    created = []
+    for name, cypher in REQUIRED_INDEXES:
+        if name not in existing:
+            graph.run(cypher)
+            created.append(name)
+    if created:
+        graph.run("CALL db.awaitIndexes(300)")
+    return created
+
+
+def check(graph: Optional[Graph], create: bool = True) -> Dict[str, Any]:
+    """graph 为 None 时只做静态检查。"""
+    created = ensure_indexes(graph) if graph is not None and create else []
+    report: Dict[str, Any] = {"created_indexes": created, "templates": []}
+    for name, cypher, params in templates():
+        ops: List[str] = []
+        issues = lint(cypher)
+        if graph is not None and not issues:
+            try:
+                ops, issues = analyze(explain(graph, cypher, params))
+            except Exception as exc:
+                issues = [{"kind": "error", "operator": "", "details": f"{type(exc).__name__}: {exc}"}]
+        report["templates"].append({"template": name, "ok": not issues, "operators": ops, "issues": issues})
+    report["degraded"] = [t["template"] for t in report["templates"] if not t["ok"]]
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", help="JSON 报告输出路径（默认打印到标准输出）")
+    ap.add_argument("--no-create", action="store_true", help="不创建缺失的索引，只检查")
+    ap.add_argument("--static", action="store_true", help="只做静态检查，不连接数据库")
+    args = ap.parse_args()
+
+    report = check(None if args.static else get_graph(), create=not args.no_create)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+        for t in report["templates"]:
+            detail = " > ".join(t["operators"]) or "; ".join(i["details"] for i in t["issues"])
+            print(f"{t['template']:<22} {'通过' if t['ok'] else '退化'}  {detail}")
+    else:
+        print(text)
+    if report["created_indexes"]:
+        print(f"[索引] 新建：{', '.join(report['created_indexes'])}", file=sys.stderr)
+    sys.exit(1 if report["degraded"] else 0)
+
+
+if __name__ == "__main__":
+    main()
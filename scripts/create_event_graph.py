@@ -18,6 +18,8 @@ from typing import Iterable, Dict
 
 from py2neo import Node, Relationship
 from config import get_graph
+from scripts.qa_fulltext import FULLTEXT_INDEX
+from scripts.graph_generation import bump_generation
 
 # 惰性获取 Graph 实例，避免模块导入期出错
 graph = get_graph()
@@ -32,6 +34,23 @@ def ensure_constraints() -> None:
         REQUIRE e.id IS UNIQUE
         """
     )
+    # Person.name 唯一约束（同时是人物等值查找所用的索引）
+    graph.run(
+        """
+        CREATE CONSTRAINT person_name_unique IF NOT EXISTS
+        FOR (p:Person)
+        REQUIRE p.name IS UNIQUE
+        """
+    )
+    # 标题/正文全文索引（cjk 分析器按二字组切分中文），供 search 意图按相关度检索；
+    # 写入 Event 时由 Neo4j 自动维护
+    graph.run(
+        f"""
+        CREATE FULLTEXT INDEX {FULLTEXT_INDEX} IF NOT EXISTS
+        FOR (e:Event) ON EACH [e.title, e.sentence]
+        OPTIONS {{indexConfig: {{`fulltext.analyzer`: 'cjk'}}}}
+        """
+    )
 
 
 def load_events(path: str) -> int:
@@ -68,34 +87,11 @@ def load_events(path: str) -> int:
 
 
 def _get_or_create_person(tx, name: str) -> None:
-    """确保存在一个 Person 节点（兼容 name/Name），若无则创建，并补全两个属性。"""
-    # 先尝试匹配任何已有的 Person（name 或 Name 命中）
-    rec = tx.run(
-        """
-        MATCH (p:Person)
-        WHERE p.name = $name OR p.Name = $name
-        RETURN id(p) AS pid
-        LIMIT 1
-        """,
-        name=name,
-    ).evaluate()
-    if rec is None:
-        # 不存在则创建，并同时写入两个属性，便于后续统一使用 name
-        tx.run(
-            "MERGE (p:Person {name:$name}) ON CREATE SET p.Name=$name",
-            name=name,
-        )
-    else:
-        # 若存在但缺少规范属性 name，则补齐（尽量不破坏原有 Name）
-        tx.run(
-            """
-            MATCH (p:Person)
-            WHERE id(p) = $pid
-            SET p.name = coalesce(p.name, $name), p.Name = coalesce(p.Name, $name)
-            """,
-            pid=rec,
-            name=name,
-        )
+    """确保存在 name 为给定值的 Person 节点（走 person_name_unique 约束索引）。
+
+    旧数据中的 Name 属性由 scripts.migrate_person_names 一次性归并，这里不再兼容。
+    """
+    tx.run("MERGE (p:Person {name:$name})", name=name.strip())
 
 
 def load_event_edges(path: str) -> int:
@@ -110,7 +106,7 @@ def load_event_edges(path: str) -> int:
             if not src or not dst:
                 continue
 
-            # 人物：兼容既有 Name/name，必要时创建并补齐双属性
+            # 人物：不存在则创建
             _get_or_create_person(tx, src)
 
             # 事件存在性由 load_events 保障；此处也做一次惰性创建以健壮
@@ -119,12 +115,11 @@ def load_event_edges(path: str) -> int:
             # 统一用 INVOLVED 类型，中文关系放在属性 type
             tx.run(
                 """
-                MATCH (p:Person)
-                WHERE p.name=$src OR p.Name=$src
+                MATCH (p:Person {name:$src})
                 MATCH (e:Event {id:$dst})
                 MERGE (p)-[r:INVOLVED {type:$rtype}]->(e)
                 """,
-                src=src,
+                src=src.strip(),
                 dst=dst,
                 rtype=rtype,
             )
@@ -142,7 +137,8 @@ def main():
     ensure_constraints()
     n_event = load_events(args.events)
     n_edges = load_event_edges(args.edges)
-    print(f"[Neo4j] 已导入事件节点: {n_event}，人物-事件边: {n_edges}")
+    gen = bump_generation(graph)
+    print(f"[Neo4j] 已导入事件节点: {n_event}，人物-事件边: {n_edges}（图谱代号 {gen}）")
 
 
 if __name__ == "__main__":
@@ -7,6 +7,8 @@ import re
 from collections import defaultdict, Counter
 from typing import Dict, List, Tuple, Iterable, Set
 
+from scripts.name_matcher import NameMatcher
+
 
 EVENT_KEYWORDS = {
     # 婚恋相关
@@ -98,12 +100,11 @@ def split_sentences(text: str) -> List[str]:
     return sents
 
 
-def find_other_persons(sent: str, target: str, person_set: Set[str]) -> List[str]:
+def find_other_persons(sent: str, target: str, matcher: NameMatcher) -> List[str]:
+    # longest non-overlapping matches in order of appearance; a shorter name nested in the target is not another person
     others = []
-    for p in person_set:
-        if p == target:
-            continue
-        if p in sent:
+    for _, _, p in matcher.longest(sent):
+        if p != target and p not in others:
             others.append(p)
     # limit to 3 names to avoid overly long fields
     return others[:3]
@@ -196,14 +197,14 @@ def dedup_events(events: List[Dict[str, str]]) -> List[Dict[str, str]]:
     return result
 
 
-def extract_events_for_person(person: str, chapters: List[Tuple[str, str]], person_set: Set[str], min_score: float) -> List[Dict[str, str]]:
+def extract_events_for_person(person: str, chapters: List[Tuple[str, str]], matcher: NameMatcher, min_score: float) -> List[Dict[str, str]]:
     extracted: List[Dict[str, str]] = []
     for chap_name, text in chapters:
         sentences = split_sentences(text)
         for sent in sentences:
             if person not in sent:
                 continue
-            others = find_other_persons(sent, person, person_set)
+            others = find_other_persons(sent, person, matcher)
             score, hit_kws = score_sentence(sent, person, others)
             if score < min_score:
                 continue
@@ -327,7 +328,7 @@ def main():
     persons_all = load_persons(args.persons_file)
     if not persons_all:
         print(f"[WARN] No persons loaded from {args.persons_file}")
-    person_set = set(persons_all)
+    matcher = NameMatcher(persons_all)
 
     if args.persons.strip():
         targets = [p.strip() for p in args.persons.split(",") if p.strip()]
@@ -350,7 +351,7 @@ def main():
 
     # Extract per person
     for idx, person in enumerate(targets, 1):
-        evts = extract_events_for_person(person, chapters, person_set, args.min_score)
+        evts = extract_events_for_person(person, chapters, matcher, args.min_score)
         print(f"[PROC] {idx}/{len(targets)} {person}: candidates={len(evts)}")
         all_events.extend(evts)
 
@@ -10,12 +10,16 @@
 可配置：
 - 默认模型：'uer/roberta-base-finetuned-cluener2020-chinese'（中文NER，含 PER/ORG/LOC 等）
 - aggregation_strategy='simple' 聚合子词
+
+用法（在项目根目录执行）：python -m scripts.extract_entities_pretrained
 """
 import os
 import re
 import csv
 from pathlib import Path
 
+from scripts.name_matcher import NameMatcher
+
 ROOT = Path(__file__).resolve().parents[1]
 CLEAN_DIR = ROOT / 'reddream_chapters_clean'
 NAME_DICT = ROOT / 'name_dict.txt'
@@ -110,7 +114,8 @@ def run_with_dict(names, max_files=None, limit_sent_per_file=200):
     if not names:
         print('[WARN] 本地未找到 name_dict.txt 或 entity_list.txt，无法规则回退。')
         return []
-    sorted_names = sorted(names, key=len, reverse=True)
+    # 名单编译一次，每句单遍扫描（含嵌套的短名，与逐个 name in sent 结果相同）
+    matcher = NameMatcher(names)
     rows = []
     file_count = 0
     for fname, idx, sent in iter_sentences_from_files(limit_sent_per_file=limit_sent_per_file):
@@ -118,11 +123,7 @@ def run_with_dict(names, max_files=None, limit_sent_per_file=200):
             break
         if idx == 0:
             file_count += 1
-        found = set()
-        for nm in sorted_names:
-            if nm in sent:
-                found.add(nm)
-        for ent in sorted(found):
+        for ent in sorted(matcher.names_in(sent)):
             rows.append({
                 'file': fname,
                 'sent_index': idx,
@@ -0,0 +1,40 @@
+"""
+图谱“代号”（generation）：每次导入/清理脚本改动图谱后自增一次，存于单个 (:Meta {key:'graph'}) 节点。
+
+问答服务以代号作为缓存键的一部分，代号变化即整体失效，无需依赖 TTL。
+读取走 Meta.key 唯一约束索引，代价是一次索引查找。
+"""
+from __future__ import annotations
+
+from py2neo import Graph
+
+
+META_KEY = "graph"
+
+READ_CYPHER = "MATCH (m:Meta {key:$key}) RETURN m.generation AS generation"
+
+BUMP_CYPHER = """
+MERGE (m:Meta {key:$key})
+SET m.generation = coalesce(m.generation, 0) + 1, m.updated_at = timestamp()
+RETURN m.generation AS generation
+"""
+
+
+def ensure_meta_constraint(graph: Graph) -> None:
+    graph.run(
+        """
+        CREATE CONSTRAINT meta_key_unique IF NOT EXISTS
+        FOR (m:Meta)
+        REQUIRE m.key IS UNIQUE
+        """
+    )
+
+
+def bump_generation(graph: Graph) -> int:
+    """图谱写入完成后调用，返回新的代号。"""
+    ensure_meta_constraint(graph)
+    return graph.run(BUMP_CYPHER, key=META_KEY).evaluate()
+
+
+def read_generation(graph: Graph) -> int:
+    return graph.run(READ_CYPHER, key=META_KEY).evaluate() or 0
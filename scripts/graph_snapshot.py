@@ -0,0 +1,437 @@
+"""
+图谱二进制快照：把 Person/Event/RELATION/INVOLVED 写成紧凑的 CSR 格式，加载时 mmap 零拷贝映射。
+
+SnapshotGraph 直接在映射上回答查询：邻接（RELATION、INVOLVED）与人物/事件属性在访问时按 CSR 偏移
+从 memoryview 解码，不预先展开为 dict。多个 uvicorn worker 打开同一个快照文件时共享同一份只读物理页，
+各进程只另建人名、事件 ID 到下标的查找表。
+
+文件格式（小端，版本 SNAPSHOT_VERSION）：
+- 头部 24 字节：magic "RDKG" | version u16 | 段数 u16 | 保留 u32 | crc32 u32 | 段表+数据长度 u64
+- 段表：每段 32 字节，段名(8) | 类型码(1) | 填充(7) | 偏移 u64 | 元素个数 u64
+- 数据区：各段按 8 字节对齐依次存放；crc32 覆盖段表与数据区
+  - strblob/stroff：字符串驻留表（UTF-8 拼接 + n+1 个偏移），人名、家族、事件 ID/标题/正文/章节、关系名均在此
+  - p_name/p_cate：人物 -> 字符串下标；e_*：事件各属性 -> 字符串下标（NONE 表示属性不存在）
+  - rl_lab/il_lab：RELATION / INVOLVED 的关系名表（字符串下标），边上只存 u16 标签码
+  - ro_*：RELATION 出边 CSR（ptr 长度为人物数+1，dst 为人物下标，lab 为标签码）
+  - ru_*：RELATION 无向关联边 CSR：每个人物的出边与入边按原始边顺序交织存放（自环只存一次），
+    与 MemGraph.add_relation 构建 rel_adj / rel_pair 的顺序相同，最短路径的 BFS 与 relation 的结果顺序
+    因此与直接解析 CSV 一致
+  - ip_*/ie_*：INVOLVED 人物->事件 / 事件->人物 CSR
+
+用法（在项目根目录执行）：
+  python -m scripts.graph_snapshot export [--source csv|neo4j] [--out kg_snapshot.bin]
+  python -m scripts.graph_snapshot info [--path kg_snapshot.bin]
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from scripts.qa_memgraph import MemGraph, ROOT, EVENTS_CSV, EDGES_CSV, RELATION_TXT
+
+SNAPSHOT_PATH = ROOT / "kg_snapshot.bin"
+SNAPSHOT_MAGIC = b"RDKG"
+SNAPSHOT_VERSION = 2
+NONE = 0xFFFFFFFF
+
+_HEADER = struct.Struct("<4sHHIIQ")
+_SECTION = struct.Struct("<8sc7xQQ")
+
+# 段名 -> 类型码（array/memoryview 通用）
+_SECTIONS = [
+    ("strblob", "B"),
+    ("stroff", "I"),
+    ("p_name", "I"),
+    ("p_cate", "I"),
+    ("e_id", "I"),
+    ("e_title", "I"),
+    ("e_sent", "I"),
+    ("e_chap", "I"),
+    ("e_pers", "I"),
+    ("rl_lab", "I"),
+    ("il_lab", "I"),
+    ("ro_ptr", "I"),
+    ("ro_dst", "I"),
+    ("ro_lab", "H"),
+    ("ru_ptr", "I"),
+    ("ru_nbr", "I"),
+    ("ru_lab", "H"),
+    ("ip_ptr", "I"),
+    ("ip_evt", "I"),
+    ("ip_lab", "H"),
+    ("ie_ptr", "I"),
+    ("ie_per", "I"),
+    ("ie_lab", "H"),
+]
+
+
+class SnapshotError(ValueError):
+    """快照文件损坏、版本不符或与当前平台不兼容。"""
+
+
+# ---------- 导出 ----------
+class _Interner:
+    def __init__(self) -> None:
+        self.index: Dict[str, int] = {}
+        self.blob = bytearray()
+        self.offsets = array("I", [0])
+
+    def __call__(self, s: Optional[str]) -> int:
+        if s is None:
+            return NONE
+        i = self.index.get(s)
+        if i is None:
+            i = len(self.offsets) - 1
+            self.index[s] = i
+            self.blob += s.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        return i
+
+
+def _csr(n: int, edges: List[tuple]) -> tuple:
+    """edges: [(src下标, dst下标, 标签码)]，按 src 稳定分桶。"""
+    buckets: List[List[tuple]] = [[] for _ in range(n)]
+    for s, d, lab in edges:
+        buckets[s].append((d, lab))
+    ptr, dst, lab = array("I", [0]), array("I"), array("H")
+    for b in buckets:
+        for d, l in b:
+            dst.append(d)
+            lab.append(l)
+        ptr.append(len(dst))
+    return ptr, dst, lab
+
+
+def build_sections(g: MemGraph) -> Dict[str, array]:
+    intern = _Interner()
+    persons = list(g.persons)
+    events = list(g.events)
+    pidx = {n: i for i, n in enumerate(persons)}
+    eidx = {e: i for i, e in enumerate(events)}
+
+    sec: Dict[str, array] = {}
+    sec["p_name"] = array("I", (intern(n) for n in persons))
+    sec["p_cate"] = array("I", (intern(g.persons[n].get("cate")) for n in persons))
+    for name, key in (("e_id", "id"), ("e_title", "title"), ("e_sent", "sentence"), ("e_chap", "chapter"), ("e_pers", "person")):
+        sec[name] = array("I", (intern(g.events[e].get(key)) for e in events))
+
+    rl_labels: Dict[str, int] = {}
+    il_labels: Dict[str, int] = {}
+    rel = [(pidx[a], pidx[b], rl_labels.setdefault(t, len(rl_labels))) for a, b, t in g.rel_edges]
+    inv = [
+        (pidx[p], eidx[e], il_labels.setdefault(t, len(il_labels)))
+        for p, lst in g.inv_by_person.items()
+        for e, t in lst
+    ]
+    sec["rl_lab"] = array("I", (intern(t) for t in rl_labels))
+    sec["il_lab"] = array("I", (intern(t) for t in il_labels))
+    sec["ro_ptr"], sec["ro_dst"], sec["ro_lab"] = _csr(len(persons), rel)
+    # 按边的原始顺序依次记到两端（同 add_relation），_csr 稳定分桶后即为各人物的邻居顺序
+    incident = [x for s, d, l in rel for x in (((s, d, l), (d, s, l)) if s != d else ((s, d, l),))]
+    sec["ru_ptr"], sec["ru_nbr"], sec["ru_lab"] = _csr(len(persons), incident)
+    sec["ip_ptr"], sec["ip_evt"], sec["ip_lab"] = _csr(len(persons), inv)
+    # 事件侧按原始边顺序分桶，保证加载后 cooccur 等结果顺序与直接解析 CSV 一致
+    inv_e = [(eidx[e], pidx[p], il_labels[t]) for e, lst in g.inv_by_event.items() for p, t in lst]
+    sec["ie_ptr"], sec["ie_per"], sec["ie_lab"] = _csr(len(events), inv_e)
+    sec["strblob"] = array("B", bytes(intern.blob))
+    sec["stroff"] = intern.offsets
+    return sec
+
+
+def write_snapshot(g: MemGraph, path: Path = SNAPSHOT_PATH) -> int:
+    """写出快照，返回文件字节数。先写临时文件再替换，读者不会看到半个文件。"""
+    if sys.byteorder != "little":
+        raise SnapshotError("快照格式为小端，当前平台不支持")
+    sec = build_sections(g)
+    table_len = _SECTION.size * len(_SECTIONS)
+    offset = _HEADER.size + table_len
+    table = bytearray()
+    payload = bytearray()
+    for name, code in _SECTIONS:
+        arr = sec[name]
+        pad = (-offset) % 8
+        payload += b"\0" * pad
+        offset += pad
+        table += _SECTION.pack(name.encode("ascii"), code.encode("ascii"), offset, len(arr))
+        data = arr.tobytes()
+        payload += data
+        offset += len(data)
+    body = bytes(table) + bytes(payload)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(_SECTIONS), 0, zlib.crc32(body), len(body))
+    tmp = Path(str(path) + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(body)
+    tmp.replace(path)
+    return len(header) + len(body)
+
+
+def memgraph_from_neo4j(graph) -> MemGraph:
+    """从运行中的 Neo4j 导出（py2neo Graph），建模与导入脚本一致。"""
+    g = MemGraph()
+    for r in graph.run("MATCH (p:Person) RETURN p.name AS name, p.cate AS cate ORDER BY id(p)"):
+        if r["name"]:
+            g.add_person(r["name"], r["cate"])
+    for r in graph.run(
+        "MATCH (e:Event) RETURN e.id AS id, e.title AS title, e.sentence AS sentence, "
+        "e.chapter AS chapter, e.person AS person ORDER BY id(e)"
+    ):
+        if r["id"]:
+            props = {k: r[k] for k in ("title", "sentence", "chapter", "person") if r[k] is not None}
+            g.add_event(r["id"], **props)
+    for r in graph.run(
+        "MATCH (a:Person)-[r:RELATION]->(b:Person) "
+        "RETURN a.name AS a, b.name AS b, r.type AS type ORDER BY id(r)"
+    ):
+        g.add_relation(r["a"], r["b"], r["type"])
+    for r in graph.run(
+        "MATCH (p:Person)-[r:INVOLVED]->(e:Event) "
+        "RETURN p.name AS p, e.id AS e, r.type AS type ORDER BY id(r)"
+    ):
+        g.add_involved(r["p"], r["e"], r["type"])
+    return g
+
+
+# ---------- 加载 ----------
+class GraphSnapshot:
+    """mmap 只读映射的快照；各段以 memoryview 暴露，不复制数据。"""
+
+    def __init__(self, path: Path = SNAPSHOT_PATH, verify: bool = True) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = buf = memoryview(self._mm)
+        if len(buf) < _HEADER.size:
+            raise SnapshotError("快照文件过短")
+        magic, version, n_sec, _, crc, body_len = _HEADER.unpack_from(buf, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"不是图谱快照文件：{self.path}")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"快照版本 {version} 与当前版本 {SNAPSHOT_VERSION} 不符，请重新导出")
+        if sys.byteorder != "little":
+            raise SnapshotError("快照格式为小端，当前平台不支持")
+        body = buf[_HEADER.size:_HEADER.size + body_len]
+        if len(body) != body_len or (verify and zlib.crc32(body) != crc):
+            raise SnapshotError("快照校验和不符，文件可能已损坏")
+        self.checksum = f"{crc:08x}"
+        self.sections: Dict[str, memoryview] = {}
+        for i in range(n_sec):
+            name, code, off, count = _SECTION.unpack_from(buf, _HEADER.size + i * _SECTION.size)
+            view = buf[off:off + count * array(code.decode()).itemsize]
+            self.sections[name.rstrip(b"\0").decode("ascii")] = view.cast(code.decode())
+        for name, _ in _SECTIONS:
+            if name not in self.sections:
+                raise SnapshotError(f"快照缺少段 {name}")
+        s = self.sections
+        self.n_persons = len(s["p_name"])
+        self.n_events = len(s["e_id"])
+        self.rel_labels = [self.string(i) for i in s["rl_lab"]]
+        self.inv_labels = [self.string(i) for i in s["il_lab"]]
+
+    def string(self, i: int) -> Optional[str]:
+        if i == NONE:
+            return None
+        off = self.sections["stroff"]
+        return bytes(self.sections["strblob"][off[i]:off[i + 1]]).decode("utf-8")
+
+    def neighbors(self, prefix: str, node: int) -> List[tuple]:
+        """CSR 邻接：prefix 取 ro/ru/ip/ie，返回 [(邻居下标, 标签码)]。"""
+        s = self.sections
+        ptr = s[prefix + "_ptr"]
+        other = s[{"ro": "ro_dst", "ru": "ru_nbr", "ip": "ip_evt", "ie": "ie_per"}[prefix]]
+        lab = s[prefix + "_lab"]
+        lo, hi = ptr[node], ptr[node + 1]
+        return list(zip(other[lo:hi], lab[lo:hi]))
+
+    def to_memgraph(self) -> "SnapshotGraph":
+        """在本快照上回答查询的只读图（不复制邻接与属性）；快照随图一起关闭。"""
+        return SnapshotGraph(self)
+
+    def close(self) -> None:
+        for view in self.sections.values():
+            view.release()
+        self.sections.clear()
+        self._buf.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            # 仍有外部 memoryview 引用时交给 GC 回收
+            pass
+
+
+# ---------- 直接读快照的图 ----------
+class _Adjacency(Mapping):
+    """键 -> [(邻居键, 关系名)]，访问时从 CSR 段解码；只列出有边的键（与 MemGraph 的 dict 一致）。"""
+
+    def __init__(self, snap: GraphSnapshot, prefix: str, keys: List[str], index: Dict[str, int],
+                 others: List[str], labels: List[str]) -> None:
+        self._snap, self._prefix = snap, prefix
+        self._keys, self._index, self._others, self._labels = keys, index, others, labels
+        self._ptr = snap.sections[prefix + "_ptr"]
+
+    def __getitem__(self, key: str) -> List[Tuple[str, str]]:
+        i = self._index[key]
+        if self._ptr[i] == self._ptr[i + 1]:
+            raise KeyError(key)
+        return [(self._others[j], self._labels[lab]) for j, lab in self._snap.neighbors(self._prefix, i)]
+
+    def __iter__(self) -> Iterator[str]:
+        ptr = self._ptr
+        return (k for i, k in enumerate(self._keys) if ptr[i] != ptr[i + 1])
+
+    def __len__(self) -> int:
+        ptr = self._ptr
+        return sum(1 for i in range(len(self._keys)) if ptr[i] != ptr[i + 1])
+
+
+class _RelAdjacency(Mapping):
+    """人物 -> 有 RELATION 相连的人物（按 ru 的边顺序去重），对应 MemGraph.rel_adj。"""
+
+    def __init__(self, undirected: _Adjacency) -> None:
+        self._ru = undirected
+
+    def __getitem__(self, key: str) -> List[str]:
+        return list(dict.fromkeys(b for b, _ in self._ru[key]))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ru)
+
+    def __len__(self) -> int:
+        return len(self._ru)
+
+
+class _RelPair(Mapping):
+    """(A, B) -> A、B 之间（不分方向）的关系名，按 ru 的边顺序去重，对应 MemGraph.rel_pair。"""
+
+    def __init__(self, undirected: _Adjacency) -> None:
+        self._ru = undirected
+
+    def __getitem__(self, key: Tuple[str, str]) -> List[str]:
+        a, b = key
+        types = [t for x, t in self._ru.get(a, ()) if x == b]
+        if not types:
+            raise KeyError(key)
+        return list(dict.fromkeys(types))
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(dict.fromkeys((a, b) for a, nbrs in self._ru.items() for b, _ in nbrs))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class _Props(Mapping):
+    """键 -> 属性 dict，访问时从字符串驻留表解码（每次返回新 dict）。"""
+
+    def __init__(self, snap: GraphSnapshot, keys: List[str], index: Dict[str, int],
+                 fields: Tuple[Tuple[str, str], ...]) -> None:
+        self._snap, self._keys, self._index = snap, keys, index
+        self._fields = [(snap.sections[sec], key) for sec, key in fields]
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        i = self._index[key]
+        props: Dict[str, Any] = {}
+        for view, name in self._fields:
+            v = self._snap.string(view[i])
+            if v is not None:
+                props[name] = v
+        return props
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+
+class _RelEdges:
+    """按 CSR 出边顺序遍历 (A, B, 关系名)，对应 MemGraph.rel_edges。"""
+
+    def __init__(self, out: _Adjacency) -> None:
+        self._out = out
+
+    def __iter__(self) -> Iterator[Tuple[str, str, str]]:
+        return ((a, b, t) for a, nbrs in self._out.items() for b, t in nbrs)
+
+    def __len__(self) -> int:
+        return len(self._out._snap.sections["ro_dst"])
+
+
+class SnapshotGraph(MemGraph):
+    """只读的进程内图引擎：查询沿用 MemGraph，底层映射直接读 GraphSnapshot 的 memoryview。"""
+
+    def __init__(self, snap: GraphSnapshot) -> None:
+        super().__init__()
+        self.snapshot = snap
+        s = snap.sections
+        names = [snap.string(i) for i in s["p_name"]]
+        ids = [snap.string(i) for i in s["e_id"]]
+        pidx = {n: i for i, n in enumerate(names)}
+        eidx = {e: i for i, e in enumerate(ids)}
+        ro = _Adjacency(snap, "ro", names, pidx, names, snap.rel_labels)
+        ru = _Adjacency(snap, "ru", names, pidx, names, snap.rel_labels)
+        self.persons = _Props(snap, names, pidx, (("p_name", "name"), ("p_cate", "cate")))
+        self.events = _Props(
+            snap, ids, eidx,
+            (("e_id", "id"), ("e_title", "title"), ("e_sent", "sentence"), ("e_chap", "chapter"), ("e_pers", "person")),
+        )
+        self.rel_edges = _RelEdges(ro)
+        self.rel_pair = _RelPair(ru)
+        self.rel_adj = _RelAdjacency(ru)
+        self.inv_by_person = _Adjacency(snap, "ip", names, pidx, ids, snap.inv_labels)
+        self.inv_by_event = _Adjacency(snap, "ie", ids, eidx, names, snap.inv_labels)
+        self.generation = snap.checksum
+
+    def close(self) -> None:
+        self.snapshot.close()
+
+
+def snapshot_is_fresh(path: Path = SNAPSHOT_PATH) -> bool:
+    """快照存在且不旧于三个源文件时才使用，否则回退到解析 CSV。"""
+    path = Path(path)
+    if not path.exists():
+        return False
+    mtime = path.stat().st_mtime
+    return all(not Path(p).exists() or Path(p).stat().st_mtime <= mtime for p in (EVENTS_CSV, EDGES_CSV, RELATION_TXT))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="导出快照")
+    ex.add_argument("--source", choices=["csv", "neo4j"], default="csv", help="数据来源")
+    ex.add_argument("--out", default=str(SNAPSHOT_PATH), help="快照输出路径")
+    info = sub.add_parser("info", help="查看快照信息")
+    info.add_argument("--path", default=str(SNAPSHOT_PATH), help="快照路径")
+    args = ap.parse_args()
+
+    if args.cmd == "export":
+        if args.source == "neo4j":
+            from config import get_graph
+
+            g = memgraph_from_neo4j(get_graph())
+        else:
+            g = MemGraph.from_files()
+        size = write_snapshot(g, Path(args.out))
+        print(f"[快照] 已写出 {args.out}：人物 {len(g.persons)}，事件 {len(g.events)}，"
+              f"RELATION {len(g.rel_edges)}，INVOLVED {sum(map(len, g.inv_by_person.values()))}，{size} 字节")
+    else:
+        snap = GraphSnapshot(Path(args.path))
+        print(f"版本 {SNAPSHOT_VERSION} | 校验和 {snap.checksum} | 人物 {snap.n_persons} | 事件 {snap.n_events}")
+        print(f"RELATION 标签 {len(snap.rel_labels)} | INVOLVED 标签 {snap.inv_labels}")
+        for name, view in snap.sections.items():
+            print(f"  {name:<8} {view.format} x {len(view)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ relation.txt 每行：主语,客体,关系,主语家族,客体家族
 示例：王熙凤,贾琏,妻,王家,贾家荣国府
 
 建模：
-- (:Person {name, Name, cate}) 统一人物节点，name/Name 双属性兼容
+- (:Person {name, cate}) 统一人物节点，name 上有唯一约束（旧的 Name 属性见 scripts.migrate_person_names）
 - (:Person)-[:RELATION {type, chapter?, sentence?}]->(:Person)
 
 注意：人物关系的中文关系作为属性 `type`，而不是关系类型，避免中文作为类型带来的限制。
@@ -16,6 +16,7 @@ import csv
 from typing import Optional
 from py2neo import Graph
 from config import get_graph, similar_words
+from scripts.graph_generation import bump_generation
 
 
 def ensure_constraints(graph: Graph):
@@ -29,32 +30,11 @@ def ensure_constraints(graph: Graph):
 
 
 def _get_or_create_person(tx, name: str, cate: Optional[str] = None):
-    rec = tx.run(
-        """
-        MATCH (p:Person)
-        WHERE p.name=$name OR p.Name=$name
-        RETURN id(p) AS pid
-        LIMIT 1
-        """,
+    tx.run(
+        "MERGE (p:Person {name:$name}) SET p.cate = coalesce(p.cate, $cate)",
         name=name,
-    ).evaluate()
-    if rec is None:
-        tx.run(
-            "MERGE (p:Person {name:$name}) ON CREATE SET p.Name=$name, p.cate=$cate",
-            name=name,
-            cate=cate,
-        )
-    else:
-        tx.run(
-            """
-            MATCH (p:Person) WHERE id(p)=$pid
-            SET p.name = coalesce(p.name, $name), p.Name = coalesce(p.Name, $name)
-            SET p.cate = coalesce(p.cate, $cate)
-            """,
-            pid=rec,
-            name=name,
-            cate=cate,
-        )
+        cate=cate,
+    )
 
 
 def import_relations(graph: Graph, path: str = "relation.txt") -> int:
@@ -78,8 +58,8 @@ def import_relations(graph: Graph, path: str = "relation.txt") -> int:
 
             tx.run(
                 """
-                MATCH (x:Person) WHERE x.name=$a OR x.Name=$a
-                MATCH (y:Person) WHERE y.name=$b OR y.Name=$b
+                MATCH (x:Person {name:$a})
+                MATCH (y:Person {name:$b})
                 MERGE (x)-[r:RELATION {type:$rel}]->(y)
                 """,
                 a=a,
@@ -96,7 +76,8 @@ def main():
     graph = get_graph()
     ensure_constraints(graph)
     n = import_relations(graph)
-    print(f"[Neo4j] 已导入人物-人物关系条数: {n}")
+    gen = bump_generation(graph)
+    print(f"[Neo4j] 已导入人物-人物关系条数: {n}（图谱代号 {gen}）")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,280 @@
+"""
+一次性迁移：把所有 Person 节点收敛到唯一的规范属性 name，并报告各查询模板迁移前后的 db hits。
+
+历史上有两种人物节点：
+- 根目录 create_graph.py 写入的 (:Person {Name, cate})，关系类型直接用中文（如 [:妻 {relation:'妻'}]）
+- scripts 下导入脚本写入的 (:Person {name, Name?, cate?})，关系统一为 [:RELATION {type}] / [:INVOLVED {type}]
+
+旧模板里的 coalesce(p.name,p.Name) = $who、p.name=$x OR p.Name=$x 用不上 person_name_unique
+约束索引，每次查找都退化为 Person 标签扫描。本脚本依次：
+1. 合并重名节点：按规范名 trim(coalesce(name, Name)) 分组，每组保留一个，其余节点的关系全部改挂到
+   保留节点上（create_graph.py 的中文类型关系转为 RELATION {type: 归一后的关系}），cate 取第一个
+   非空值，然后删除多余节点
+2. 规范化：name = 规范名。必须在合并之后：person_name_unique 约束已存在时，先写 name 会与同名节点冲突
+3. 删除 Name 属性，确保 person_name_unique 约束存在
+4. 图谱代号自增，问答缓存随之失效
+
+迁移前后各以 PROFILE 执行一遍七类模板（旧模板内嵌在本文件，新模板取自 qa_cypher.build_query），
+输出每个模板的 db hits 与是否用上了索引查找。
+
+用法（在项目根目录执行）：
+  python -m scripts.migrate_person_names [--who 林黛玉 --A 贾宝玉 --B 林黛玉] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+from typing import Any, Dict, List, Tuple
+
+from py2neo import Graph
+
+from config import get_graph, similar_words
+from scripts.graph_generation import bump_generation
+from scripts.qa_cypher import build_query
+
+# 迁移前的模板（与迁移前 qa_cypher.build_query 相同），只用于对照 db hits
+LEGACY_TEMPLATES: Dict[str, str] = {
+    "panci": """
+        MATCH (p:Person)-[:INVOLVED {type:'拥有判词'}]->(e:Event)
+        WHERE coalesce(p.name,p.Name) = $who
+        RETURN e.title AS title, e.sentence AS sentence, e.chapter AS chapter
+        LIMIT 1
+        """,
+    "events": """
+        MATCH (p:Person)-[r:INVOLVED]->(e:Event)
+        WHERE coalesce(p.name,p.Name) = $who AND r.type IN ['参与','涉及']
+        RETURN r.type AS rtype, e.title AS title, e.sentence AS sentence, e.chapter AS chapter
+        ORDER BY e.id
+        LIMIT 10
+        """,
+    "relation": """
+        MATCH (a:Person)-[r:RELATION]-(b:Person)
+        WHERE coalesce(a.name,a.Name)=$A AND coalesce(b.name,b.Name)=$B
+        RETURN DISTINCT r.type AS rtype LIMIT 5
+        """,
+    "path": """
+        MATCH (a:Person) WHERE coalesce(a.name,a.Name)=$A
+        MATCH (b:Person) WHERE coalesce(b.name,b.Name)=$B
+        MATCH p=shortestPath((a)-[*..4]-(b))
+        RETURN p LIMIT 1
+        """,
+    "cooccur": """
+        MATCH (p:Person)-[:INVOLVED]->(e:Event)<-[:INVOLVED]-(q:Person)
+        WHERE coalesce(p.name,p.Name)=$who AND coalesce(q.name,q.Name)<>$who
+        RETURN DISTINCT coalesce(q.name,q.Name) AS other, e.title AS title, e.chapter AS chapter
+        LIMIT 10
+        """,
+}
+
+PERSON_INTENTS = ("panci", "events", "relation", "path", "cooccur")
+
+
+# ---------- PROFILE ----------
+def _walk(plan: Dict[str, Any]) -> Tuple[int, List[str]]:
+    hits = int(plan.get("dbHits") or plan.get("args", {}).get("DbHits") or 0)
+    ops = [plan.get("operatorType", "")]
+    for child in plan.get("children") or []:
+        h, o = _walk(child)
+        hits += h
+        ops += o
+    return hits, ops
+
+
+def profile(graph: Graph, cypher: str, params: Dict[str, Any]) -> Tuple[int, bool]:
+    """PROFILE 执行一次，返回 (db hits 总数, 是否出现 NodeUniqueIndexSeek/NodeIndexSeek)。"""
+    cursor = graph.run("PROFILE " + cypher.strip(), **params)
+    cursor.data()
+    plan = cursor.plan() or {}
+    hits, ops = _walk(plan)
+    return hits, any("IndexSeek" in op for op in ops)
+
+
+def profile_templates(graph: Graph, who: str, a: str, b: str, legacy: bool) -> Dict[str, Tuple[int, bool]]:
+    out: Dict[str, Tuple[int, bool]] = {}
+    for intent in PERSON_INTENTS:
+        if legacy:
+            cypher, params = LEGACY_TEMPLATES[intent], {"who": who, "A": a, "B": b}
+        else:
+            cypher, params = build_query({"intent": intent, "who": who, "A": a, "B": b})
+        out[intent] = profile(graph, cypher, params)
+    return out
+
+
+# ---------- 迁移 ----------
+def normalize_names(graph: Graph) -> int:
+    """name = trim(coalesce(name, Name))；在 merge_duplicates 之后执行，此时规范名已不重复。"""
+    return graph.run(
+        """
+        MATCH (p:Person)
+        WITH p, trim(coalesce(p.name, p.Name)) AS canon
+        WHERE canon IS NOT NULL AND (p.name IS NULL OR p.name <> canon)
+        SET p.name = canon
+        RETURN count(p) AS n
+        """
+    ).evaluate() or 0
+
+
+def find_duplicates(graph: Graph) -> List[Tuple[str, List[int]]]:
+    """按规范名分组，返回 [(规范名, 节点 id 列表)]，只含多于一个节点的组。"""
+    rows = graph.run(
+        """
+        MATCH (p:Person)
+        WITH trim(coalesce(p.name, p.Name)) AS name, p
+        WHERE name IS NOT NULL
+        WITH name, collect(id(p)) AS ids
+        WHERE size(ids) > 1
+        RETURN name, ids
+        """
+    ).data()
+    return [(r["name"], sorted(r["ids"])) for r in rows]
+
+
+def _move_relationships(tx, keep: int, dup: int) -> int:
+    """把 dup 节点的全部关系改挂到 keep 节点（MERGE 去重），返回处理的关系数。"""
+    moved = 0
+    rels = tx.run(
+        """
+        MATCH (d:Person) WHERE id(d)=$dup
+        MATCH (d)-[r]-(o)
+        RETURN id(r) AS rid, type(r) AS t, properties(r) AS props,
+               startNode(r) = d AS outgoing, id(o) AS other, id(o) = id(d) AS loop
+        """,
+        dup=dup,
+    ).data()
+    for r in rels:
+        t, props = r["t"], dict(r["props"] or {})
+        if t not in ("RELATION", "INVOLVED"):
+            # create_graph.py 的旧式关系：中文关系名作类型，另存一份在 relation 属性
+            rel = props.pop("relation", None) or t
+            t, props = "RELATION", {"type": similar_words.get(rel, rel)}
+        other = keep if r["loop"] else r["other"]
+        src, dst = (keep, other) if r["outgoing"] else (other, keep)
+        key = {"type": props.pop("type")} if "type" in props else {}
+        tx.run(
+            f"""
+            MATCH (s) WHERE id(s)=$src
+            MATCH (t) WHERE id(t)=$dst
+            MERGE (s)-[n:{t} {{type: $key.type}}]->(t)
+            SET n += $props
+            """
+            if key
+            else f"""
+            MATCH (s) WHERE id(s)=$src
+            MATCH (t) WHERE id(t)=$dst
+            MERGE (s)-[n:{t}]->(t)
+            SET n += $props
+            """,
+            src=src,
+            dst=dst,
+            key=key,
+            props=props,
+        )
+        moved += 1
+    return moved
+
+
+def merge_duplicates(graph: Graph, dups: List[Tuple[str, List[int]]]) -> int:
+    moved = 0
+    tx = graph.begin()
+    for _, ids in dups:
+        keep, rest = ids[0], ids[1:]
+        tx.run(
+            """
+            MATCH (k:Person) WHERE id(k)=$keep
+            MATCH (d:Person) WHERE id(d) IN $rest
+            WITH k, [x IN collect(d.cate) WHERE x IS NOT NULL] AS cates
+            SET k.cate = coalesce(k.cate, head(cates))
+            """,
+            keep=keep,
+            rest=rest,
+        )
+        for dup in rest:
+            moved += _move_relationships(tx, keep, dup)
+        tx.run("MATCH (d:Person) WHERE id(d) IN $rest DETACH DELETE d", rest=rest)
+    graph.commit(tx)
+    return moved
+
+
+def convert_legacy_relationships(graph: Graph) -> int:
+    """create_graph.py 直接写入（未重名、因此未经合并）的中文类型关系，同样转为 RELATION {type}。"""
+    rows = graph.run(
+        """
+        MATCH (a:Person)-[r]->(b:Person)
+        WHERE NOT type(r) IN ['RELATION', 'INVOLVED']
+        RETURN id(r) AS rid, id(a) AS a, id(b) AS b, coalesce(r.relation, type(r)) AS rel
+        """
+    ).data()
+    tx = graph.begin()
+    for r in rows:
+        tx.run(
+            """
+            MATCH (a) WHERE id(a)=$a
+            MATCH (b) WHERE id(b)=$b
+            MERGE (a)-[:RELATION {type:$rel}]->(b)
+            WITH 1 AS _
+            MATCH ()-[old]->() WHERE id(old)=$rid
+            DELETE old
+            """,
+            a=r["a"],
+            b=r["b"],
+            rel=similar_words.get(r["rel"], r["rel"]),
+            rid=r["rid"],
+        )
+    graph.commit(tx)
+    return len(rows)
+
+
+def drop_legacy_property(graph: Graph) -> int:
+    n = graph.run("MATCH (p:Person) WHERE p.Name IS NOT NULL REMOVE p.Name RETURN count(p)").evaluate() or 0
+    graph.run(
+        """
+        CREATE CONSTRAINT person_name_unique IF NOT EXISTS
+        FOR (p:Person)
+        REQUIRE p.name IS UNIQUE
+        """
+    )
+    return n
+
+
+def _print_profile(before: Dict[str, Tuple[int, bool]], after: Dict[str, Tuple[int, bool]]) -> None:
+    print("== 各模板 db hits（PROFILE）==")
+    print(f"{'模板':<10}{'迁移前':>12}{'迁移后':>12}   索引查找")
+    for intent in PERSON_INTENTS:
+        (h0, s0), (h1, s1) = before[intent], after[intent]
+        print(f"{intent:<10}{h0:>12}{h1:>12}   {'是' if s0 else '否'} -> {'是' if s1 else '否'}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--who", default="林黛玉", help="单人物模板使用的人物")
+    ap.add_argument("--A", default="贾宝玉", help="relation/path 模板的人物 A")
+    ap.add_argument("--B", default="林黛玉", help="relation/path 模板的人物 B")
+    ap.add_argument("--dry-run", action="store_true", help="只统计待处理的节点并 PROFILE 旧模板，不改动图谱")
+    args = ap.parse_args()
+
+    graph = get_graph()
+    before = profile_templates(graph, args.who, args.A, args.B, legacy=True)
+
+    if args.dry_run:
+        legacy = graph.run("MATCH (p:Person) WHERE p.Name IS NOT NULL RETURN count(p)").evaluate() or 0
+        print(f"[dry-run] 带 Name 属性的人物 {legacy} 个；迁移前 db hits：")
+        for intent, (hits, seek) in before.items():
+            print(f"  {intent:<10}{hits:>10}   索引查找：{'是' if seek else '否'}")
+        return
+
+    dups = find_duplicates(graph)
+    moved = merge_duplicates(graph, dups)
+    normalized = normalize_names(graph)
+    converted = convert_legacy_relationships(graph)
+    dropped = drop_legacy_property(graph)
+    gen = bump_generation(graph)
+    print(
+        f"[迁移] 合并重名 {len(dups)} 组（迁移关系 {moved} 条）；规范化 name {normalized} 个；"
+        f"旧式关系转换 {converted} 条；删除 Name 属性 {dropped} 个；图谱代号 {gen}"
+    )
+
+    after = profile_templates(graph, args.who, args.A, args.B, legacy=False)
+    _print_profile(before, after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+人名多模式匹配：由人名词典一次性编译 Aho-Corasick 自动机，单遍扫描文本得到全部命中及位置，
+耗时与文本长度（加命中数）成正比，与词典大小无关，取代“遍历词典逐个 name in text”。
+
+- find_all(text)：全部命中 [(start, end, name)]，含重叠与嵌套（“贾宝玉”中的“宝玉”），按结束位置排序
+- longest(text)：长词优先、跳过与已选命中重叠的位置，按出现位置排序。同长度的重叠命中按词典顺序取舍
+  （靠前的人名先占位），同一人名按出现位置先左后右，与“词典按长度降序（稳定排序）逐个 find、
+  跳过已标注位置”的做法结果一致
+- names_in(text)：出现过的人名（含嵌套），按首次出现位置去重
+- containing(fragment)：包含 fragment 的最长人名，用于截断名纠正（贾雨 -> 贾雨村）；首次调用时建子串表
+
+get_name_matcher()：name_dict.txt + persons_unique.txt 编译的共享实例（问答意图识别与检索词切分共用），
+由制品注册表（qa_artifacts，制品名 names）管理，词典文件变化后后台重建并替换；
+抽取、标注脚本用各自的名单构造 NameMatcher，每次运行编译一次。
+"""
+from __future__ import annotations
+
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+NAME_FILES = (ROOT / "name_dict.txt", ROOT / "persons_unique.txt")
+
+Match = Tuple[int, int, str]
+
+
+class NameMatcher:
+    def __init__(self, names: Iterable[str]) -> None:
+        # 保持首次出现顺序去重；containing 在长度相同时取靠前者
+        self.names: List[str] = list(dict.fromkeys(n for n in names if n))
+        self._rank: Dict[str, int] = {n: i for i, n in enumerate(self.names)}
+        # 状态 0 为根；_goto[s] 为 {字: 状态}，_out[s] 为在状态 s 结束的全部人名（含失败链上的）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[Tuple[str, ...]] = [()]
+        for name in self.names:
+            s = 0
+            for ch in name:
+                nxt = self._goto[s].get(ch)
+                if nxt is None:
+                    nxt = self._goto[s][ch] = len(self._goto)
+                    self._goto.append({})
+                    self._out.append(())
+                s = nxt
+            self._out[s] = (name,)
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, t in self._goto[s].items():
+                queue.append(t)
+                f = self._fail[s]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                f = self._goto[f].get(ch, 0)
+                self._fail[t] = f
+                if self._out[f]:
+                    self._out[t] = self._out[t] + self._out[f]
+        self._sub: Optional[Dict[str, str]] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        s = 0
+        for ch in name:
+            s = self._goto[s].get(ch)
+            if s is None:
+                return False
+        return name in self._out[s][:1]
+
+    def find_all(self, text: str) -> List[Match]:
+        goto, fail, out = self._goto, self._fail, self._out
+        hits: List[Match] = []
+        s = 0
+        for i, ch in enumerate(text):
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            if out[s]:
+                end = i + 1
+                for name in out[s]:
+                    hits.append((end - len(name), end, name))
+        return hits
+
+    def longest(self, text: str) -> List[Match]:
+        hits = self.find_all(text)
+        if len(hits) <= 1:
+            return hits
+        rank = self._rank
+        hits.sort(key=lambda h: (h[0] - h[1], rank[h[2]], h[0]))
+        taken = bytearray(len(text))
+        chosen = []
+        for start, end, name in hits:
+            if taken.find(1, start, end) == -1:
+                taken[start:end] = b"\x01" * (end - start)
+                chosen.append((start, end, name))
+        chosen.sort()
+        return chosen
+
+    def names_in(self, text: str) -> List[str]:
+        return list(dict.fromkeys(name for _, _, name in sorted(self.find_all(text))))
+
+    def containing(self, fragment: str) -> Optional[str]:
+        if self._sub is None:
+            sub: Dict[str, str] = {}
+            # 长度降序（同长保持词典顺序）插入，setdefault 保留最先的即最长者
+            for name in sorted(self.names, key=len, reverse=True):
+                for i in range(len(name)):
+                    for j in range(i + 1, len(name) + 1):
+                        sub.setdefault(name[i:j], name)
+            self._sub = sub
+        return self._sub.get(fragment)
+
+
+def load_names() -> List[str]:
+    """name_dict.txt、persons_unique.txt 中的人名（每行第一个字段）。"""
+    names: List[str] = []
+    for p in NAME_FILES:
+        if p.exists():
+            with p.open("r", encoding="utf-8") as f:
+                names.extend(line.split()[0] for line in f if line.strip())
+    return names
+
+
+def get_name_matcher() -> NameMatcher:
+    """当前版本的共享实例；一次请求内取一次并沿用，替换时在途请求继续使用旧版本。"""
+    from scripts.qa_artifacts import get_artifacts
+
+    return get_artifacts().get("names")
@@ -0,0 +1,149 @@
+"""
+/qa 查询执行的合并与准入控制。
+
+- 合并（single-flight）：同一时刻 (意图, 参数, 图谱代号) 相同的未命中缓存请求只执行一次，后到的请求等待
+  同一个结果（或同一个异常）；执行在独立任务中进行，发起者断开不会取消其他等待者共享的执行
+- 准入：每个意图同时执行的查询数不超过 QA_ADMISSION_LIMITS 中的值（未列出的取 QA_ADMISSION_CONCURRENCY），
+  超出的进入等待队列；队列已满（每个意图 QA_ADMISSION_QUEUE 个）或等待超过 QA_ADMISSION_QUEUE_TIMEOUT 秒时
+  抛出 Overloaded，由服务返回 503 + Retry-After，延迟不会随积压无限增长
+
+合并在准入之前：被合并的请求不占执行名额，也不会因队列满而被拒绝。
+
+指标（/metrics）：qa_admission_active{intent}、qa_admission_queue_depth{intent}、
+qa_admission_rejected_total{intent,reason}、qa_coalesced_requests_total{intent}
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from config import (
+    QA_ADMISSION_CONCURRENCY,
+    QA_ADMISSION_LIMITS,
+    QA_ADMISSION_QUEUE,
+    QA_ADMISSION_QUEUE_TIMEOUT,
+    QA_ADMISSION_RETRY_AFTER,
+)
+from scripts.qa_metrics import get_metrics
+
+
+class Overloaded(RuntimeError):
+    """意图的执行名额与等待队列均已占满，或排队超时。"""
+
+    status_code = 503
+
+    def __init__(self, intent: str, reason: str, retry_after: int = QA_ADMISSION_RETRY_AFTER) -> None:
+        super().__init__(f"{intent} 查询繁忙（{reason}），请 {retry_after} 秒后重试")
+        self.intent = intent
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Lane:
+    __slots__ = ("sem", "limit", "waiting")
+
+    def __init__(self, limit: int) -> None:
+        self.sem = asyncio.Semaphore(limit)
+        self.limit = limit
+        self.waiting = 0
+
+
+class Admission:
+    def __init__(
+        self,
+        limits: Dict[str, int] = QA_ADMISSION_LIMITS,
+        default: int = QA_ADMISSION_CONCURRENCY,
+        queue: int = QA_ADMISSION_QUEUE,
+        timeout: float = QA_ADMISSION_QUEUE_TIMEOUT,
+    ) -> None:
+        self.limits = dict(limits)
+        self.default = default
+        self.queue = queue
+        self.timeout = timeout
+        # 须在事件循环内创建（Python 3.9 的 Semaphore 构造时绑定当前循环），因此按意图惰性创建
+        self._lanes: Dict[str, _Lane] = {}
+
+    def _lane(self, intent: str) -> _Lane:
+        lane = self._lanes.get(intent)
+        if lane is None:
+            lane = self._lanes[intent] = _Lane(self.limits.get(intent, self.default))
+        return lane
+
+    def _reject(self, intent: str, reason: str) -> Overloaded:
+        get_metrics().inc("qa_admission_rejected_total", intent=intent, reason=reason)
+        return Overloaded(intent, reason)
+
+    @asynccontextmanager
+    async def slot(self, intent: str) -> AsyncIterator[None]:
+        """占用该意图的一个执行名额；名额已满时排队，队列满或排队超时抛出 Overloaded。"""
+        lane = self._lane(intent)
+        metrics = get_metrics()
+        if lane.sem.locked():
+            if lane.waiting >= self.queue:
+                raise self._reject(intent, "queue_full")
+            lane.waiting += 1
+            metrics.inc("qa_admission_queue_depth", 1, intent=intent)
+            try:
+                await asyncio.wait_for(lane.sem.acquire(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                raise self._reject(intent, "queue_timeout") from None
+            finally:
+                lane.waiting -= 1
+                metrics.inc("qa_admission_queue_depth", -1, intent=intent)
+        else:
+            await lane.sem.acquire()
+        metrics.inc("qa_admission_active", 1, intent=intent)
+        try:
+            yield
+        finally:
+            metrics.inc("qa_admission_active", -1, intent=intent)
+            lane.sem.release()
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def do(self, key: str, intent: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """key 相同的调用共享一次 factory() 的结果；调用方不得修改返回的对象。"""
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(factory())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            get_metrics().inc("qa_coalesced_requests_total", intent=intent)
+        # shield：某个等待者被取消不会取消共享的执行
+        return await asyncio.shield(fut)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+_admission: Optional[Admission] = None
+_flights: Optional[SingleFlight] = None
+
+
+def get_admission() -> Admission:
+    global _admission
+    if _admission is None:
+        _admission = Admission()
+    return _admission
+
+
+def get_singleflight() -> SingleFlight:
+    global _flights
+    if _flights is None:
+        _flights = SingleFlight()
+    return _flights
+
+
+async def run_query_admitted(key: str, intent: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """合并相同的查询，再经准入控制执行 factory()。"""
+
+    async def admitted() -> Any:
+        async with get_admission().slot(intent):
+            return await factory()
+
+    return await get_singleflight().do(key, intent, admitted)
@@ -22,7 +22,8 @@ def format_answer(intent: str, payload: Dict, rows: List[Dict]) -> str:
         return f"两者关系：{kinds or '未明确'}。"
 
     if intent == "path":
-        return "已找到两者之间的连接路径（请在图视图中查看细节）。"
+        items = [f"（{r['length']} 步）{_describe_path(r)}" for r in rows[:3]]
+        return f"{payload.get('A')}与{payload.get('B')}之间的最短联系：\n- " + "\n- ".join(items)
 
     if intent == "cooccur":
         items = [f"{r['other']}（事件：{r['title']}，章：{r['chapter']}）" for r in rows[:5]]
@@ -37,6 +38,20 @@ def format_answer(intent: str, payload: Dict, rows: List[Dict]) -> str:
     return "相关事件：\n- " + "\n- ".join(items)
 
 
+def _describe_path(r: Dict) -> str:
+    """把一条路径描述为逐跳的关系链，如“贾政是贾宝玉的父亲 → 王夫人是贾政的妻”。"""
+    steps = []
+    for hop in r.get("hops", []):
+        # 同一对人物的关系可能双向都有记录，只取与前进方向一致的一条
+        rels = [x for x in hop["relations"] if x["object"] == hop["from"]] or hop["relations"]
+        if rels:
+            x = rels[0]
+            steps.append(f"{x['subject']}是{x['object']}的{x['type']}")
+        else:
+            steps.append(f"{hop['from']}与{hop['to']}同在「{hop['event']}」")
+    return " → ".join(steps)
+
+
 def _preview(text: str, n: int = 40) -> str:
     if not text:
         return ""
@@ -0,0 +1,235 @@
+"""
+版本化的运行时制品注册表：人名词典、输入联想字典树、抽取模型等在后台重建并原子替换，无需重启进程。
+
+- register(name, paths, loader)：制品由 paths 中的源文件经 loader() 构建；首次 get 时同步加载
+- get(name)：返回当前版本的对象。调用方在一次请求内只取一次并沿用，替换时在途请求继续使用旧版本，
+  旧对象在最后一个引用释放后回收
+- 监视：get 时至多每 QA_ARTIFACT_CHECK_INTERVAL 秒检查一次已加载制品源文件的 mtime / 大小，变化后在后台线程
+  构建新版本，完成后以一次引用赋值替换；构建失败时保留旧版本并记录错误，源文件再次变化后重试
+- reload(names)：立即同步重建（POST /admin/reload），不论源文件是否变化
+- 版本号为源文件内容 sha1 的前 12 位；versions() 列出各制品的版本、加载时间、构建耗时与最近一次错误（/health）
+
+内置制品：names（name_dict.txt + persons_unique.txt 编译的 NameMatcher）、suggest（输入联想字典树），
+以及 extract_relations 的 crf_ner、relation_classifier、relation_names（加载函数在该脚本中，依赖 pycrfsuite 等，
+首次使用时才导入；问答服务不加载它们，但 /health 照常列出）。
+关系同义词表 config.similar_words 不在其中：它只在进程内图引擎建图时使用一次，改动后需重新导入/重启。
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import QA_ARTIFACT_CHECK_INTERVAL
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# extract_relations 的制品及其源文件
+EXTRACT_ARTIFACTS: Dict[str, Tuple[Path, ...]] = {
+    "crf_ner": (ROOT / "crf_ner_model.pkl",),
+    "relation_classifier": (ROOT / "relation_classifier.pkl",),
+    "relation_names": (ROOT / "name_dict_enhanced.csv", ROOT / "name_dict.txt"),
+}
+
+logger = logging.getLogger("uvicorn.error")
+
+Fingerprint = Tuple[Tuple[str, int, int], ...]
+
+
+def _fingerprint(paths: Iterable[Path]) -> Fingerprint:
+    out = []
+    for p in paths:
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        out.append((p.name, st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+def _content_hash(paths: Iterable[Path]) -> str:
+    h = hashlib.sha1()
+    for p in paths:
+        if p.exists():
+            h.update(p.name.encode("utf-8"))
+            with p.open("rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+class _Version:
+    __slots__ = ("value", "version", "fingerprint", "loaded_at", "load_ms")
+
+    def __init__(self, value: Any, version: str, fingerprint: Fingerprint, load_ms: float) -> None:
+        self.value = value
+        self.version = version
+        self.fingerprint = fingerprint
+        self.loaded_at = time.time()
+        self.load_ms = load_ms
+
+
+class _Artifact:
+    __slots__ = ("name", "paths", "loader", "current", "error", "failed_fp", "building")
+
+    def __init__(self, name: str, paths: Tuple[Path, ...], loader: Callable[[], Any]) -> None:
+        self.name = name
+        self.paths = paths
+        self.loader = loader
+        self.current: Optional[_Version] = None
+        self.error: Optional[str] = None
+        self.failed_fp: Optional[Fingerprint] = None
+        self.building = False
+
+
+class ArtifactRegistry:
+    def __init__(self, check_interval: float = QA_ARTIFACT_CHECK_INTERVAL) -> None:
+        self.check_interval = check_interval
+        self._items: Dict[str, _Artifact] = {}
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+
+    def register(self, name: str, paths: Iterable[Any], loader: Callable[[], Any]) -> None:
+        """登记制品；同名制品已登记时忽略（模块重复导入）。"""
+        if name not in self._items:
+            self._items[name] = _Artifact(name, tuple(Path(p) for p in paths), loader)
+
+    def _build(self, art: _Artifact) -> _Version:
+        # 先取指纹与内容摘要：构建期间文件再次变化时，下一次检查会发现并重建
+        fp = _fingerprint(art.paths)
+        version = _content_hash(art.paths)
+        t0 = time.perf_counter()
+        value = art.loader()
+        return _Version(value, version, fp, round((time.perf_counter() - t0) * 1000, 1))
+
+    def _swap(self, art: _Artifact, ver: _Version) -> None:
+        old = art.current
+        art.current = ver
+        art.error = None
+        art.failed_fp = None
+        if old is not None and old.version != ver.version:
+            logger.info("制品 %s 已更新：%s -> %s（构建 %.1f ms）", art.name, old.version, ver.version, ver.load_ms)
+
+    def _fail(self, art: _Artifact, exc: BaseException) -> None:
+        art.error = f"{type(exc).__name__}: {exc}"
+        art.failed_fp = _fingerprint(art.paths)
+        logger.exception("制品 %s 构建失败，继续使用版本 %s", art.name, art.current and art.current.version)
+
+    def get(self, name: str) -> Any:
+        art = self._items[name]
+        cur = art.current
+        if cur is None:
+            with self._lock:
+                if art.current is None:
+                    art.current = self._build(art)
+            return art.current.value
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.check()
+        return cur.value
+
+    def check(self) -> List[str]:
+        """检查已加载制品的源文件，变化的在后台线程重建；返回开始重建的制品名。"""
+        self._checked = time.monotonic()
+        started = []
+        for art in list(self._items.values()):
+            cur = art.current
+            if cur is None or art.building:
+                continue
+            fp = _fingerprint(art.paths)
+            if fp == cur.fingerprint or fp == art.failed_fp:
+                continue
+            with self._lock:
+                if art.building:
+                    continue
+                art.building = True
+            threading.Thread(target=self._rebuild, args=(art,), name=f"artifact-{art.name}", daemon=True).start()
+            started.append(art.name)
+        return started
+
+    def _rebuild(self, art: _Artifact) -> None:
+        try:
+            ver = self._build(art)
+        except Exception as exc:
+            self._fail(art, exc)
+        else:
+            self._swap(art, ver)
+        finally:
+            art.building = False
+
+    def reload(self, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """立即重建 names（缺省为全部已加载的制品），逐个替换；未知制品名抛出 KeyError。"""
+        if names is None:
+            targets = [a for a in self._items.values() if a.current is not None]
+        else:
+            targets = [self._items[n] for n in names]
+        for art in targets:
+            try:
+                ver = self._build(art)
+            except Exception as exc:
+                self._fail(art, exc)
+            else:
+                self._swap(art, ver)
+        return {a.name: self._describe(a) for a in targets}
+
+    @staticmethod
+    def _describe(art: _Artifact) -> Dict[str, Any]:
+        cur = art.current
+        return {
+            "loaded": cur is not None,
+            "version": cur.version if cur else None,
+            "loaded_at": round(cur.loaded_at, 3) if cur else None,
+            "load_ms": cur.load_ms if cur else None,
+            "error": art.error,
+        }
+
+    def versions(self) -> Dict[str, Dict[str, Any]]:
+        return {name: self._describe(art) for name, art in self._items.items()}
+
+
+def _load_names() -> Any:
+    from scripts.name_matcher import NameMatcher, load_names
+
+    return NameMatcher(load_names())
+
+
+def _load_suggest() -> Any:
+    from scripts.qa_suggest import SuggestIndex, _load_entries
+
+    return SuggestIndex(_load_entries())
+
+
+def _load_extract(name: str) -> Callable[[], Any]:
+    def load() -> Any:
+        import extract_relations
+
+        return extract_relations.ARTIFACT_LOADERS[name]()
+
+    return load
+
+
+def _register_defaults(reg: ArtifactRegistry) -> None:
+    from scripts.name_matcher import NAME_FILES
+    from scripts.qa_suggest import SOURCES
+
+    reg.register("names", NAME_FILES, _load_names)
+    reg.register("suggest", SOURCES, _load_suggest)
+    for name, paths in EXTRACT_ARTIFACTS.items():
+        reg.register(name, paths, _load_extract(name))
+
+
+_registry: Optional[ArtifactRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_artifacts() -> ArtifactRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                reg = ArtifactRegistry()
+                _register_defaults(reg)
+                _registry = reg
+    return _registry
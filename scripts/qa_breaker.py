@@ -0,0 +1,120 @@
+"""
+Neo4j 熔断器：连续失败后暂停访问数据库，由进程内图引擎给出降级回答，定期放行一个探测请求检查恢复。
+
+状态：
+- closed：正常访问；连续 QA_BREAKER_FAILURES 次故障（查询超时、连接失败）后转为 open
+- open：不访问数据库，请求直接降级；QA_BREAKER_RESET_TIMEOUT 秒后下一个请求作为探测放行（half_open）
+- half_open：只有探测请求访问数据库，其余继续降级；探测成功即 closed，失败则重新 open；
+  探测迟迟没有结果（超过 QA_BREAKER_RESET_TIMEOUT）时再放行一个
+
+转为 open 时调用 on_open 回调（qa_cypher 注册：丢弃会话池的驱动与 py2neo 连接），恢复后的第一次访问
+自动重新建立连接（旧驱动待其上的在途会话结束后关闭）。数据库返回的其他错误（如 Cypher 语法错误）说明
+数据库可达，不计为故障；等待空闲会话超时（qa_pool.PoolTimeout）是本进程的排队背压，没有访问数据库，
+既不计为故障也不计为成功，由服务返回 503。
+
+指标（/metrics）：qa_breaker_state（0 closed / 1 open / 2 half_open）、qa_breaker_trips_total
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config import QA_BREAKER_FAILURES, QA_BREAKER_RESET_TIMEOUT
+from scripts.qa_metrics import get_metrics
+
+logger = logging.getLogger("uvicorn.error")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUE = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+# 按类型名判断，避免在未安装 neo4j 时导入失败
+_OUTAGE_ERRORS = {
+    "QueryTimeout",
+    "TimeoutError",
+    "ServiceUnavailable",
+    "SessionExpired",
+    "DatabaseUnavailable",
+    "IncompleteCommit",
+    "ConnectionUnavailable",
+    "ConnectionBroken",
+    "WireError",
+    "BrokenWireError",
+}
+
+
+def is_outage(exc: BaseException) -> bool:
+    """是否为数据库不可用类的故障（计入熔断）。"""
+    return type(exc).__name__ in _OUTAGE_ERRORS or isinstance(exc, (OSError, ConnectionError))
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int = QA_BREAKER_FAILURES, reset_timeout: float = QA_BREAKER_RESET_TIMEOUT) -> None:
+        self.threshold = failures
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+        self.last_error: Optional[str] = None
+        self.on_open: List[Callable[[], Any]] = []
+        get_metrics().inc("qa_breaker_state", 0)
+
+    def _set(self, state: str) -> None:
+        if state != self.state:
+            get_metrics().inc("qa_breaker_state", _STATE_VALUE[state] - _STATE_VALUE[self.state])
+            self.state = state
+
+    def allow(self) -> bool:
+        """本次是否访问数据库；返回 False 时调用方应直接降级。"""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+            self._set(HALF_OPEN)
+            self.probe_at = now
+            return True
+        if self.state == HALF_OPEN and now - self.probe_at >= self.reset_timeout:
+            self.probe_at = now
+            return True
+        return False
+
+    def success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("Neo4j 已恢复，熔断器关闭")
+        self._set(CLOSED)
+        self.failures = 0
+
+    def failure(self, exc: BaseException) -> None:
+        self.failures += 1
+        self.last_error = f"{type(exc).__name__}: {exc}"
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+            self._open()
+
+    def _open(self) -> None:
+        logger.warning(
+            "Neo4j 连续 %d 次故障，熔断 %g 秒，期间使用本地图谱降级回答：%s",
+            self.failures,
+            self.reset_timeout,
+            self.last_error,
+        )
+        self._set(OPEN)
+        self.opened_at = time.monotonic()
+        get_metrics().inc("qa_breaker_trips_total")
+        for cb in self.on_open:
+            try:
+                cb()
+            except Exception:
+                logger.exception("熔断回调失败")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "last_error": self.last_error}
+
+
+_breaker: Optional[CircuitBreaker] = None
+
+
+def get_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker()
+    return _breaker
@@ -0,0 +1,296 @@
+"""
+/qa 答案缓存。
+
+- 键：规范化后的 (图谱代号, intent, params) JSON 的 sha1
+- 后端：MemoryBackend（进程内 LRU + TTL，默认）/ SQLiteBackend（同机多进程共享）
+- SQLiteBackend 的读写是阻塞调用（blocking = True）：AnswerCache.get 在专用线程池中执行，
+  put 交给单个写线程排队执行（不等待落盘），不占用事件循环
+- 失效：导入脚本自增图谱代号（scripts.graph_generation），服务端每隔
+  config.QA_CACHE_GEN_CHECK_INTERVAL 秒读取一次代号，代号变化后旧键自然不再命中
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from config import (
+    QA_CACHE_BACKEND,
+    QA_CACHE_SIZE,
+    QA_CACHE_TTL,
+    QA_CACHE_PATH,
+    QA_CACHE_GEN_CHECK_INTERVAL,
+    QA_BACKEND,
+    QA_QUERY_TIMEOUT,
+)
+from scripts.graph_generation import META_KEY, READ_CYPHER
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class MemoryBackend:
+    """进程内 LRU，条目超过 ttl 秒视为过期。"""
+
+    blocking = False
+
+    def __init__(self, maxsize: int = QA_CACHE_SIZE, ttl: float = QA_CACHE_TTL) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires < time.time():
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.time() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """基于单个 SQLite 文件（WAL 模式）的共享缓存，适合同一台机器上的多个 worker。
+
+    读路径只有一条 SELECT：命中的键及访问时刻先记在内存里，下一次 set 时在同一事务中批量更新 atime
+    （近似 LRU）。过期条目读到时视为未命中，由覆盖写入或淘汰清理。每 maxsize // 16 次写入检查一次条目数，
+    超过 maxsize 时按 atime 淘汰到 maxsize 的 90%，不在每次写入时扫描整表。
+    """
+
+    blocking = True
+
+    def __init__(self, path: str = QA_CACHE_PATH, maxsize: int = QA_CACHE_SIZE, ttl: float = QA_CACHE_TTL) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        self._touched: Dict[str, float] = {}
+        self._touched_lock = threading.Lock()
+        self._writes = 0
+        self._check_every = max(1, maxsize // 16)
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS qa_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, atime REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS qa_cache_atime ON qa_cache(atime)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        row = self._conn().execute("SELECT value, expires FROM qa_cache WHERE key=?", (key,)).fetchone()
+        if row is None or row[1] < now:
+            return None
+        with self._touched_lock:
+            self._touched[key] = now
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        conn = self._conn()
+        now = time.time()
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if touched:
+                conn.executemany("UPDATE qa_cache SET atime=? WHERE key=?", [(t, k) for k, t in touched.items()])
+            conn.execute(
+                "INSERT OR REPLACE INTO qa_cache(key, value, expires, atime) VALUES (?,?,?,?)",
+                (key, json.dumps(value, ensure_ascii=False, default=str), now + self.ttl, now),
+            )
+            self._writes += 1
+            if self._writes % self._check_every == 0:
+                self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """条目数超过 maxsize 时按 atime 淘汰最久未访问的，降到 maxsize 的 90%（走 atime 索引）。"""
+        n = conn.execute("SELECT count(*) FROM qa_cache").fetchone()[0]
+        if n <= self.maxsize:
+            return
+        conn.execute(
+            "DELETE FROM qa_cache WHERE key IN (SELECT key FROM qa_cache ORDER BY atime LIMIT ?)",
+            (n - self.maxsize * 9 // 10,),
+        )
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM qa_cache")
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM qa_cache").fetchone()[0]
+
+
+def _normalize(v: Any) -> Any:
+    if isinstance(v, str):
+        return v.strip()
+    if isinstance(v, dict):
+        return {k: _normalize(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_normalize(x) for x in v]
+    return v
+
+
+class AnswerCache:
+    def __init__(self, backend, gen_check_interval: float = QA_CACHE_GEN_CHECK_INTERVAL) -> None:
+        self.backend = backend
+        # 阻塞后端：读在小线程池中并发执行，写由单线程按序执行（SQLite 同一时刻只有一个写事务）
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        if getattr(backend, "blocking", False):
+            self._readers = ThreadPoolExecutor(max_workers=4, thread_name_prefix="qa-cache-read")
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qa-cache-write")
+        self.gen_check_interval = gen_check_interval
+        self.hits = 0
+        self.misses = 0
+        self._generation: int | str = 0
+        self._checked_at = 0.0
+        self._gen_lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def make_key(intent: str, params: Dict[str, Any], generation: int | str) -> str:
+        raw = json.dumps(
+            {"g": generation, "i": intent, "p": _normalize(params)},
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def last_generation(self) -> int | str:
+        """最近一次读到的图谱代号（不访问数据库），供同步代码判断图谱是否已更新。"""
+        return self._generation
+
+    async def generation(self) -> int | str:
+        """读取图谱代号；间隔内直接返回上次结果，并发请求只触发一次读取。"""
+        if QA_BACKEND == "memory":
+            # 进程内图引擎：代号取自数据文件摘要
+            from scripts.qa_memgraph import get_memgraph
+
+            self._generation = get_memgraph().generation
+            return self._generation
+        if time.monotonic() - self._checked_at < self.gen_check_interval:
+            return self._generation
+        if self._gen_lock is None:
+            self._gen_lock = asyncio.Lock()
+        async with self._gen_lock:
+            if time.monotonic() - self._checked_at >= self.gen_check_interval:
+                from scripts.qa_breaker import get_breaker, is_outage
+                from scripts.qa_cypher import run_query_async
+
+                # Neo4j 不可用（熔断中或本次故障）时沿用上次的代号，请求继续走缓存或降级回答
+                breaker = get_breaker()
+                if breaker.allow():
+                    try:
+                        rows = await run_query_async(READ_CYPHER, {"key": META_KEY}, QA_QUERY_TIMEOUT)
+                    except Exception as exc:
+                        if not is_outage(exc):
+                            raise
+                        breaker.failure(exc)
+                    else:
+                        breaker.success()
+                        self._generation = (rows[0]["generation"] if rows else 0) or 0
+                self._checked_at = time.monotonic()
+        return self._generation
+
+    async def _read(self, keys: List[str]) -> List[Optional[Any]]:
+        if self._readers is None:
+            return [self.backend.get(k) for k in keys]
+        return await asyncio.get_running_loop().run_in_executor(
+            self._readers, lambda: [self.backend.get(k) for k in keys]
+        )
+
+    def _count(self, values: List[Optional[Any]]) -> None:
+        for v in values:
+            if v is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    async def get(self, key: str) -> Optional[Any]:
+        values = await self._read([key])
+        self._count(values)
+        return values[0]
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """一批键一次读取（阻塞后端只占一次线程池调度）。"""
+        values = await self._read(keys)
+        self._count(values)
+        return values
+
+    async def peek(self, key: str) -> Optional[Any]:
+        """读取但不计入命中率（预热等内部用途）。"""
+        return (await self._read([key]))[0]
+
+    def put(self, key: str, value: Any) -> None:
+        """写入；阻塞后端交给写线程排队执行，不等待完成，失败只记日志。"""
+        if self._writer is None:
+            self.backend.set(key, value)
+            return
+        self._writer.submit(self.backend.set, key, value).add_done_callback(_log_write_error)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "generation": self._generation,
+        }
+
+
+def _log_write_error(fut: Future) -> None:
+    exc = fut.exception()
+    if exc is not None:
+        logger.warning("答案缓存写入失败：%s: %s", type(exc).__name__, exc)
+
+
+_cache: Optional[AnswerCache] = None
+
+
+def get_cache() -> AnswerCache:
+    global _cache
+    if _cache is None:
+        if QA_CACHE_BACKEND == "sqlite":
+            backend = SQLiteBackend()
+        else:
+            backend = MemoryBackend()
+        _cache = AnswerCache(backend)
+    return _cache
@@ -1,7 +1,24 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple, Any
-from config import get_graph
+import re
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from config import (
+    get_graph,
+    reset_graph,
+    QA_BACKEND,
+    QA_QUERY_BATCH_TIMEOUT,
+    QA_QUERY_TIMEOUT,
+    QA_QUERY_TIMEOUTS,
+)
+from scripts.qa_breaker import get_breaker, is_outage
+from scripts.qa_fulltext import FULLTEXT_INDEX, extract_keywords, lucene_query
+from scripts.qa_page import PAGE_SIZE
+
+
+def _page(payload: Dict) -> Dict[str, Any]:
+    # 键集分页参数：$after 为上一页末行的排序键（首页为 null），多取一行用于判断是否有下一页
+    return {"after": payload.get("after"), "limit": PAGE_SIZE + 1}
 
 
 def build_query(payload: Dict) -> Tuple[str, Dict[str, Any]]:
@@ -9,8 +26,7 @@ def build_query(payload: Dict) -> Tuple[str, Dict[str, Any]]:
     if intent == "panci":
         return (
             """
-            MATCH (p:Person)-[:INVOLVED {type:'拥有判词'}]->(e:Event)
-            WHERE coalesce(p.name,p.Name) = $who
+            MATCH (p:Person {name: $who})-[:INVOLVED {type:'拥有判词'}]->(e:Event)
             RETURN e.title AS title, e.sentence AS sentence, e.chapter AS chapter
             LIMIT 1
             """,
@@ -19,28 +35,29 @@ def build_query(payload: Dict) -> Tuple[str, Dict[str, Any]]:
     if intent == "events":
         return (
             """
-            MATCH (p:Person)-[r:INVOLVED]->(e:Event)
-            WHERE coalesce(p.name,p.Name) = $who AND r.type IN ['参与','涉及']
-            RETURN r.type AS rtype, e.title AS title, e.sentence AS sentence, e.chapter AS chapter
-            ORDER BY e.id
-            LIMIT 10
+            MATCH (p:Person {name: $who})-[r:INVOLVED]->(e:Event)
+            WHERE r.type IN ['参与','涉及']
+              AND ($after IS NULL OR e.id > $after.id OR (e.id = $after.id AND r.type > $after.rtype))
+            RETURN e.id AS id, r.type AS rtype, e.title AS title, e.sentence AS sentence, e.chapter AS chapter
+            ORDER BY id, rtype
+            LIMIT $limit
             """,
-            {"who": payload.get("who")},
+            {"who": payload.get("who"), **_page(payload)},
         )
     if intent == "relation":
         return (
             """
-            MATCH (a:Person)-[r:RELATION]-(b:Person)
-            WHERE coalesce(a.name,a.Name)=$A AND coalesce(b.name,b.Name)=$B
+            MATCH (a:Person {name: $A})-[r:RELATION]-(b:Person {name: $B})
             RETURN DISTINCT r.type AS rtype LIMIT 5
             """,
             {"A": payload.get("A"), "B": payload.get("B")},
         )
     if intent == "path":
+        # 问答服务由 scripts.qa_path 的进程内路径索引回答；模板保留作 Neo4j 侧对照
         return (
             """
-            MATCH (a:Person) WHERE coalesce(a.name,a.Name)=$A
-            MATCH (b:Person) WHERE coalesce(b.name,b.Name)=$B
+            MATCH (a:Person {name: $A})
+            MATCH (b:Person {name: $B})
             MATCH p=shortestPath((a)-[*..4]-(b))
             RETURN p LIMIT 1
             """,
@@ -49,35 +66,252 @@ def build_query(payload: Dict) -> Tuple[str, Dict[str, Any]]:
     if intent == "cooccur":
         return (
             """
-            MATCH (p:Person)-[:INVOLVED]->(e:Event)<-[:INVOLVED]-(q:Person)
-            WHERE coalesce(p.name,p.Name)=$who AND coalesce(q.name,q.Name)<>$who
-            RETURN DISTINCT coalesce(q.name,q.Name) AS other, e.title AS title, e.chapter AS chapter
-            LIMIT 10
+            MATCH (p:Person {name: $who})-[:INVOLVED]->(e:Event)<-[:INVOLVED]-(q:Person)
+            WHERE q.name <> $who
+              AND ($after IS NULL OR e.id > $after.id OR (e.id = $after.id AND q.name > $after.other))
+            RETURN DISTINCT e.id AS id, q.name AS other, e.title AS title, e.chapter AS chapter
+            ORDER BY id, other
+            LIMIT $limit
             """,
-            {"who": payload.get("who")},
+            {"who": payload.get("who"), **_page(payload)},
         )
     if intent == "chapter_events":
         return (
             """
-            MATCH (e:Event) WHERE e.chapter CONTAINS $chap
-            RETURN e.title AS title, e.sentence AS sentence, e.chapter AS chapter
-            LIMIT 10
+            MATCH (e:Event) WHERE e.chapter CONTAINS $chap AND ($after IS NULL OR e.id > $after.id)
+            RETURN e.id AS id, e.title AS title, e.sentence AS sentence, e.chapter AS chapter
+            ORDER BY id
+            LIMIT $limit
             """,
-            {"chap": payload.get("chap")},
+            {"chap": payload.get("chap"), **_page(payload)},
         )
-    # search 兜底
+    # search 兜底：全文索引按相关度排序；按 (score, e.id) 键集分页，ORDER BY + LIMIT 只保留一页的 Top-K
+    terms = payload.get("terms")
+    if terms is None:
+        terms = extract_keywords(payload.get("kw") or "")
     return (
-        """
-        WITH $kw AS kw
-        MATCH (e:Event)
-        WHERE e.title CONTAINS kw OR e.sentence CONTAINS kw
-        RETURN e.title AS title, e.sentence AS sentence, e.chapter AS chapter
-        LIMIT 10
+        f"""
+        WITH $q AS q WHERE q IS NOT NULL
+        CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', q)
+        YIELD node AS e, score
+        WHERE $after IS NULL OR score < $after.score OR (score = $after.score AND e.id > $after.id)
+        RETURN e.id AS id, e.title AS title, e.sentence AS sentence, e.chapter AS chapter, score
+        ORDER BY score DESC, id
+        LIMIT $limit
         """,
-        {"kw": payload.get("kw")},
+        {"q": lucene_query(terms), "terms": terms, **_page(payload)},
     )
 
 
-def run_query(cypher: str, params: Dict) -> list[dict]:
-    graph = get_graph()
-    return list(graph.run(cypher, **params))
+# 各项取值相同的参数保留为顶层 $参数：SKIP/LIMIT 只接受常量或参数，不能引用 item
+_BATCH_SHARED = ("limit",)
+
+
+def build_batch_query(intent: str, batch: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """把同一意图的多组参数合并为一次 UNWIND 执行。
+
+    由单条模板派生：模板整体放进 CALL 子查询（保持每项各自的 LIMIT），
+    其中的 $参数 改写为 item.参数（_BATCH_SHARED 中的除外，取首项的值作顶层参数）；
+    batch 中每项带 idx，结果按 idx 分发回各问题。
+    模板中的 WITH 会重新划定作用域，改写为 WITH item, … 使后续子句仍能引用 item。
+    """
+    template, _ = build_query({"intent": intent})
+    body = re.sub(r"\$(\w+)", lambda m: m.group(0) if m.group(1) in _BATCH_SHARED else f"item.{m.group(1)}", template)
+    body = re.sub(r"\bWITH\s+(?!item\b(?!\.))", "WITH item, ", body)
+    cypher = f"""
+        UNWIND $batch AS item
+        CALL {{
+            WITH item
+            {body.strip()}
+        }}
+        RETURN *
+        """
+    shared = {k: batch[0].get(k) for k in _BATCH_SHARED if batch and f"${k}" in template}
+    return cypher, {"batch": batch, **shared}
+
+
+def query_timeout(intent: str) -> float:
+    return QA_QUERY_TIMEOUTS.get(intent, QA_QUERY_TIMEOUT)
+
+
+def _reconnect() -> None:
+    """熔断时丢弃已失效的连接，恢复后的第一次访问重新连接。"""
+    reset_graph()
+    from scripts import qa_pool
+
+    if qa_pool._pool is not None:
+        qa_pool._pool.discard()
+
+
+get_breaker().on_open.append(_reconnect)
+
+
+def run_query(cypher: str, params: Dict, limit: Optional[int] = None) -> list[dict]:
+    """同步执行（py2neo）。逐条读取游标，指定 limit 时读满即停止，不再拉取剩余结果。
+
+    连接失效时丢弃 config.get_graph 缓存的连接，下次调用重新连接。
+    """
+    try:
+        return list(islice(get_graph().run(cypher, **params), limit))
+    except Exception as exc:
+        if is_outage(exc):
+            reset_graph()
+        raise
+
+
+async def run_query_async(cypher: str, params: Dict, timeout: Optional[float] = None) -> list[dict]:
+    """异步执行：从会话池取会话，不阻塞线程池；timeout 为事务超时（秒）。"""
+    from scripts.qa_pool import get_pool
+
+    return await get_pool().run(cypher, params, timeout)
+
+
+def _local(intent: str) -> bool:
+    return intent == "path" or QA_BACKEND == "memory"
+
+
+def _stale(intent: str) -> bool:
+    """path 的路径索引尚未按当前图谱代号重建：结果与数据库可能不一致，按降级处理（不缓存）。"""
+    if intent != "path":
+        return False
+    from scripts.qa_path import path_index_fresh
+
+    return not path_index_fresh()
+
+
+def engine_of(intent: str, degraded: bool = False) -> str:
+    """实际回答该意图的引擎：path_index（qa_path）、memory（qa_memgraph，含降级回答）或 neo4j。"""
+    if intent == "path":
+        return "path_index"
+    if degraded or QA_BACKEND == "memory":
+        return "memory"
+    return "neo4j"
+
+
+def _degraded(intent: str, params_list: List[Dict[str, Any]]) -> List[list[dict]]:
+    """Neo4j 不可用时由进程内图引擎回答（与模板同序同分页，数据为本地快照）。"""
+    from scripts.qa_memgraph import get_memgraph
+    from scripts.qa_metrics import get_metrics
+
+    g = get_memgraph()
+    get_metrics().inc("qa_degraded_answers_total", len(params_list), intent=intent)
+    return [g.query(intent, p) for p in params_list]
+
+
+async def _guarded(intent: str, params_list: List[Dict[str, Any]], run) -> Tuple[List[list[dict]], bool]:
+    """经熔断器执行 run()；熔断中或本次遇到故障时改为降级回答，返回 (结果列表, 是否降级)。"""
+    from scripts.qa_pool import PoolTimeout
+
+    breaker = get_breaker()
+    if breaker.allow():
+        try:
+            out = await run()
+        except PoolTimeout:
+            # 本地排队背压，没有访问数据库：不影响熔断状态
+            raise
+        except Exception as exc:
+            if not is_outage(exc):
+                # 数据库有响应（如语法错误），不算故障
+                breaker.success()
+                raise
+            breaker.failure(exc)
+        else:
+            breaker.success()
+            return out, False
+    return _degraded(intent, params_list), True
+
+
+async def execute(intent: str, cypher: str, params: Dict) -> list[dict]:
+    """按 config.QA_BACKEND 选择后端执行一个已生成的查询；path 意图固定走进程内路径索引。"""
+    if intent == "path":
+        from scripts.qa_path import get_path_index
+
+        return get_path_index().query(params)
+    if QA_BACKEND == "memory":
+        from scripts.qa_memgraph import get_memgraph
+
+        return get_memgraph().query(intent, params)
+    return await run_query_async(cypher, params, query_timeout(intent))
+
+
+async def execute_resilient(intent: str, cypher: str, params: Dict) -> Tuple[list[dict], bool]:
+    """同 execute，但 Neo4j 超时、不可达或熔断中时降级为本地快照的结果，返回 (结果行, 是否降级)。"""
+    if _local(intent):
+        return await execute(intent, cypher, params), _stale(intent)
+
+    async def run() -> List[list[dict]]:
+        return [await run_query_async(cypher, params, query_timeout(intent))]
+
+    out, degraded = await _guarded(intent, [params], run)
+    return out[0], degraded
+
+
+class ResilientStream:
+    """与 execute 相同的后端选择，但按游标逐行产出；首行之前遇到故障或熔断中时改为降级回答。
+
+    rows() 读完后 degraded 表示结果是否来自本地快照。已推送部分结果后出错则照常抛出。
+    """
+
+    def __init__(self, intent: str, cypher: str, params: Dict) -> None:
+        self.intent = intent
+        self.cypher = cypher
+        self.params = params
+        self.degraded = False
+
+    async def rows(self) -> AsyncIterator[dict]:
+        if _local(self.intent):
+            self.degraded = _stale(self.intent)
+            for row in await execute(self.intent, self.cypher, self.params):
+                yield row
+            return
+        from scripts.qa_pool import PoolTimeout, get_pool
+
+        breaker = get_breaker()
+        if breaker.allow():
+            sent = 0
+            agen = get_pool().stream(self.cypher, self.params, query_timeout(self.intent))
+            try:
+                async for row in agen:
+                    sent += 1
+                    yield row
+            except PoolTimeout:
+                raise
+            except Exception as exc:
+                if not is_outage(exc):
+                    breaker.success()
+                    raise
+                breaker.failure(exc)
+                if sent:
+                    raise
+            else:
+                breaker.success()
+                return
+            finally:
+                await agen.aclose()
+        self.degraded = True
+        for row in _degraded(self.intent, [self.params])[0]:
+            yield row
+
+
+async def _run_batch(intent: str, params_list: List[Dict[str, Any]]) -> List[list[dict]]:
+    batch = [{"idx": i, **p} for i, p in enumerate(params_list)]
+    cypher, params = build_batch_query(intent, batch)
+    out: List[list[dict]] = [[] for _ in params_list]
+    for row in await run_query_async(cypher, params, QA_QUERY_BATCH_TIMEOUT):
+        item = row.pop("item")
+        out[item["idx"]].append(row)
+    return out
+
+
+async def execute_batch(intent: str, params_list: List[Dict[str, Any]]) -> List[list[dict]]:
+    """同一意图的一批查询：Neo4j 后端一次 UNWIND 往返，返回与 params_list 对齐的结果列表。"""
+    if _local(intent):
+        return [await execute(intent, "", p) for p in params_list]
+    return await _run_batch(intent, params_list)
+
+
+async def execute_batch_resilient(intent: str, params_list: List[Dict[str, Any]]) -> Tuple[List[list[dict]], bool]:
+    """同 execute_batch，故障或熔断中时整组降级，返回 (结果列表, 是否降级)。"""
+    if _local(intent):
+        return await execute_batch(intent, params_list), _stale(intent)
+    return await _guarded(intent, params_list, lambda: _run_batch(intent, params_list))
@@ -0,0 +1,118 @@
+"""
+search 意图的关键词抽取与全文检索。
+
+- extract_keywords：去掉疑问词/虚词与标点，按人名（NameMatcher 最长匹配）切分，得到检索词
+- lucene_query：把检索词拼成 Neo4j 全文索引（event_text，cjk 分析器）的查询串
+- TextIndex：进程内的等价实现（字/二字组倒排 + 标题加权的 idf 打分），供 QA_BACKEND="memory" 使用
+
+Neo4j 侧的索引由 scripts.create_event_graph 创建：
+  CREATE FULLTEXT INDEX event_text FOR (e:Event) ON EACH [e.title, e.sentence]
+  OPTIONS {indexConfig: {`fulltext.analyzer`: 'cjk'}}
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from scripts.name_matcher import NameMatcher
+
+FULLTEXT_INDEX = "event_text"
+
+# 问句里的疑问词、虚词与泛化名词，不参与检索
+STOPWORDS = [
+    "为什么", "怎么样", "是什么", "有哪些", "有什么", "怎么回事", "回事", "请问", "一下", "关于", "相关",
+    "什么", "哪些", "哪个", "怎么", "如何", "谁", "吗", "呢", "吧", "啊", "呀",
+    "故事", "事件", "剧情", "情节", "内容", "讲了", "讲", "说了", "说", "介绍",
+    "的", "了", "是", "有", "和", "与", "及", "在", "里", "中", "被", "把",
+]
+_PUNCT = re.compile(r"[\s，。！？、；：“”‘’（）《》【】,.!?;:'\"()\[\]<>…—-]+")
+_STOP = re.compile("|".join(sorted(map(re.escape, STOPWORDS), key=len, reverse=True)))
+
+TITLE_WEIGHT = 2.0
+
+
+def extract_keywords(q: str, names: Union[Iterable[str], NameMatcher] = ()) -> List[str]:
+    """问句 -> 检索词（保持出现顺序、去重）。人名单独成词（长名优先、不重叠），其余片段至少两个字。
+
+    names 可传已编译的 NameMatcher（问答服务传共享实例），否则按名单临时编译。
+    """
+    matcher = names if isinstance(names, NameMatcher) else NameMatcher(names)
+    text = _STOP.sub(" ", _PUNCT.sub(" ", q or ""))
+    terms: List[str] = []
+
+    def add(p: str, is_name: bool) -> None:
+        if (len(p) >= 2 or is_name) and p not in terms:
+            terms.append(p)
+
+    for seg in text.split():
+        pos = 0
+        for start, end, name in matcher.longest(seg):
+            if start > pos:
+                add(seg[pos:start], False)
+            add(name, True)
+            pos = end
+        if pos < len(seg):
+            add(seg[pos:], False)
+    return terms
+
+
+def lucene_query(terms: List[str]) -> Optional[str]:
+    """每个检索词作为短语（cjk 分析器下即连续二字组），词间 OR；无检索词时返回 None。"""
+    if not terms:
+        return None
+    return " OR ".join('"' + t.replace("\\", "\\\\").replace('"', '\\"') + '"' for t in terms)
+
+
+def _grams(s: str) -> Set[str]:
+    return set(s) | {s[i:i + 2] for i in range(len(s) - 1)}
+
+
+class TextIndex:
+    """字/二字组倒排索引。先用检索词的二字组取交集得到候选，再做子串校验并按 idf 打分。"""
+
+    def __init__(self, docs: List[Tuple[str, Optional[str], Optional[str]]]) -> None:
+        # docs: [(事件ID, 标题, 正文)]
+        self.docs = docs
+        self.postings: Dict[str, Set[int]] = {}
+        for i, (_, title, sentence) in enumerate(docs):
+            for g in _grams((title or "") + "\n" + (sentence or "")):
+                self.postings.setdefault(g, set()).add(i)
+
+    def _candidates(self, term: str) -> Set[int]:
+        grams = [term[i:i + 2] for i in range(len(term) - 1)] or [term]
+        sets = [self.postings.get(g, set()) for g in grams]
+        sets.sort(key=len)
+        out = set(sets[0])
+        for s in sets[1:]:
+            out &= s
+            if not out:
+                break
+        return out
+
+    def search(
+        self, terms: List[str], limit: int = 10, after: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[int, float]]:
+        """返回 [(文档下标, 分数)]，按分数降序、事件 ID 升序，已应用 after（{score, id}，只取其后的文档）与 limit。"""
+        n = len(self.docs)
+        scores: Dict[int, float] = {}
+        for term in terms:
+            hits = []
+            for i in self._candidates(term):
+                _, title, sentence = self.docs[i]
+                w = (TITLE_WEIGHT if title and term in title else 0.0) + (1.0 if sentence and term in sentence else 0.0)
+                if w:
+                    hits.append((i, w))
+            if not hits:
+                continue
+            idf = math.log(1.0 + n / len(hits))
+            for i, w in hits:
+                scores[i] = scores.get(i, 0.0) + w * idf
+        order = lambda x: (-x[1], self.docs[x[0]][0])
+        items = scores.items()
+        if after is not None:
+            start = (-after["score"], after["id"])
+            items = [x for x in items if order(x) > start]
+        # 只需要一页：heapq.nsmallest 维护 limit 大小的堆，不对全部命中排序
+        return heapq.nsmallest(limit, items, key=order)
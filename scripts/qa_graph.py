@@ -0,0 +1,105 @@
+"""
+/graph/ego：以某个人物为中心、depth 跳（1~3）以内的人物关系子图，直接输出 ECharts graph 系列的数据格式。
+
+- 图：进程内图引擎（qa_memgraph）中的 RELATION 边，与 path 意图一样不经过 Neo4j 遍历
+- 扩展：从中心人物 BFS，同一层内按度数从高到低加入，达到 QA_GRAPH_MAX_NODES 即停止（truncated = true），
+  因此截断时保留的是离中心近、关系多的人物
+- 节点：{id, name, category, value, depth}；category 为 config.CA_LIST 中的家族下标（未知家族归入“其他”），
+  value 为该人物在全图中的关系人数，depth 为到中心的跳数
+- 边：子图内全部 RELATION 边（诱导子图），{source, target, name}，source 是 target 的 name
+  （relation.txt “A,B,父亲” 即 A 是 B 的父亲）；同向多种关系以“、”合并为一条
+- 结果按 (name, depth, max_nodes, 图谱代号) 写入答案缓存（qa_cache），数据更新后自动失效；
+  索引本身由 qa_memgraph.DerivedIndex 管理，neo4j 后端的图谱代号变化后从 Neo4j 重建
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import CA_LIST, QA_GRAPH_MAX_NODES
+from scripts.qa_memgraph import DerivedIndex, MemGraph
+
+_OTHER = CA_LIST["其他"]
+CATEGORIES = [{"name": name} for name, _ in sorted(CA_LIST.items(), key=lambda x: x[1])]
+
+
+class EgoIndex:
+    def __init__(self, g: MemGraph) -> None:
+        # out[a][b] = [a 是 b 的哪些关系]；adj 为无向邻接，按度数从高到低排好序
+        self.out: Dict[str, Dict[str, List[str]]] = {}
+        for a, b, rtype in g.rel_edges:
+            if a != b:
+                types = self.out.setdefault(a, {}).setdefault(b, [])
+                if rtype not in types:
+                    types.append(rtype)
+        self.degree = {name: len(nbrs) for name, nbrs in g.rel_adj.items()}
+        self.adj: Dict[str, List[str]] = {
+            name: sorted((b for b in nbrs if b != name), key=lambda b: (-self.degree.get(b, 0), b))
+            for name, nbrs in g.rel_adj.items()
+        }
+        self.category = {name: CA_LIST.get(p.get("cate"), _OTHER) for name, p in g.persons.items()}
+
+    def ego(self, name: str, depth: int, max_nodes: int = QA_GRAPH_MAX_NODES) -> Optional[Dict[str, Any]]:
+        """人物不存在时返回 None。"""
+        if name not in self.category:
+            return None
+        hops = {name: 0}
+        truncated = False
+        q = deque([name])
+        while q and not truncated:
+            u = q.popleft()
+            if hops[u] >= depth:
+                continue
+            for v in self.adj.get(u, ()):
+                if v in hops:
+                    continue
+                if len(hops) >= max_nodes:
+                    truncated = True
+                    break
+                hops[v] = hops[u] + 1
+                q.append(v)
+        nodes = [
+            {"id": n, "name": n, "category": self.category.get(n, _OTHER), "value": self.degree.get(n, 0), "depth": d}
+            for n, d in hops.items()
+        ]
+        links = [
+            {"source": a, "target": b, "name": "、".join(types)}
+            for a in hops
+            for b, types in self.out.get(a, {}).items()
+            if b in hops
+        ]
+        return {
+            "center": name,
+            "depth": depth,
+            "truncated": truncated,
+            "categories": CATEGORIES,
+            "nodes": nodes,
+            "links": links,
+        }
+
+
+_index = DerivedIndex("关系子图索引", EgoIndex)
+
+
+def get_ego_index() -> EgoIndex:
+    return _index.get()
+
+
+def ego_index_info() -> Dict[str, Any]:
+    return _index.describe()
+
+
+async def ego_graph(name: str, depth: int, max_nodes: int = QA_GRAPH_MAX_NODES) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """返回 (子图, 是否命中缓存)；人物不存在时子图为 None（不缓存）。"""
+    from scripts.qa_cache import get_cache
+
+    cache = get_cache()
+    key = cache.make_key("graph_ego", {"name": name, "depth": depth, "max_nodes": max_nodes}, await cache.generation())
+    hit = await cache.get(key)
+    if hit is not None:
+        return hit, True
+    data = get_ego_index().ego(name, depth, max_nodes)
+    # 索引尚未按新代号重建完成时不缓存，避免旧数据写进新代号的缓存键
+    if data is not None and _index.fresh:
+        cache.put(key, data)
+    return data, False
@@ -0,0 +1,220 @@
+"""
+HTTP 层：静态资源的内容哈希 ETag 与预压缩，以及 /qa JSON 响应压缩。
+
+静态资源（AssetStore，替代 /ui、/photos 上的 StaticFiles；/photos 的原图经 qa_service 的路由由 response() 返回）：
+- 启动时读入 frontend/ 与 photos/ 的全部文件，ETag 取内容 sha1 前 16 位
+- 文本类资源（html/css/js/svg/json）预先生成 gzip 与 brotli（未安装 brotli 时只有 gzip）变体，
+  仅保留比原文小的变体，请求时按 Accept-Encoding 选择
+- index.html 与 CSS 中对 /ui/…、/photos/… 的引用改写为 …?v=<ETag>；带 v 参数的请求返回
+  immutable + QA_STATIC_MAX_AGE 的长缓存，HTML 本身与不带 v 的请求为 no-cache（以 If-None-Match 协商，
+  命中返回 304 空响应体），因此重复访问只需一次 HTML 的 304
+- 文件改动后重启服务即重新生成
+
+/qa JSON（json_response）：响应体不小于 config.QA_COMPRESS_MIN_BYTES 且客户端接受时，按 br > gzip 压缩。
+
+依赖（可选）：pip install brotli
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from config import QA_STATIC_MAX_AGE, QA_COMPRESS_MIN_BYTES
+
+_COMPRESSIBLE = {".html", ".css", ".js", ".svg", ".json", ".txt", ".map"}
+_REWRITE = {".html", ".css"}
+_REF = re.compile(r"""(?P<q>['"(])(?P<path>/(?:ui|photos)/[^'"()?#\s]+)(?P<query>\?[^'"()#\s]*)?(?P<end>['")])""")
+
+mimetypes.add_type("image/svg+xml", ".svg")
+mimetypes.add_type("text/javascript", ".js")
+
+
+def _brotli():
+    # 延迟导入，未安装 brotli 时只提供 gzip
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def accepted_encodings(header: str) -> List[str]:
+    """解析 Accept-Encoding，返回 q>0 的编码名（小写）。"""
+    out = []
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        m = re.search(r"q=([0-9.]+)", params)
+        if m:
+            try:
+                q = float(m.group(1))
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            out.append(name.strip().lower())
+    return out
+
+
+def _pick(encodings: List[str], available: Dict[str, bytes]) -> Optional[str]:
+    for enc in ("br", "gzip"):
+        if enc in available and (enc in encodings or "*" in encodings):
+            return enc
+    return None
+
+
+class _Asset:
+    __slots__ = ("body", "etag", "content_type", "variants")
+
+    def __init__(self, body: bytes, content_type: str) -> None:
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()[:16]
+        self.content_type = content_type
+        self.variants: Dict[str, bytes] = {}
+
+
+class AssetStore:
+    """多个挂载点共用的资源表：{URL 路径: _Asset}。"""
+
+    def __init__(self, mounts: Dict[str, str]) -> None:
+        self.assets: Dict[str, _Asset] = {}
+        files: List[Tuple[str, Path]] = []
+        for prefix, directory in mounts.items():
+            root = Path(directory)
+            for p in sorted(root.rglob("*")):
+                if p.is_file():
+                    files.append((f"{prefix}/{p.relative_to(root).as_posix()}", p))
+        # 先处理被引用的资源，再处理 CSS（引用图片/SVG），最后处理 HTML（引用 CSS）
+        order = {".css": 1, ".html": 2}
+        for url, p in sorted(files, key=lambda x: order.get(x[1].suffix.lower(), 0)):
+            self.assets[url] = self._load(url, p)
+
+    def _version(self, m: "re.Match[str]") -> str:
+        asset = self.assets.get(m.group("path"))
+        if asset is None:
+            return m.group(0)
+        sep = m.group("query") + "&" if m.group("query") else "?"
+        return f"{m.group('q')}{m.group('path')}{sep}v={asset.etag}{m.group('end')}"
+
+    def _load(self, url: str, p: Path) -> _Asset:
+        suffix = p.suffix.lower()
+        body = p.read_bytes()
+        if suffix in _REWRITE:
+            body = _REF.sub(self._version, body.decode("utf-8")).encode("utf-8")
+        ctype = mimetypes.guess_type(p.name)[0] or "application/octet-stream"
+        if ctype.startswith("text/") or ctype in ("image/svg+xml", "application/json"):
+            ctype += "; charset=utf-8"
+        asset = _Asset(body, ctype)
+        if suffix in _COMPRESSIBLE and len(body) >= QA_COMPRESS_MIN_BYTES:
+            candidates = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            br = _brotli()
+            if br is not None:
+                candidates["br"] = br.compress(body, quality=11)
+            asset.variants = {k: v for k, v in candidates.items() if len(v) < len(body)}
+        return asset
+
+    def app(self, prefix: str, index: str = "index.html") -> "AssetApp":
+        return AssetApp(self, prefix, index)
+
+    def response(self, request: Request, url: str) -> Response:
+        """按 URL 路径返回资源（含 ETag 协商与编码选择），不存在时 404。"""
+        asset = self.assets.get(url)
+        if asset is None:
+            return Response("Not Found", status_code=404)
+
+        versioned = request.query_params.get("v") == asset.etag and not url.endswith(".html")
+        headers = {
+            "ETag": f'"{asset.etag}"',
+            "Cache-Control": f"public, max-age={QA_STATIC_MAX_AGE}, immutable" if versioned else "no-cache",
+        }
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if etag_matches(request.headers.get("if-none-match", ""), asset.etag):
+            return Response(status_code=304, headers=headers)
+
+        body = asset.body
+        enc = _pick(accepted_encodings(request.headers.get("accept-encoding", "")), asset.variants)
+        if enc:
+            body = asset.variants[enc]
+            headers["Content-Encoding"] = enc
+            # 同一资源的不同编码使用不同的强 ETag
+            headers["ETag"] = f'"{asset.etag}-{enc}"'
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(body, media_type=asset.content_type, headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            url: {"bytes": len(a.body), "etag": a.etag, **{k: len(v) for k, v in a.variants.items()}}
+            for url, a in self.assets.items()
+        }
+
+
+class AssetApp:
+    """挂载到某个前缀上的 ASGI 应用，只读地服务 AssetStore 中的资源。"""
+
+    def __init__(self, store: AssetStore, prefix: str, index: Optional[str]) -> None:
+        self.store = store
+        self.prefix = prefix
+        self.index = index
+
+    def _lookup(self, path: str) -> Optional[str]:
+        rel = path.strip("/")
+        candidates = [rel] if rel else []
+        if self.index:
+            candidates.append(f"{rel}/{self.index}" if rel else self.index)
+        for c in candidates:
+            url = f"{self.prefix}/{c}"
+            if url in self.store.assets:
+                return url
+        return None
+
+    async def __call__(self, scope, receive, send) -> None:
+        request = Request(scope, receive)
+        if request.method not in ("GET", "HEAD"):
+            await Response("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})(scope, receive, send)
+            return
+        # Mount 保留完整 path，并把挂载前缀并入 root_path
+        path, root = scope["path"], scope.get("root_path", "")
+        if root and path.startswith(root):
+            path = path[len(root):]
+        url = self._lookup(path)
+        await self.store.response(request, url or "")(scope, receive, send)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        tag = tag[2:] if tag.startswith("W/") else tag
+        tag = tag.strip('"')
+        if tag == etag or tag.rsplit("-", 1)[0] == etag:
+            return True
+    return False
+
+
+def json_response(request: Request, data: Any, status_code: int = 200) -> Response:
+    """序列化为 JSON；不小于 QA_COMPRESS_MIN_BYTES 且客户端接受时压缩（br 用低质量档位，换取速度）。"""
+    body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= QA_COMPRESS_MIN_BYTES:
+        encodings = accepted_encodings(request.headers.get("accept-encoding", ""))
+        br = _brotli()
+        if br is not None and "br" in encodings:
+            body = br.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in encodings or "*" in encodings:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
@@ -1,37 +1,21 @@
 from __future__ import annotations
 
 import re
-from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional
 
+from scripts.qa_fulltext import extract_keywords
+from scripts.name_matcher import NameMatcher, get_name_matcher
 
-_NAMES: Optional[Set[str]] = None
 
+def load_lexicons() -> int:
+    """预先编译人名自动机（服务启动预热时调用），返回人名数。"""
+    return len(get_name_matcher())
 
-def _load_names() -> Set[str]:
-    global _NAMES
-    if _NAMES is not None:
-        return _NAMES
-    names: Set[str] = set()
-    # 优先从 name_dict.txt 读取
-    for fname in ["name_dict.txt", "persons_unique.txt"]:
-        p = Path(__file__).resolve().parent.parent / fname
-        if p.exists():
-            with p.open("r", encoding="utf-8") as f:
-                for line in f:
-                    s = line.strip().split()[0]
-                    if s:
-                        names.add(s)
-    _NAMES = names
-    return names
 
-
-def _extract_persons(q: str) -> List[str]:
-    names = _load_names()
-    hits = [n for n in names if n and n in q]
-    # 按长度降序，去重
-    hits = sorted(set(hits), key=len, reverse=True)
-    return hits[:3]
+def _extract_persons(q: str, matcher: NameMatcher) -> List[str]:
+    # 单遍扫描取出全部人名（含嵌套），按长度降序，同长按出现先后
+    hits = matcher.names_in(q)
+    return sorted(hits, key=len, reverse=True)[:3]
 
 
 def _extract_chapter(q: str) -> Optional[str]:
@@ -46,7 +30,9 @@ def _extract_chapter(q: str) -> Optional[str]:
 
 def detect_intent_and_entities(q: str) -> Dict:
     qs = q.strip()
-    persons = _extract_persons(qs)
+    # 词典热更新时，同一问句的人名与检索词都来自同一版本
+    matcher = get_name_matcher()
+    persons = _extract_persons(qs, matcher)
     chap = _extract_chapter(qs)
 
     def has(*kws: str) -> bool:
@@ -64,8 +50,8 @@ def detect_intent_and_entities(q: str) -> Dict:
         return {"intent": "chapter_events", "chap": chap}
     if has("参与", "涉及", "发生", "做了什么", "经历") and persons:
         return {"intent": "events", "who": persons[0]}
-    # 兜底：关键词搜索事件
-    return {"intent": "search", "kw": qs}
+    # 兜底：抽取关键词后全文检索事件
+    return {"intent": "search", "kw": qs, "terms": extract_keywords(qs, matcher)}
 
 
 # 与服务端保持名称一致的别名
@@ -0,0 +1,289 @@
+"""
+/qa 查询日志：每个请求追加一行 JSON，并提供回放与热点分析的命令行工具。
+
+记录字段：ts（Unix 秒）、question、page（请求带的分页令牌，首页为 null）、payload（意图与实体）、
+intent、cypher_hash（Cypher 模板的 sha1 前 12 位）、latency_ms、rows、cached、degraded。
+
+- 写入：请求路径只把记录放进有界队列（put_nowait，满了就丢弃并计数），后台线程批量写盘，
+  日志不给请求增加 I/O 延迟；文件超过 config.QA_LOG_MAX_BYTES 后轮转为 .1、.2 …
+- replay：按记录中的时间间隔回放问句及其分页令牌（--speed 2 表示两倍速，0 表示不等待），可打到 --url 指定的服务，
+  或进程内经 ASGI 调用（--backend memory 时无需数据库）
+- top：最热的问句（可作为缓存预热清单）与最慢的模板（按 intent + cypher_hash 汇总的 p50/p95）
+
+用法（在项目根目录执行）：
+  python -m scripts.qa_log top [--path logs/requests.jsonl] [--n 20] [--json]
+  python -m scripts.qa_log replay [--url http://127.0.0.1:8000] [--speed 10] [--concurrency 32]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import QA_LOG_ENABLED, QA_LOG_PATH, QA_LOG_MAX_BYTES, QA_LOG_BACKUPS, QA_LOG_QUEUE_SIZE
+
+_FLUSH_INTERVAL = 0.5  # 后台线程最长攒批时间（秒）
+_enabled = QA_LOG_ENABLED
+
+
+def cypher_hash(cypher: str) -> str:
+    return hashlib.sha1(" ".join(cypher.split()).encode("utf-8")).hexdigest()[:12]
+
+
+class QueryLog:
+    def __init__(
+        self,
+        path: str = QA_LOG_PATH,
+        max_bytes: int = QA_LOG_MAX_BYTES,
+        backups: int = QA_LOG_BACKUPS,
+        queue_size: int = QA_LOG_QUEUE_SIZE,
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="qa-log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """请求路径调用：只做序列化与入队。"""
+        try:
+            self._queue.put_nowait(json.dumps(record, ensure_ascii=False, default=str))
+        except queue.Full:
+            self.dropped += 1
+
+    def _rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+    def _run(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=_FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            lines = [first]
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in lines:
+                stop = True
+                lines = [x for x in lines if x is not None]
+            if not lines:
+                continue
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                size = f.tell()
+            self.written += len(lines)
+            if size >= self.max_bytes:
+                self._rotate()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """写完队列中剩余的记录后停止后台线程。"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+_log: Optional[QueryLog] = None
+
+
+def get_query_log() -> Optional[QueryLog]:
+    """config.QA_LOG_ENABLED 为 False 时返回 None。"""
+    global _log
+    if _log is None and _enabled:
+        _log = QueryLog()
+    return _log
+
+
+def close_query_log() -> None:
+    global _log
+    if _log is not None:
+        _log.close()
+        _log = None
+
+
+# ---------- 读取 ----------
+def read_records(path: str = QA_LOG_PATH, include_rotated: bool = True) -> Iterator[Dict[str, Any]]:
+    """按时间顺序读取日志（先最旧的轮转文件，最后是当前文件），跳过无法解析的行。"""
+    p = Path(path)
+    files = []
+    if include_rotated:
+        files = sorted(p.parent.glob(p.name + ".*"), key=lambda x: -int(x.suffix[1:]) if x.suffix[1:].isdigit() else 0)
+    files.append(p)
+    for fp in files:
+        if not fp.exists():
+            continue
+        with fp.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _percentile(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    k = min(len(xs) - 1, max(0, int(round(p / 100.0 * (len(xs) - 1)))))
+    return xs[k]
+
+
+def summarize(records: List[Dict[str, Any]], n: int = 20) -> Dict[str, Any]:
+    questions = Counter(r.get("question") for r in records if r.get("question"))
+    by_template: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for r in records:
+        if not r.get("cached"):
+            by_template[(r.get("intent"), r.get("cypher_hash"))].append(r)
+    templates = []
+    for (intent, h), rs in by_template.items():
+        lat = [r["latency_ms"] for r in rs]
+        templates.append(
+            {
+                "intent": intent,
+                "cypher_hash": h,
+                "count": len(rs),
+                "p50_ms": round(_percentile(lat, 50), 3),
+                "p95_ms": round(_percentile(lat, 95), 3),
+                "total_ms": round(sum(lat), 3),
+                "mean_rows": round(statistics.mean(r.get("rows", 0) for r in rs), 2),
+            }
+        )
+    templates.sort(key=lambda t: -t["p95_ms"])
+    cached = sum(1 for r in records if r.get("cached"))
+    return {
+        "requests": len(records),
+        "cache_hit_ratio": round(cached / len(records), 4) if records else 0.0,
+        "intents": dict(Counter(r.get("intent") for r in records)),
+        "hot_questions": [{"question": q, "count": c} for q, c in questions.most_common(n)],
+        "slow_templates": templates[:n],
+    }
+
+
+# ---------- 回放 ----------
+async def replay(records: List[Dict[str, Any]], url: Optional[str], backend: str, speed: float, concurrency: int) -> Dict[str, Any]:
+    import httpx
+
+    global _enabled
+    lifespan = None
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=30.0)
+    else:
+        import config
+
+        config.QA_BACKEND = backend
+        _enabled = False  # 进程内回放不再写回日志
+        from scripts.qa_service import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=30.0)
+        lifespan = app.router.lifespan_context(app)
+
+    sem = asyncio.Semaphore(concurrency)
+    lat: List[float] = []
+    errors = 0
+    t_base = records[0].get("ts", 0) if records else 0
+
+    async def one(r: Dict[str, Any], start: float) -> None:
+        nonlocal errors
+        if speed > 0:
+            delay = (r.get("ts", t_base) - t_base) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        body = {"question": r["question"]}
+        if r.get("page"):
+            body["page"] = r["page"]
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                resp = await client.post("/qa", json=body)
+                ok = resp.status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                lat.append((time.perf_counter() - t0) * 1000)
+            else:
+                errors += 1
+
+    if lifespan is not None:
+        await lifespan.__aenter__()
+    try:
+        async with client:
+            start = time.perf_counter()
+            await asyncio.gather(*(one(r, start) for r in records if r.get("question")))
+            elapsed = time.perf_counter() - start
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    out: Dict[str, Any] = {"requests": len(lat) + errors, "errors": errors, "elapsed_s": round(elapsed, 3)}
+    if lat:
+        out.update(
+            rps=round(len(lat) / elapsed, 1),
+            p50_ms=round(_percentile(lat, 50), 3),
+            p95_ms=round(_percentile(lat, 95), 3),
+            p99_ms=round(_percentile(lat, 99), 3),
+        )
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    top = sub.add_parser("top", help="最热问句与最慢模板")
+    top.add_argument("--path", default=QA_LOG_PATH, help="日志路径（自动包含轮转文件）")
+    top.add_argument("--n", type=int, default=20, help="各列出前 n 项")
+    top.add_argument("--json", action="store_true", help="输出 JSON")
+    rp = sub.add_parser("replay", help="回放日志中的问句")
+    rp.add_argument("--path", default=QA_LOG_PATH, help="日志路径（自动包含轮转文件）")
+    rp.add_argument("--url", help="服务地址；不指定时进程内经 ASGI 调用")
+    rp.add_argument("--backend", choices=["memory", "neo4j"], default="memory", help="进程内回放的查询后端")
+    rp.add_argument("--speed", type=float, default=1.0, help="回放倍速；0 表示不按原间隔等待")
+    rp.add_argument("--concurrency", type=int, default=32, help="同时在途的请求数")
+    rp.add_argument("--limit", type=int, default=0, help="只回放前 n 条（0 表示全部）")
+    args = ap.parse_args()
+
+    records = list(read_records(args.path))
+    if args.cmd == "top":
+        s = summarize(records, args.n)
+        if args.json:
+            print(json.dumps(s, ensure_ascii=False, indent=2))
+            return
+        print(f"请求 {s['requests']} | 缓存命中率 {s['cache_hit_ratio']:.1%} | 意图分布 {s['intents']}")
+        print("== 最热问句 ==")
+        for q in s["hot_questions"]:
+            print(f"{q['count']:>7}  {q['question']}")
+        print("== 最慢模板（未命中缓存的请求，按 p95 排序）==")
+        for t in s["slow_templates"]:
+            print(
+                f"{t['intent']:<15} {t['cypher_hash']} n={t['count']:>6} | p50 {t['p50_ms']:8.2f} | "
+                f"p95 {t['p95_ms']:8.2f} ms | 累计 {t['total_ms']:10.1f} ms | 平均行数 {t['mean_rows']}"
+            )
+        return
+
+    if args.limit:
+        records = records[: args.limit]
+    result = asyncio.run(replay(records, args.url, args.backend, args.speed, args.concurrency))
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+进程内图引擎：把 Person/Event/RELATION/INVOLVED 加载为邻接表与索引，直接回答 qa_cypher 的七类意图。
+
+数据来源与导入脚本一致（先 relation.txt，再 kg_events.csv / kg_event_edges.csv），
+建模规则也与导入脚本相同：
+- RELATION {type} 按 (主语, 客体, 归一后的关系) 去重，关系同义词经 config.similar_words 归一
+- INVOLVED {type} 按 (人物, 事件ID, type) 去重；边里出现但 CSV 中没有的事件只带 id
+- 人物只有规范属性 name（与 Neo4j 迁移后一致），cate 取首次出现的家族
+
+结果字段、过滤条件、排序、LIMIT 与键集分页参数（after/limit，见 qa_page）与 Cypher 模板一一对应；在 config.QA_BACKEND = "memory" 时启用，
+此时问答服务不依赖 Neo4j。与 Cypher 路径的一致性用 scripts.check_memgraph_parity 校验。
+
+DerivedIndex：由图构建的派生索引（qa_path 的路径索引、qa_graph 的关系子图索引），随图谱代号重建。
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import QA_BACKEND, similar_words
+from scripts.qa_fulltext import TextIndex
+
+ROOT = Path(__file__).resolve().parent.parent
+EVENTS_CSV = ROOT / "kg_events.csv"
+EDGES_CSV = ROOT / "kg_event_edges.csv"
+RELATION_TXT = ROOT / "relation.txt"
+
+# 与 qa_cypher 模板保持一致
+EVENT_LIMIT = 10
+RELATION_LIMIT = 5
+PATH_MAX_HOPS = 4
+
+# 派生索引从 Neo4j 重建失败后的重试间隔（秒）
+DERIVED_RETRY_INTERVAL = 60.0
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def _dedup_append(lst: list, item) -> None:
+    if item not in lst:
+        lst.append(item)
+
+
+class MemGraph:
+    def __init__(self) -> None:
+        self.persons: Dict[str, Dict[str, Any]] = {}
+        self.events: Dict[str, Dict[str, Any]] = {}
+        # RELATION：按方向存边，另建无向的 (a, b) -> [type...] 索引
+        self.rel_edges: List[Tuple[str, str, str]] = []
+        self.rel_pair: Dict[Tuple[str, str], List[str]] = {}
+        self.rel_adj: Dict[str, List[str]] = {}
+        self._rel_seen: set = set()
+        # INVOLVED：人物 -> [(事件ID, type)]，事件 -> [(人物, type)]
+        self.inv_by_person: Dict[str, List[Tuple[str, str]]] = {}
+        self.inv_by_event: Dict[str, List[Tuple[str, str]]] = {}
+        self.generation = ""
+        self._text: Optional[TextIndex] = None
+        self._sorted_eids: List[str] = []
+
+    # ---------- 构建 ----------
+    def add_person(self, name: str, cate: Optional[str] = None) -> None:
+        p = self.persons.get(name)
+        if p is None:
+            p = {"name": name}
+            self.persons[name] = p
+        if cate is not None and p.get("cate") is None:
+            p["cate"] = cate
+
+    def add_event(self, eid: str, **props: Any) -> None:
+        e = self.events.setdefault(eid, {"id": eid})
+        e.update(props)
+
+    def add_relation(self, a: str, b: str, rtype: str) -> None:
+        edge = (a, b, rtype)
+        if edge in self._rel_seen:
+            return
+        self._rel_seen.add(edge)
+        self.rel_edges.append(edge)
+        _dedup_append(self.rel_pair.setdefault((a, b), []), rtype)
+        _dedup_append(self.rel_adj.setdefault(a, []), b)
+        if a != b:
+            _dedup_append(self.rel_pair.setdefault((b, a), []), rtype)
+            _dedup_append(self.rel_adj.setdefault(b, []), a)
+
+    def add_involved(self, name: str, eid: str, rtype: str) -> None:
+        lst = self.inv_by_person.setdefault(name, [])
+        if (eid, rtype) in lst:
+            return
+        lst.append((eid, rtype))
+        self.inv_by_event.setdefault(eid, []).append((name, rtype))
+
+    @classmethod
+    def from_files(
+        cls,
+        events: os.PathLike = EVENTS_CSV,
+        edges: os.PathLike = EDGES_CSV,
+        relations: os.PathLike = RELATION_TXT,
+    ) -> "MemGraph":
+        g = cls()
+        digest = hashlib.sha1()
+        # 1) relation.txt（同 import_relations_from_txt）
+        with open(relations, "r", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if not row or len(row) < 5:
+                    continue
+                a, b, rel, a_cate, b_cate = [cell.strip() for cell in row[:5]]
+                if not a or not b or not rel:
+                    continue
+                g.add_person(a, a_cate)
+                g.add_person(b, b_cate)
+                g.add_relation(a, b, similar_words.get(rel, rel))
+        # 2) kg_events.csv（同 create_event_graph.load_events）
+        with open(events, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                rid = row.get("id") or row.get("\ufeffid")
+                if not rid:
+                    continue
+                g.add_event(
+                    rid,
+                    title=row.get("title", ""),
+                    sentence=row.get("sentence", ""),
+                    chapter=row.get("chapter", ""),
+                    person=row.get("person", ""),
+                )
+        # 3) kg_event_edges.csv（同 create_event_graph.load_event_edges）
+        with open(edges, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                src = row.get("src") or row.get("\ufeffsrc")
+                dst = row.get("dst")
+                rtype = row.get("type", "参与")
+                if not src or not dst:
+                    continue
+                g.add_person(src)
+                g.events.setdefault(dst, {"id": dst})
+                g.add_involved(src, dst, rtype)
+        for p in (relations, events, edges):
+            digest.update(Path(p).read_bytes())
+        g.generation = digest.hexdigest()[:12]
+        return g
+
+    # ---------- 查询 ----------
+    def query(self, intent: Optional[str], params: Dict[str, Any]) -> List[dict]:
+        handler = getattr(self, f"_q_{intent}", None) or self._q_search
+        return handler(**params)
+
+    def _event_row(self, eid: str) -> dict:
+        e = self.events.get(eid, {})
+        return {"title": e.get("title"), "sentence": e.get("sentence"), "chapter": e.get("chapter")}
+
+    def _event_ids(self) -> List[str]:
+        # 按 ID 排序的事件表（ORDER BY e.id），事件数变化时重建
+        if len(self._sorted_eids) != len(self.events):
+            self._sorted_eids = sorted(self.events)
+        return self._sorted_eids
+
+    def _q_panci(self, who: Optional[str]) -> List[dict]:
+        for eid, rtype in self.inv_by_person.get(who, ()):
+            if rtype == "拥有判词":
+                return [self._event_row(eid)]
+        return []
+
+    def _q_events(self, who: Optional[str], after: Optional[dict] = None, limit: int = EVENT_LIMIT) -> List[dict]:
+        # ORDER BY e.id, r.type：同一事件的“参与”与“涉及”是两行
+        start = (after["id"], after["rtype"]) if after else None
+        hits = sorted(
+            (eid, rtype)
+            for eid, rtype in self.inv_by_person.get(who, ())
+            if rtype in ("参与", "涉及") and (start is None or (eid, rtype) > start)
+        )
+        return [{"id": eid, "rtype": rtype, **self._event_row(eid)} for eid, rtype in hits[:limit]]
+
+    def _q_relation(self, A: Optional[str], B: Optional[str]) -> List[dict]:
+        return [{"rtype": t} for t in self.rel_pair.get((A, B), [])[:RELATION_LIMIT]]
+
+    def _neighbors(self, node: Tuple[str, str]):
+        kind, key = node
+        if kind == "P":
+            for b in self.rel_adj.get(key, ()):
+                yield ("P", b), "RELATION"
+            for eid, _ in self.inv_by_person.get(key, ()):
+                yield ("E", eid), "INVOLVED"
+        else:
+            for name, _ in self.inv_by_event.get(key, ()):
+                yield ("P", name), "INVOLVED"
+
+    def _node_props(self, node: Tuple[str, str]) -> dict:
+        kind, key = node
+        return dict(self.persons[key] if kind == "P" else self.events[key])
+
+    def _q_path(self, A: Optional[str], B: Optional[str]) -> List[dict]:
+        # shortestPath((a)-[*..4]-(b))：无向、任意关系类型、最多 4 跳
+        if A not in self.persons or B not in self.persons or A == B:
+            return []
+        start, goal = ("P", A), ("P", B)
+        prev: Dict[Tuple[str, str], Tuple[Tuple[str, str], str]] = {}
+        seen = {start}
+        frontier = deque([(start, 0)])
+        while frontier:
+            node, depth = frontier.popleft()
+            if depth >= PATH_MAX_HOPS:
+                continue
+            for nxt, rel in self._neighbors(node):
+                if nxt in seen:
+                    continue
+                seen.add(nxt)
+                prev[nxt] = (node, rel)
+                if nxt == goal:
+                    return [{"p": self._build_path(prev, start, goal)}]
+                frontier.append((nxt, depth + 1))
+        return []
+
+    def _build_path(self, prev, start, goal) -> list:
+        # 与 neo4j Record.data() 对 Path 的导出格式一致：[节点, 关系类型, 节点, ...]
+        chain = [self._node_props(goal)]
+        node = goal
+        while node != start:
+            node, rel = prev[node]
+            chain.append(rel)
+            chain.append(self._node_props(node))
+        chain.reverse()
+        return chain
+
+    def _q_cooccur(self, who: Optional[str], after: Optional[dict] = None, limit: int = EVENT_LIMIT) -> List[dict]:
+        # ORDER BY e.id, q.name：事件按 ID、同一事件内按人名，逐个产出，取满 limit 即停
+        start = (after["id"], after["other"]) if after else None
+
+        def pairs():
+            for eid in sorted({eid for eid, _ in self.inv_by_person.get(who, ())}):
+                if start is not None and eid < start[0]:
+                    continue
+                for other in sorted({name for name, _ in self.inv_by_event.get(eid, ()) if name != who}):
+                    if start is None or (eid, other) > start:
+                        yield eid, other
+
+        rows = []
+        for eid, other in islice(pairs(), limit):
+            e = self.events.get(eid, {})
+            rows.append({"id": eid, "other": other, "title": e.get("title"), "chapter": e.get("chapter")})
+        return rows
+
+    def _q_chapter_events(self, chap: Optional[str], after: Optional[dict] = None, limit: int = EVENT_LIMIT) -> List[dict]:
+        if chap is None:
+            return []
+        hits = (
+            eid
+            for eid in self._event_ids()
+            if (after is None or eid > after["id"]) and chap in (self.events[eid].get("chapter") or "")
+        )
+        return [{"id": eid, **self._event_row(eid)} for eid in islice(hits, limit)]
+
+    def text_index(self) -> TextIndex:
+        """Event 标题/正文的全文索引（对应 Neo4j 的 event_text），首次检索时构建。"""
+        if self._text is None:
+            self._text = TextIndex([(eid, e.get("title"), e.get("sentence")) for eid, e in self.events.items()])
+        return self._text
+
+    def _q_search(
+        self,
+        terms: Optional[List[str]] = None,
+        limit: int = EVENT_LIMIT,
+        after: Optional[dict] = None,
+        **_: Any,
+    ) -> List[dict]:
+        if not terms:
+            return []
+        idx = self.text_index()
+        return [
+            {"id": idx.docs[i][0], **self._event_row(idx.docs[i][0]), "score": score}
+            for i, score in idx.search(terms, limit, after)
+        ]
+
+
+_memgraph: Optional[MemGraph] = None
+
+
+def get_memgraph() -> MemGraph:
+    """进程内唯一实例，首次调用时加载：有新鲜的二进制快照则直接在 mmap 上查询（graph_snapshot.SnapshotGraph），否则解析数据文件。"""
+    global _memgraph
+    if _memgraph is None:
+        from scripts.graph_snapshot import GraphSnapshot, SnapshotError, snapshot_is_fresh
+
+        if snapshot_is_fresh():
+            try:
+                _memgraph = GraphSnapshot().to_memgraph()
+            except SnapshotError as exc:
+                # 旧版本或损坏的快照：回退到解析数据文件，重新 export 即可恢复快照加载
+                logger.warning("图谱快照不可用，改为解析数据文件：%s", exc)
+        if _memgraph is None:
+            _memgraph = MemGraph.from_files()
+    return _memgraph
+
+
+_exported: Optional[Tuple[Any, MemGraph]] = None
+_export_lock = threading.Lock()
+
+
+def _neo4j_graph(generation: Any) -> MemGraph:
+    """从 Neo4j 导出的图，按代号缓存：多个派生索引在同一代号下只导出一次。"""
+    global _exported
+    with _export_lock:
+        if _exported is None or _exported[0] != generation:
+            from config import get_graph
+            from scripts.graph_snapshot import memgraph_from_neo4j
+
+            g = memgraph_from_neo4j(get_graph())
+            g.generation = str(generation)
+            _exported = (generation, g)
+        return _exported[1]
+
+
+class DerivedIndex:
+    """由图构建的派生索引，随图谱代号重建。
+
+    - 首次 get 时由 get_memgraph()（本地快照或数据文件）同步构建，保证启动即可回答
+    - neo4j 后端：qa_cache 读到的图谱代号（导入脚本写入后自增）与当前版本不同时，在后台线程从 Neo4j
+      导出图并重建，完成后以一次引用赋值替换；重建期间沿用旧版本，失败时记录错误、
+      DERIVED_RETRY_INTERVAL 秒后重试
+    - memory 后端：数据与 get_memgraph() 一致，代号在进程内不变，无需重建
+    """
+
+    def __init__(self, name: str, build: Callable[[MemGraph], Any]) -> None:
+        self.name = name
+        self._build = build
+        self._lock = threading.Lock()
+        self.value: Any = None
+        self.generation: Any = None
+        self.source: Optional[str] = None
+        self.error: Optional[str] = None
+        self._building = False
+        self._failed_at = 0.0
+
+    def get(self) -> Any:
+        if self.value is None:
+            with self._lock:
+                if self.value is None:
+                    g = get_memgraph()
+                    self.value = self._build(g)
+                    self.generation = g.generation if QA_BACKEND == "memory" else None
+                    self.source = "local"
+        if QA_BACKEND != "memory":
+            self._maybe_rebuild()
+        return self.value
+
+    def _maybe_rebuild(self) -> None:
+        from scripts.qa_cache import get_cache
+
+        gen = get_cache().last_generation
+        if not gen or gen == self.generation or self._building:
+            return
+        if self.error is not None and time.monotonic() - self._failed_at < DERIVED_RETRY_INTERVAL:
+            return
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._rebuild, args=(gen,), name=f"derived-{self.name}", daemon=True).start()
+
+    def _rebuild(self, generation: Any) -> None:
+        try:
+            value = self._build(_neo4j_graph(generation))
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self._failed_at = time.monotonic()
+            logger.exception("%s重建失败（图谱代号 %s），继续使用代号 %s 的版本", self.name, generation, self.generation)
+        else:
+            self.value, self.generation, self.source, self.error = value, generation, "neo4j", None
+            logger.info("%s已按图谱代号 %s 重建", self.name, generation)
+        finally:
+            self._building = False
+
+    @property
+    def fresh(self) -> bool:
+        """当前版本是否对应 qa_cache 最近读到的图谱代号；不是时调用方不应缓存由它得出的结果。"""
+        if QA_BACKEND == "memory":
+            return True
+        from scripts.qa_cache import get_cache
+
+        return self.generation is not None and self.generation == get_cache().last_generation
+
+    def describe(self) -> Dict[str, Any]:
+        return {"generation": self.generation, "source": self.source, "error": self.error}
@@ -0,0 +1,188 @@
+"""
+/qa 运行指标，以 Prometheus 文本格式由 GET /metrics 输出（不依赖 prometheus_client）。
+
+- qa_stage_seconds{stage,intent}：detect_intent / build_query / run_query / format_answer 各阶段耗时直方图
+- qa_empty_answers_total{intent}、qa_rows_fetched_total{intent}
+- qa_errors_total{endpoint,error}、qa_neo4j_reconnects_total
+- qa_in_flight_requests{endpoint}：正在处理的请求数
+- qa_admission_*、qa_coalesced_requests_total：准入控制与相同查询合并（见 qa_admission）
+- qa_breaker_state、qa_breaker_trips_total、qa_degraded_answers_total{intent}：Neo4j 熔断与降级回答（见 qa_breaker）
+
+写入不加锁：每个线程写自己的分片（threading.local），抓取时再把各分片相加。
+事件循环线程与 Starlette 线程池各自一片，互不竞争；抓取读到的是近似一致的快照，对监控足够。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import QA_METRICS_BUCKETS
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_HELP = {
+    "qa_stage_seconds": ("histogram", "/qa 各阶段耗时（秒）"),
+    "qa_empty_answers_total": ("counter", "查询结果为空的回答数"),
+    "qa_rows_fetched_total": ("counter", "从查询后端取回的行数"),
+    "qa_errors_total": ("counter", "处理失败的请求数"),
+    "qa_neo4j_reconnects_total": ("counter", "Neo4j 连接失效后重新建立驱动/连接的次数"),
+    "qa_in_flight_requests": ("gauge", "正在处理的请求数"),
+    "qa_admission_active": ("gauge", "正在执行的查询数（按意图）"),
+    "qa_admission_queue_depth": ("gauge", "等待执行名额的查询数（按意图）"),
+    "qa_admission_rejected_total": ("counter", "因队列已满或排队超时被拒绝（503）的请求数"),
+    "qa_coalesced_requests_total": ("counter", "与正在执行的相同查询合并、未单独执行的请求数"),
+    "qa_breaker_state": ("gauge", "Neo4j 熔断器状态：0 closed / 1 open / 2 half_open"),
+    "qa_breaker_trips_total": ("counter", "Neo4j 熔断次数"),
+    "qa_degraded_answers_total": ("counter", "Neo4j 不可用时由本地快照给出的回答数"),
+}
+
+
+class _Shard:
+    __slots__ = ("counters", "hists")
+
+    def __init__(self) -> None:
+        # counters: (指标名, 标签) -> 值；gauge 也按增量累加
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        # hists: (指标名, 标签) -> [各桶计数..., +Inf 计数, 总和]
+        self.hists: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+class Metrics:
+    def __init__(self, buckets: Tuple[float, ...] = QA_METRICS_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()  # 仅在线程首次写入时使用
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            self._local.shard = shard
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    # ---------- 写入 ----------
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        counters = self._shard().counters
+        key = (name, tuple(sorted(labels.items())))
+        counters[key] = counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        hists = self._shard().hists
+        key = (name, tuple(sorted(labels.items())))
+        h = hists.get(key)
+        if h is None:
+            h = [0.0] * (len(self.buckets) + 2)
+            hists[key] = h
+        h[bisect_left(self.buckets, value)] += 1
+        h[-1] += value
+
+    @contextmanager
+    def stage(self, stage: str, intent: str = "", into: Optional[Dict[str, float]] = None) -> Iterator["_StageTimer"]:
+        """计时一个阶段；intent 在阶段结束前才知道时（如 detect_intent），可在块内设置 t.intent。
+
+        传入 into 时，同时把本次耗时（秒）记到 into[stage]，供单个请求的剖析结果使用。
+        """
+        t = _StageTimer(intent)
+        t0 = time.perf_counter()
+        try:
+            yield t
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.observe("qa_stage_seconds", elapsed, stage=stage, intent=t.intent or "unknown")
+            if into is not None:
+                into[stage] = into.get(stage, 0.0) + elapsed
+
+    @contextmanager
+    def track(self, endpoint: str) -> Iterator[None]:
+        """在途请求数 +1/-1；块内抛出的 5xx 异常计入 qa_errors_total（准入拒绝的 503 另有计数，不计入）。"""
+        self.inc("qa_in_flight_requests", 1, endpoint=endpoint)
+        try:
+            yield
+        except Exception as exc:
+            status = getattr(exc, "status_code", 500)
+            if status >= 500 and status != 503:
+                self.inc("qa_errors_total", endpoint=endpoint, error=type(exc).__name__)
+            raise
+        finally:
+            self.inc("qa_in_flight_requests", -1, endpoint=endpoint)
+
+    def record_rows(self, intent: str, n: int) -> None:
+        self.inc("qa_rows_fetched_total", n, intent=intent)
+        if n == 0:
+            self.inc("qa_empty_answers_total", intent=intent)
+
+    # ---------- 抓取 ----------
+    def _merged(self) -> Tuple[Dict[Tuple[str, Labels], float], Dict[Tuple[str, Labels], List[float]]]:
+        counters: Dict[Tuple[str, Labels], float] = {}
+        hists: Dict[Tuple[str, Labels], List[float]] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, v in list(shard.counters.items()):
+                counters[key] = counters.get(key, 0.0) + v
+            for key, h in list(shard.hists.items()):
+                acc = hists.setdefault(key, [0.0] * len(h))
+                for i, x in enumerate(h):
+                    acc[i] += x
+        return counters, hists
+
+    def render(self) -> str:
+        counters, hists = self._merged()
+        lines: List[str] = []
+        for name, (kind, help_text) in _HELP.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for (n, labels), h in sorted(hists.items()):
+                    if n != name:
+                        continue
+                    cum = 0.0
+                    for le, c in zip(self.buckets, h):
+                        cum += c
+                        lines.append(f"{name}_bucket{_fmt(labels, le=_num(le))} {_num(cum)}")
+                    cum += h[len(self.buckets)]
+                    lines.append(f"{name}_bucket{_fmt(labels, le='+Inf')} {_num(cum)}")
+                    lines.append(f"{name}_sum{_fmt(labels)} {h[-1]!r}")
+                    lines.append(f"{name}_count{_fmt(labels)} {_num(cum)}")
+            else:
+                for (n, labels), v in sorted(counters.items()):
+                    if n == name:
+                        lines.append(f"{name}{_fmt(labels)} {_num(v)}")
+        return "\n".join(lines) + "\n"
+
+
+class _StageTimer:
+    __slots__ = ("intent",)
+
+    def __init__(self, intent: str) -> None:
+        self.intent = intent
+
+
+def _num(x: float) -> str:
+    return str(int(x)) if float(x).is_integer() else repr(x)
+
+
+def _fmt(labels: Labels, **extra: str) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,71 @@
+"""
+events / cooccur / chapter_events / search 的键集分页（keyset pagination）。
+
+每页 PAGE_SIZE 条。模板按稳定的排序键排序，并以 $after（上一页最后一行的排序键）过滤、
+LIMIT PAGE_SIZE + 1：多取的一行只用来判断是否还有下一页，数据库与进程内引擎都不会物化整个结果集。
+
+- events：每行是一条 (事件, 关系) 边，同一事件可能既“参与”又“涉及”，ORDER BY e.id, r.type，排序键 {id, rtype}
+- chapter_events：ORDER BY e.id，排序键 {id}
+- cooccur：ORDER BY e.id, q.name，排序键 {id, other}
+- search：ORDER BY score DESC, e.id，排序键 {score, id}
+
+下一页令牌（next）对客户端不透明：base64url(JSON {意图, 查询指纹, 排序键})。查询指纹取自除
+分页参数外的查询参数，令牌只能用于生成它的那个问题，用在别的问题上时返回 400。
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+PAGE_SIZE = 10
+
+# 意图 -> 排序键字段（与模板中 ORDER BY 的顺序一致，均作为结果列返回）
+PAGED_INTENTS: Dict[str, Tuple[str, ...]] = {
+    "events": ("id", "rtype"),
+    "cooccur": ("id", "other"),
+    "chapter_events": ("id",),
+    "search": ("score", "id"),
+}
+
+_PAGE_PARAMS = ("after", "limit")
+
+
+class PageTokenError(ValueError):
+    """分页令牌无法解析，或不属于当前问题。"""
+
+
+def _fingerprint(intent: str, params: Dict[str, Any]) -> str:
+    scope = {k: v for k, v in params.items() if k not in _PAGE_PARAMS}
+    raw = json.dumps([intent, scope], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def encode_token(intent: str, params: Dict[str, Any], row: Dict[str, Any]) -> str:
+    data = {"i": intent, "f": _fingerprint(intent, params), "a": {k: row.get(k) for k in PAGED_INTENTS[intent]}}
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str, intent: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """返回令牌中的排序键（即模板的 $after）。"""
+    if intent not in PAGED_INTENTS:
+        raise PageTokenError(f"{intent} 意图不支持分页")
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        after = data["a"]
+        ok = data["i"] == intent and data["f"] == _fingerprint(intent, params)
+    except (ValueError, KeyError, TypeError):
+        raise PageTokenError("无效的分页令牌") from None
+    if not ok or not isinstance(after, dict) or set(after) != set(PAGED_INTENTS[intent]):
+        raise PageTokenError("分页令牌与当前问题不匹配")
+    return after
+
+
+def split_page(intent: str, params: Dict[str, Any], rows: List[dict]) -> Tuple[List[dict], Optional[str]]:
+    """把 LIMIT PAGE_SIZE + 1 的结果拆成 (本页行, 下一页令牌)；没有下一页时令牌为 None。"""
+    if intent not in PAGED_INTENTS or len(rows) <= PAGE_SIZE:
+        return rows, None
+    page = rows[:PAGE_SIZE]
+    return page, encode_token(intent, params, page[-1])
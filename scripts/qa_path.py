@@ -0,0 +1,173 @@
+"""
+人物路径索引：在进程内的人物邻接图上回答 path 意图，不经过 Neo4j 遍历。
+
+- 邻接：RELATION 边（relation.txt 中 “A,B,父亲” 表示 A 是 B 的父亲）与共同参与的事件
+  （两人通过 INVOLVED 指向同一 Event）；同一对人物的多条边合并为一条，保留全部关系名与事件标题
+- 距离：人物数不超过 config.QA_PATH_APSP_MAX 时启动即算好全源最短距离；
+  否则用双向 BFS 按需计算两点距离并缓存
+- 路径：以到终点的距离剪枝做 DFS，枚举不超过最短长度 + 1 的简单路径，
+  按（跳数, 事件跳数）排序取前 k 条，关系边优先于“同场事件”边
+- 更新：索引由 qa_memgraph.DerivedIndex 管理，neo4j 后端的图谱代号变化后从 Neo4j 重建
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import QA_PATH_MAX_HOPS, QA_PATH_TOP_K, QA_PATH_APSP_MAX
+from scripts.qa_memgraph import DerivedIndex, MemGraph
+
+_MAX_CANDIDATES = 200
+
+
+class PathIndex:
+    def __init__(self, g: MemGraph, max_hops: int = QA_PATH_MAX_HOPS, apsp_max: int = QA_PATH_APSP_MAX) -> None:
+        self.max_hops = max_hops
+        self.names: List[str] = list(g.persons)
+        self.idx: Dict[str, int] = {n: i for i, n in enumerate(self.names)}
+        # adj[i][j] = {"rel": [(主语, 客体, 关系)...], "events": [事件标题...]}
+        self.adj: List[Dict[int, Dict[str, list]]] = [{} for _ in self.names]
+        for a, b, rtype in g.rel_edges:
+            if a != b:
+                self._link(a, b)["rel"].append((a, b, rtype))
+        for eid, members in g.inv_by_event.items():
+            title = g.events.get(eid, {}).get("title") or eid
+            people = list(dict.fromkeys(name for name, _ in members))
+            for i, a in enumerate(people):
+                for b in people[i + 1:]:
+                    events = self._link(a, b)["events"]
+                    if title not in events:
+                        events.append(title)
+        # 全源最短距离表：dist[i] 为从 i 出发 BFS 的完整结果，缺失的 j 表示超出 max_hops 或不连通
+        self.dist: Dict[int, Dict[int, int]] = {}
+        self._pair: Dict[Tuple[int, int], int] = {}
+        if len(self.names) <= apsp_max:
+            for i in range(len(self.names)):
+                self.dist[i] = self._bfs(i)
+
+    def _link(self, a: str, b: str) -> Dict[str, list]:
+        i, j = self.idx[a], self.idx[b]
+        edge = self.adj[i].get(j)
+        if edge is None:
+            edge = {"rel": [], "events": []}
+            self.adj[i][j] = edge
+            self.adj[j][i] = edge
+        return edge
+
+    def _bfs(self, src: int) -> Dict[int, int]:
+        dist = {src: 0}
+        q = deque([src])
+        while q:
+            u = q.popleft()
+            if dist[u] >= self.max_hops:
+                continue
+            for v in self.adj[u]:
+                if v not in dist:
+                    dist[v] = dist[u] + 1
+                    q.append(v)
+        return dist
+
+    def _bidirectional(self, s: int, t: int) -> int:
+        """双向 BFS：每次扩展较小的一侧，两侧相遇即得最短距离。"""
+        if s == t:
+            return 0
+        ds, dt = {s: 0}, {t: 0}
+        fs, ft = [s], [t]
+        while fs and ft:
+            if len(fs) > len(ft):
+                fs, ft, ds, dt = ft, fs, dt, ds
+            best = -1
+            nxt = []
+            for u in fs:
+                for v in self.adj[u]:
+                    if v in dt:
+                        d = ds[u] + 1 + dt[v]
+                        best = d if best < 0 else min(best, d)
+                    if v not in ds:
+                        ds[v] = ds[u] + 1
+                        nxt.append(v)
+            if best >= 0:
+                return best if best <= self.max_hops else -1
+            if ds[fs[0]] + 1 + max(dt.values()) > self.max_hops:
+                return -1
+            fs = nxt
+        return -1
+
+    def distance(self, a: str, b: str) -> int:
+        i, j = self.idx.get(a), self.idx.get(b)
+        if i is None or j is None:
+            return -1
+        if i in self.dist:
+            return self.dist[i].get(j, -1)
+        key = (i, j) if i < j else (j, i)
+        if key not in self._pair:
+            self._pair[key] = self._bidirectional(i, j)
+        return self._pair[key]
+
+    def _dist_to(self, t: int) -> Dict[int, int]:
+        if t not in self.dist:
+            self.dist[t] = self._bfs(t)
+        return self.dist[t]
+
+    def _hop(self, u: int, v: int) -> Dict[str, Any]:
+        edge = self.adj[u][v]
+        return {
+            "from": self.names[u],
+            "to": self.names[v],
+            "relations": [{"subject": a, "object": b, "type": t} for a, b, t in edge["rel"]],
+            "event": edge["events"][0] if edge["events"] else None,
+        }
+
+    def paths(self, a: str, b: str, k: int = QA_PATH_TOP_K) -> List[Dict[str, Any]]:
+        s, t = self.idx.get(a), self.idx.get(b)
+        if s is None or t is None or s == t:
+            return []
+        d = self.distance(a, b)
+        if d < 0:
+            return []
+        limit = min(d + 1, self.max_hops)
+        to_t = self._dist_to(t)
+        found: List[Tuple[int, int, List[int]]] = []
+        stack = [(s, [s])]
+        # 稠密处候选可能很多，收集到 _MAX_CANDIDATES 条即停止
+        while stack and len(found) < _MAX_CANDIDATES:
+            u, path = stack.pop()
+            if u == t:
+                event_hops = sum(1 for x, y in zip(path, path[1:]) if not self.adj[x][y]["rel"])
+                found.append((len(path) - 1, event_hops, path))
+                continue
+            for v in self.adj[u]:
+                if v in path:
+                    continue
+                rest = to_t.get(v)
+                if rest is None or len(path) + rest > limit:
+                    continue
+                stack.append((v, path + [v]))
+        found.sort(key=lambda x: (x[0], x[1], [self.names[i] for i in x[2]]))
+        return [
+            {
+                "length": length,
+                "nodes": [self.names[i] for i in path],
+                "hops": [self._hop(u, v) for u, v in zip(path, path[1:])],
+            }
+            for length, _, path in found[:k]
+        ]
+
+    def query(self, params: Dict[str, Any]) -> List[dict]:
+        return self.paths(params.get("A"), params.get("B"))
+
+
+_index = DerivedIndex("路径索引", PathIndex)
+
+
+def get_path_index() -> PathIndex:
+    """当前图谱代号的路径索引；一次查询内取一次并沿用。"""
+    return _index.get()
+
+
+def path_index_fresh() -> bool:
+    return _index.fresh
+
+
+def path_index_info() -> Dict[str, Any]:
+    return _index.describe()
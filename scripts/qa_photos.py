@@ -0,0 +1,178 @@
+"""
+/photos/{name}?w=…&format=… 的图片变体：Pillow 按需缩放/转码，按内容寻址缓存在磁盘上。
+
+- 宽度：向上取到 config.QA_PHOTO_WIDTHS 中的档位（超过最大档位取最大档位），不放大原图
+- 格式：webp / jpeg / png / auto（客户端 Accept 含 image/webp 时用 WebP，否则沿用原图格式）
+- 缓存键：sha1(原图内容哈希, 宽度, 格式, 质量)，文件存为 QA_PHOTO_CACHE_DIR/<前两位>/<键>.<扩展名>；
+  原图改动后键随之变化，旧变体不会再被命中。ETag 即缓存键（强 ETag）
+- 冷生成与原图哈希在线程池中执行，不阻塞事件循环；同一变体的并发请求共享同一次生成；
+  已缓存的变体以 FileResponse 分块发送，不整体读入内存
+- 与 /ui 静态资源一致：请求带 v=<原图 ETag> 时长期缓存（index.html 中的引用会自动带上），否则以 ETag 协商
+
+依赖：pip install Pillow
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+from config import QA_PHOTO_CACHE_DIR, QA_PHOTO_WIDTHS, QA_PHOTO_QUALITY, QA_STATIC_MAX_AGE
+from scripts.qa_http import etag_matches
+
+_FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "jpg": ("JPEG", "jpg", "image/jpeg"),
+    "png": ("PNG", "png", "image/png"),
+}
+_BY_SUFFIX = {".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".webp": "webp"}
+_KEY_VERSION = "1"  # 生成逻辑变化时递增，使旧缓存失效
+
+
+class PhotoError(ValueError):
+    """请求参数无效（未知格式、非法宽度）。"""
+
+
+def _content_hash(p: Path) -> str:
+    # 与 qa_http.AssetStore 的 ETag 算法一致，index.html 中的 v= 可直接比对
+    return hashlib.sha1(p.read_bytes()).hexdigest()[:16]
+
+
+class PhotoVariants:
+    def __init__(
+        self,
+        src_dir: str = "photos",
+        cache_dir: str = QA_PHOTO_CACHE_DIR,
+        widths: Tuple[int, ...] = QA_PHOTO_WIDTHS,
+        quality: int = QA_PHOTO_QUALITY,
+    ) -> None:
+        self.src_dir = Path(src_dir).resolve()
+        self.cache_dir = Path(cache_dir)
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        # 原图内容哈希：name -> (mtime_ns, size, 哈希)
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._inflight: Dict[str, "asyncio.Future[Path]"] = {}
+        self.generated = 0
+        self.coalesced = 0
+
+    async def source(self, name: str) -> Optional[Tuple[Path, str]]:
+        """返回 (原图路径, 内容哈希)；文件不存在或越出 photos/ 时返回 None。
+
+        哈希按 (mtime, size) 缓存，原图变化后在线程池中重新计算。
+        """
+        p = (self.src_dir / name).resolve()
+        if p.parent != self.src_dir or not p.is_file():
+            return None
+        st = p.stat()
+        cached = self._hashes.get(name)
+        if cached is None or cached[:2] != (st.st_mtime_ns, st.st_size):
+            digest = await asyncio.get_running_loop().run_in_executor(None, _content_hash, p)
+            cached = (st.st_mtime_ns, st.st_size, digest)
+            self._hashes[name] = cached
+        return p, cached[2]
+
+    def snap_width(self, w: Optional[int]) -> Optional[int]:
+        if w is None:
+            return None
+        if w <= 0:
+            raise PhotoError("w 必须为正整数")
+        for x in self.widths:
+            if x >= w:
+                return x
+        return self.widths[-1]
+
+    def resolve_format(self, fmt: Optional[str], accept: str, src: Path) -> str:
+        fmt = (fmt or "").lower()
+        if fmt in ("", "auto"):
+            return "webp" if fmt == "auto" and "image/webp" in (accept or "") else _BY_SUFFIX.get(src.suffix.lower(), "jpeg")
+        if fmt not in _FORMATS:
+            raise PhotoError(f"不支持的格式：{fmt}（可选 webp/jpeg/png/auto）")
+        return fmt
+
+    def cache_path(self, src_hash: str, width: Optional[int], fmt: str) -> Tuple[str, Path]:
+        key = hashlib.sha1(f"{_KEY_VERSION}:{src_hash}:{width or 0}:{fmt}:{self.quality}".encode()).hexdigest()
+        return key, self.cache_dir / key[:2] / f"{key}.{_FORMATS[fmt][1]}"
+
+    def _render(self, src: Path, width: Optional[int], fmt: str, out: Path) -> Path:
+        from PIL import Image, ImageOps
+
+        with Image.open(src) as im:
+            im = ImageOps.exif_transpose(im)
+            if width and width < im.width:
+                im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+            pil_fmt = _FORMATS[fmt][0]
+            if pil_fmt == "JPEG" and im.mode not in ("RGB", "L"):
+                im = im.convert("RGB")
+            buf = io.BytesIO()
+            if pil_fmt == "PNG":
+                im.save(buf, pil_fmt, optimize=True)
+            elif pil_fmt == "WEBP":
+                im.save(buf, pil_fmt, quality=self.quality, method=6)
+            else:
+                im.save(buf, pil_fmt, quality=self.quality, optimize=True, progressive=True)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(buf.getvalue())
+        os.replace(tmp, out)  # 原子替换，多进程同时生成同一变体也不会读到半个文件
+        return out
+
+    async def get(self, src: Path, width: Optional[int], fmt: str, key: str, out: Path) -> Path:
+        if out.exists():
+            return out
+        fut = self._inflight.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = loop.run_in_executor(None, self._render, src, width, fmt, out)
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.generated += 1
+        else:
+            self.coalesced += 1
+        # shield：某个等待者断开不会取消其他请求共享的生成
+        return await asyncio.shield(fut)
+
+    async def response(self, request: Request, name: str, w: Optional[int], fmt: Optional[str]) -> Response:
+        found = await self.source(name)
+        if found is None:
+            return Response("Not Found", status_code=404)
+        src, src_hash = found
+        try:
+            width = self.snap_width(w)
+            fmt = self.resolve_format(fmt, request.headers.get("accept", ""), src)
+        except PhotoError as exc:
+            return Response(str(exc), status_code=400)
+        key, out = self.cache_path(src_hash, width, fmt)
+        etag = key[:20]
+        headers = {
+            "ETag": f'"{etag}"',
+            "Cache-Control": (
+                f"public, max-age={QA_STATIC_MAX_AGE}, immutable"
+                if request.query_params.get("v") == src_hash
+                else "no-cache"
+            ),
+        }
+        if (request.query_params.get("format") or "").lower() == "auto":
+            headers["Vary"] = "Accept"
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+        path = await self.get(src, width, fmt, key, out)
+        # FileResponse 自行处理 HEAD 与 Content-Length，保留上面的 ETag
+        return FileResponse(path, media_type=_FORMATS[fmt][2], headers=headers)
+
+
+_variants: Optional[PhotoVariants] = None
+
+
+def get_photo_variants() -> PhotoVariants:
+    global _variants
+    if _variants is None:
+        _variants = PhotoVariants()
+    return _variants
@@ -0,0 +1,213 @@
+"""
+/qa 异步访问层：基于 neo4j 官方驱动的 AsyncDriver，提供有界的会话池。
+
+- 池大小由 config.NEO4J_POOL_SIZE 控制，超出的请求以协程形式排队，不占用线程
+- 每个请求 acquire 一个会话，执行完毕（含异常）后立即 release
+- 驱动惰性创建，避免服务启动时因数据库未启动而崩溃（与 config.get_graph 一致）
+- 传入 timeout 时以事务超时提交（服务端到时终止事务），另加客户端兜底（数据库无响应时服务端超时不会
+  返回），两者均抛出 QueryTimeout；熔断时 discard() 丢弃驱动，恢复后的第一次访问重新连接，
+  旧驱动在其上的在途会话全部结束后再关闭（不打断正在执行的查询）
+
+依赖：pip install neo4j
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Set, Tuple
+
+from config import NEO4J_URL, NEO4J_AUTH, NEO4J_POOL_SIZE, NEO4J_POOL_ACQUIRE_TIMEOUT
+from scripts.qa_metrics import get_metrics
+
+
+class PoolTimeout(RuntimeError):
+    """在 acquire_timeout 内没有等到空闲会话。"""
+
+
+class QueryTimeout(RuntimeError):
+    """查询超过事务超时仍未完成。"""
+
+
+# 客户端兜底超时比事务超时多出的秒数，留给服务端返回超时错误
+_CLIENT_GRACE = 1.0
+
+
+def _query(cypher: str, timeout: Optional[float]) -> Any:
+    if timeout is None:
+        return cypher
+    from neo4j import Query
+
+    return Query(cypher, timeout=timeout)
+
+
+async def _bounded(coro: Awaitable[Any], timeout: Optional[float]) -> Any:
+    if timeout is None:
+        return await coro
+    try:
+        return await asyncio.wait_for(coro, timeout + _CLIENT_GRACE)
+    except asyncio.TimeoutError:
+        raise QueryTimeout(f"查询超过 {timeout} 秒未返回") from None
+
+
+class SessionPool:
+    def __init__(
+        self,
+        url: str = NEO4J_URL,
+        auth: tuple = NEO4J_AUTH,
+        size: int = NEO4J_POOL_SIZE,
+        acquire_timeout: float = NEO4J_POOL_ACQUIRE_TIMEOUT,
+    ) -> None:
+        self.url = url
+        self.auth = auth
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self._driver = None
+        # 须在事件循环内创建（Python 3.9 的 Semaphore 构造时绑定当前循环）
+        self._sem = asyncio.Semaphore(size)
+        self.in_use = 0
+        self._drivers_created = 0
+        # 驱动 -> 在途会话数；discard 后的旧驱动在计数归零时关闭
+        self._active: Dict[Any, int] = {}
+        self._closing: Set["asyncio.Task[None]"] = set()
+
+    def _get_driver(self):
+        if self._driver is None:
+            # 延迟导入，未安装 neo4j 时仅异步路径不可用
+            from neo4j import AsyncGraphDatabase
+
+            if self._drivers_created:
+                get_metrics().inc("qa_neo4j_reconnects_total")
+            self._drivers_created += 1
+
+            self._driver = AsyncGraphDatabase.driver(
+                self.url,
+                auth=self.auth,
+                max_connection_pool_size=self.size,
+                connection_acquisition_timeout=self.acquire_timeout,
+            )
+        return self._driver
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Any]:
+        """获取一个会话；离开 with 块时无论成功与否都会归还。"""
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"等待 Neo4j 会话超时（池大小 {self.size}）") from None
+        self.in_use += 1
+        driver = None
+        try:
+            driver = self._get_driver()
+            self._active[driver] = self._active.get(driver, 0) + 1
+            async with driver.session() as s:
+                yield s
+        except Exception as exc:
+            # 连接失效（数据库重启、网络中断）时驱动会在下次取连接时重连，这里只计数
+            if type(exc).__name__ in ("ServiceUnavailable", "SessionExpired"):
+                get_metrics().inc("qa_neo4j_reconnects_total")
+            if "TransactionTimedOut" in (getattr(exc, "code", None) or ""):
+                raise QueryTimeout(f"查询超过事务超时：{exc}") from exc
+            raise
+        finally:
+            self.in_use -= 1
+            self._sem.release()
+            if driver is not None:
+                self._leave(driver)
+
+    def _leave(self, driver: Any) -> None:
+        n = self._active[driver] - 1
+        if n:
+            self._active[driver] = n
+            return
+        del self._active[driver]
+        if driver is not self._driver:
+            # 已被 discard 的旧驱动：最后一个在途会话结束，现在关闭
+            self._close_later(driver)
+
+    async def run(
+        self, cypher: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> List[dict]:
+        async def fetch(s) -> List[dict]:
+            result = await s.run(_query(cypher, timeout), params or {})
+            return [r.data() async for r in result]
+
+        async with self.session() as s:
+            # 超时只计执行与读取结果，不含等待空闲会话（由 acquire_timeout 限制）
+            return await _bounded(fetch(s), timeout)
+
+    async def stream(
+        self, cypher: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> AsyncIterator[dict]:
+        """逐行产出结果；调用方提前关闭生成器时，会话随之归还、剩余结果被丢弃。
+
+        timeout 为事务超时：服务端到时终止事务，已产出的行不受影响。
+        """
+        async with self.session() as s:
+            result = await _bounded(s.run(_query(cypher, timeout), params or {}), timeout)
+            async for r in result:
+                yield r.data()
+
+    async def profile(
+        self, cypher: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> Tuple[List[dict], Dict[str, Any]]:
+        """以 PROFILE 执行，返回 (结果行, 执行计划)；计划为驱动给出的 dict（operatorType/dbHits/rows/children）。
+
+        timeout 与 run 相同：事务超时加客户端兜底。
+        """
+
+        async def fetch(s) -> Tuple[List[dict], Dict[str, Any]]:
+            result = await s.run(_query("PROFILE " + cypher.strip(), timeout), params or {})
+            rows = [r.data() async for r in result]
+            summary = await result.consume()
+            return rows, summary.profile or {}
+
+        async with self.session() as s:
+            return await _bounded(fetch(s), timeout)
+
+    def discard(self) -> None:
+        """丢弃当前驱动，下次取会话时新建驱动重新连接；旧驱动等在途会话结束后关闭。"""
+        driver, self._driver = self._driver, None
+        if driver is not None and driver not in self._active:
+            self._close_later(driver)
+
+    def _close_later(self, driver: Any) -> None:
+        async def close() -> None:
+            # 数据库不可达时关闭连接也可能报错，忽略即可
+            try:
+                await driver.close()
+            except Exception:
+                pass
+
+        try:
+            task = asyncio.get_running_loop().create_task(close())
+        except RuntimeError:
+            return
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close(self) -> None:
+        drivers = set(self._active)
+        if self._driver is not None:
+            drivers.add(self._driver)
+        self._driver = None
+        self._active.clear()
+        for driver in drivers:
+            await driver.close()
+
+
+_pool: Optional[SessionPool] = None
+
+
+def get_pool() -> SessionPool:
+    """惰性创建进程内唯一的会话池（须在事件循环中调用）。"""
+    global _pool
+    if _pool is None:
+        _pool = SessionPool()
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
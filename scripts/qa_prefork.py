@@ -0,0 +1,312 @@
+"""
+生产入口：prefork 多进程问答服务。
+
+主进程：
+1. 绑定 QA_HOST:QA_PORT，所有 worker 共用这一个监听 socket，由内核分发连接
+2. 导入 scripts.qa_service（静态资源表在导入时构建），并预加载人名词典、输入联想字典树、
+   进程内图引擎与全文索引、人物路径索引与关系子图索引
+3. gc.freeze() 后 fork QA_WORKERS 个 worker：预加载的对象与主进程写时复制共享；冻结后循环 GC 不再遍历
+   （也就不再改写）这些对象的 GC 头，被复制的只剩实际访问到的对象所在页（引用计数写入）
+4. 监控 worker：异常退出的自动补齐；数据文件（ARTIFACTS）变化或收到 SIGHUP 时平滑重启
+
+平滑重启：主进程带着监听 socket 的文件描述符 exec 自身（pid 不变，旧 worker 仍是其子进程并继续服务），
+新主进程重新预加载并 fork 新 worker，新 worker 全部开始监听（或等待超过 QA_PREFORK_READY_TIMEOUT）后
+向旧 worker 发送 SIGTERM，uvicorn 处理完在途请求后退出。新主进程预加载失败时保留旧 worker 继续服务。
+SIGTERM / SIGINT：停止全部 worker 后退出。
+
+Neo4j 会话池、答案缓存、查询日志线程都在各 worker 内惰性创建，不跨 fork 共享；/metrics 为单个 worker 的指标。
+需要 os.fork（Linux / macOS）；Windows 下请使用 python -m scripts.qa_service。
+
+用法（在项目根目录执行）：
+  python -m scripts.qa_prefork [--workers 4] [--host 0.0.0.0] [--port 8000] [--backend memory]
+  kill -HUP <主进程 pid>    # 手动平滑重启
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+import config
+
+ROOT = Path(__file__).resolve().parent.parent
+# 预加载结构的来源：任一文件变化（mtime / 大小）即平滑重启
+ARTIFACTS = (
+    "relation.txt",
+    "kg_events.csv",
+    "kg_event_edges.csv",
+    "name_dict.txt",
+    "persons_unique.txt",
+    "kg_snapshot.bin",
+    "frontend",
+    "photos",
+)
+_ENV_FD = "QA_PREFORK_FD"
+_ENV_RETIRE = "QA_PREFORK_RETIRE"
+
+logger = logging.getLogger("qa.prefork")
+
+
+def artifact_fingerprint() -> Tuple[Tuple[str, int, int], ...]:
+    out = []
+    for name in ARTIFACTS:
+        p = ROOT / name
+        files = sorted(x for x in p.rglob("*") if x.is_file()) if p.is_dir() else [p]
+        for f in files:
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue
+            out.append((f.relative_to(ROOT).as_posix(), st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+def preload() -> Dict[str, float]:
+    """在主进程中加载 worker 共享的只读结构，返回各步耗时（毫秒）。"""
+    timings: Dict[str, float] = {}
+
+    def step(name: str, fn) -> None:
+        t0 = time.perf_counter()
+        fn()
+        timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+    step("app", lambda: __import__("scripts.qa_service"))
+    from scripts.qa_intent import load_lexicons
+    from scripts.qa_memgraph import get_memgraph
+    from scripts.qa_graph import get_ego_index
+    from scripts.qa_path import get_path_index
+    from scripts.qa_suggest import get_suggest_index
+
+    step("lexicons", load_lexicons)
+    step("suggest", get_suggest_index)
+    step("memgraph", lambda: get_memgraph().text_index())
+    step("path_index", get_path_index)
+    step("ego_index", get_ego_index)
+    return timings
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """平滑重启后沿用 exec 前的监听 socket，否则新建。"""
+    fd = os.environ.pop(_ENV_FD, None)
+    if fd is not None:
+        sock = socket.socket(fileno=int(fd))
+    else:
+        sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _worker(sock: socket.socket, ready_w: Optional[int]) -> None:
+    gc.enable()
+    for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    import uvicorn
+    from scripts.qa_service import app
+
+    # 请求记录由 qa_log 负责，关闭 uvicorn 的逐请求访问日志
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="on", access_log=False))
+
+    async def serve() -> None:
+        task = asyncio.ensure_future(server.serve(sockets=[sock]))
+        if ready_w is not None:
+            while not server.started and not task.done():
+                await asyncio.sleep(0.05)
+            if server.started:
+                os.write(ready_w, b".")
+            os.close(ready_w)
+        await task
+
+    asyncio.run(serve())
+
+
+class Master:
+    def __init__(self, sock: socket.socket, workers: int, retiring: Set[int]) -> None:
+        self.sock = sock
+        self.n = workers
+        self.workers: Dict[int, float] = {}  # pid -> 启动时间
+        self.retiring = retiring  # exec 前的旧 worker，新 worker 就绪后停止
+        self._reload = False
+        self._stop = False
+
+    def spawn(self, ready_w: Optional[int] = None) -> int:
+        gc.freeze()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _worker(self.sock, ready_w)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        return pid
+
+    def start(self) -> None:
+        ready_r, ready_w = os.pipe()
+        for _ in range(self.n):
+            self.spawn(ready_w)
+        os.close(ready_w)
+        # 每个 worker 开始监听后写入一个字节；全部 worker 退出或超时时提前结束等待
+        ready, deadline = 0, time.monotonic() + config.QA_PREFORK_READY_TIMEOUT
+        while ready < self.n and time.monotonic() < deadline:
+            if select.select([ready_r], [], [], max(0.0, deadline - time.monotonic()))[0]:
+                chunk = os.read(ready_r, 64)
+                if not chunk:
+                    break
+                ready += len(chunk)
+        os.close(ready_r)
+        logger.info("%d/%d 个 worker 已就绪：%s", ready, self.n, sorted(self.workers))
+        self.retire()
+
+    def retire(self) -> None:
+        for pid in list(self.retiring):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.retiring.discard(pid)
+        if self.retiring:
+            logger.info("停止旧 worker：%s", sorted(self.retiring))
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            started = self.workers.pop(pid, None)
+            if started is None or self._stop:
+                continue
+            logger.warning("worker %d 退出（状态 %d），重新启动", pid, status)
+            # 启动即崩溃时放慢重启节奏，避免空转
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)
+            self.spawn()
+
+    def reload(self) -> None:
+        """带着监听 socket exec 自身；当前 worker 交给新主进程在新 worker 就绪后停止。"""
+        logger.info("平滑重启：重新加载数据并替换 %d 个 worker", len(self.workers))
+        env = dict(os.environ)
+        env[_ENV_FD] = str(self.sock.fileno())
+        env[_ENV_RETIRE] = ",".join(str(p) for p in set(self.workers) | self.retiring)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execve(sys.executable, [sys.executable, "-m", "scripts.qa_prefork", *sys.argv[1:]], env)
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        pids = set(self.workers) | self.retiring
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout
+        while pids and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.1)
+                continue
+            pids.discard(pid)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        logger.info("已停止")
+
+    def run(self) -> None:
+        def on_reload(*_):
+            self._reload = True
+
+        def on_stop(*_):
+            self._stop = True
+
+        signal.signal(signal.SIGHUP, on_reload)
+        signal.signal(signal.SIGTERM, on_stop)
+        signal.signal(signal.SIGINT, on_stop)
+
+        interval = config.QA_PREFORK_RELOAD_INTERVAL
+        fingerprint = artifact_fingerprint()
+        next_check = time.monotonic() + interval
+        while not self._stop:
+            self.reap()
+            if interval > 0 and time.monotonic() >= next_check:
+                next_check = time.monotonic() + interval
+                current = artifact_fingerprint()
+                if current != fingerprint:
+                    logger.info("检测到数据文件变化")
+                    self._reload = True
+            if self._reload:
+                self.reload()
+            time.sleep(0.2)
+        self.shutdown()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default=config.QA_HOST)
+    ap.add_argument("--port", type=int, default=config.QA_PORT)
+    ap.add_argument("--workers", type=int, default=config.QA_WORKERS, help="worker 进程数；0 表示 CPU 核数")
+    ap.add_argument("--backend", choices=["memory", "neo4j"], default=config.QA_BACKEND, help="查询后端")
+    ap.add_argument("--no-log", action="store_true", help="不写查询日志（压测时使用）")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="[prefork %(process)d] %(message)s")
+    if not hasattr(os, "fork"):
+        sys.exit("当前平台不支持 fork，请使用 python -m scripts.qa_service")
+
+    # 须在导入 qa_service 之前设置（各模块导入时读取 config）
+    config.QA_BACKEND = args.backend
+    if args.no_log:
+        config.QA_LOG_ENABLED = False
+    # 预加载期间不做循环 GC，避免产生碎片；worker 中重新开启
+    gc.disable()
+    sock = bind_socket(args.host, args.port)
+    retiring = {int(p) for p in os.environ.pop(_ENV_RETIRE, "").split(",") if p}
+    workers = args.workers or os.cpu_count() or 1
+    master = Master(sock, workers, set())
+    try:
+        timings = preload()
+    except Exception:
+        if not retiring:
+            raise
+        # 平滑重启时新数据加载失败：旧 worker 继续服务，等数据文件再次变化或下一次 SIGHUP
+        logger.exception("预加载失败，保留旧 worker")
+        master.workers = {pid: time.monotonic() for pid in retiring}
+    else:
+        logger.info(
+            "预加载完成（后端 %s）：%s；监听 %s:%d，启动 %d 个 worker",
+            config.QA_BACKEND,
+            " | ".join(f"{k} {v} ms" for k, v in timings.items()),
+            args.host,
+            args.port,
+            workers,
+        )
+        master.retiring = retiring
+        master.start()
+    master.run()
+
+
+if __name__ == "__main__":
+    main()
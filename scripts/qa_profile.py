@@ -0,0 +1,121 @@
+"""
+/qa 单请求剖析：PROFILE 执行计划的整理，以及慢请求的自动剖析日志。
+
+- summarize_plan：把驱动返回的计划 dict 整理为算子树（算子、详情、行数、db hits），并汇总 db hits
+- profile_query：以 PROFILE 执行一个已生成的查询；进程内后端与 path 意图没有 Cypher 计划，返回 None
+- log_slow：请求耗时超过 config.QA_PROFILE_SLOW_MS 时调用，后台 PROFILE 一次并以 WARNING 写入
+  日志 "qa.profile"（一行 JSON），按 intent 汇总即可找出热点模板。同一模板（cypher_hash）每
+  QA_PROFILE_SLOW_INTERVAL 秒至多剖析一次，期间的慢请求只计数，随下一条记录以 suppressed 输出；
+  同时在途的剖析不超过 _MAX_PENDING 个，避免数据库变慢时剖析本身放大负载。剖析与普通查询一样受
+  模板超时（qa_cypher.query_timeout）限制并经过熔断器：熔断中不剖析，遇到故障计入熔断
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import QA_BACKEND, QA_PROFILE_SLOW_INTERVAL
+from scripts.qa_breaker import get_breaker, is_outage
+from scripts.qa_log import cypher_hash
+
+logger = logging.getLogger("qa.profile")
+
+_MAX_PENDING = 2
+
+_pending: Set[asyncio.Task] = set()
+# cypher_hash -> 上次剖析的时刻（monotonic）；cypher_hash -> 此后被跳过的慢请求数
+_last_profiled: Dict[str, float] = {}
+_suppressed: Dict[str, int] = {}
+
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """算子树：{"operator", "details", "rows", "db_hits", "children"}。"""
+    args = plan.get("args") or {}
+    return {
+        "operator": (plan.get("operatorType") or "").split("@")[0],
+        "details": args.get("Details"),
+        "rows": plan.get("rows", args.get("Rows")),
+        "db_hits": plan.get("dbHits", args.get("DbHits")),
+        "children": [summarize_plan(c) for c in plan.get("children") or []],
+    }
+
+
+def total_db_hits(tree: Dict[str, Any]) -> int:
+    return int(tree.get("db_hits") or 0) + sum(total_db_hits(c) for c in tree["children"])
+
+
+def rows_per_operator(tree: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """按先序遍历展开的 [{"operator", "rows", "db_hits"}]。"""
+    out = [{"operator": tree["operator"], "rows": tree["rows"], "db_hits": tree["db_hits"]}]
+    for c in tree["children"]:
+        out += rows_per_operator(c)
+    return out
+
+
+def _remote(intent: str) -> bool:
+    return intent != "path" and QA_BACKEND != "memory"
+
+
+async def profile_query(intent: str, cypher: str, params: Dict) -> Tuple[Optional[List[dict]], Optional[Dict[str, Any]]]:
+    """返回 (结果行, 剖析结果)；不走 Neo4j 的意图返回 (None, None)，由调用方按普通路径执行。"""
+    if not _remote(intent):
+        return None, None
+    from scripts.qa_cypher import query_timeout
+    from scripts.qa_pool import get_pool
+
+    rows, plan = await get_pool().profile(cypher, params, query_timeout(intent))
+    tree = summarize_plan(plan)
+    return rows, {"db_hits": total_db_hits(tree), "operators": rows_per_operator(tree), "plan": tree}
+
+
+def _ms(timings: Dict[str, float]) -> Dict[str, float]:
+    return {k: round(v * 1000, 3) for k, v in timings.items()}
+
+
+async def _profile_and_log(
+    intent: str, cypher: str, params: Dict, timings: Dict[str, float], suppressed: int = 0
+) -> None:
+    from scripts.qa_pool import PoolTimeout
+
+    record: Dict[str, Any] = {"intent": intent, "params": params, "timings_ms": _ms(timings), "suppressed": suppressed}
+    breaker = get_breaker()
+    try:
+        _, prof = await profile_query(intent, cypher, params)
+    except PoolTimeout as exc:  # 本地排队背压，不影响熔断状态
+        record["profile_error"] = f"{type(exc).__name__}: {exc}"
+    except Exception as exc:  # 剖析失败不影响请求本身
+        if is_outage(exc):
+            breaker.failure(exc)
+        else:
+            breaker.success()
+        record["profile_error"] = f"{type(exc).__name__}: {exc}"
+    else:
+        if prof is not None:
+            breaker.success()
+            record["db_hits"] = prof["db_hits"]
+            record["operators"] = prof["operators"]
+    logger.warning("slow /qa %s", json.dumps(record, ensure_ascii=False, default=str))
+
+
+def log_slow(intent: str, cypher: str, params: Dict, timings: Dict[str, float]) -> None:
+    """在后台剖析并记录一个慢请求，不阻塞当前响应；同一模板在间隔内或在途剖析已满时只计数。"""
+    h = cypher_hash(cypher)
+    now = time.monotonic()
+    last = _last_profiled.get(h)
+    if (last is not None and now - last < QA_PROFILE_SLOW_INTERVAL) or len(_pending) >= _MAX_PENDING:
+        _suppressed[h] = _suppressed.get(h, 0) + 1
+        return
+    # 只有访问 Neo4j 的剖析才问熔断器，且放在最后：allow() 在 half_open 时会占用探测名额
+    if _remote(intent) and not get_breaker().allow():
+        _suppressed[h] = _suppressed.get(h, 0) + 1
+        return
+    _last_profiled[h] = now
+    suppressed = _suppressed.pop(h, 0)
+    task = asyncio.get_running_loop().create_task(
+        _profile_and_log(intent, cypher, params, dict(timings), suppressed)
+    )
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
@@ -9,50 +9,454 @@ _BLOCK = [
 ]
 sys.path = [p for p in sys.path if not any(b in p for b in _BLOCK)]
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+import asyncio
+import hmac
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel
 
+from config import (
+    QA_ADMIN_TOKEN,
+    QA_ADMISSION_RETRY_AFTER,
+    QA_BACKEND,
+    QA_BATCH_MAX,
+    QA_GRAPH_MAX_DEPTH,
+    QA_GRAPH_MAX_NODES,
+    QA_HOST,
+    QA_PORT,
+    QA_PROFILE_ENABLED,
+    QA_PROFILE_SLOW_MS,
+    QA_SUGGEST_LIMIT,
+    QA_WARMUP_ENABLED,
+)
 from scripts.qa_intent import detect_intent
-from scripts.qa_cypher import build_query, run_query
+from scripts.qa_cypher import ResilientStream, build_query, engine_of, execute_batch_resilient, execute_resilient
 from scripts.qa_answer import format_answer
+from scripts.qa_admission import Overloaded, get_admission, run_query_admitted
+from scripts.qa_breaker import get_breaker
+from scripts.qa_artifacts import get_artifacts
+from scripts.qa_page import PAGE_SIZE, PAGED_INTENTS, PageTokenError, decode_token, split_page
+from scripts.qa_path import path_index_info
+from scripts.qa_pool import PoolTimeout, close_pool
+from scripts.qa_cache import get_cache
+from scripts.qa_memgraph import get_memgraph
+from scripts.qa_metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, get_metrics
+from scripts.qa_profile import log_slow, profile_query
+from scripts.qa_log import close_query_log, cypher_hash, get_query_log
+from scripts.qa_http import AssetStore, json_response
+from scripts.qa_photos import get_photo_variants
+from scripts.qa_graph import ego_graph, ego_index_info
+from scripts.qa_suggest import get_suggest_index
+from scripts.qa_warmup import state as warmup_state, warm_up
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # 预热在后台进行：服务立即开始监听，/health 可用，预热完成后 /ready 才返回 200
+    warmup = None
+    if QA_WARMUP_ENABLED:
+        warmup = asyncio.get_running_loop().create_task(warm_up())
+    else:
+        if QA_BACKEND == "memory":
+            get_memgraph()
+        warmup_state.ready = True
+    yield
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+    await close_pool()
+    close_query_log()
+
 
+app = FastAPI(title="RedDream-KG-QA", version="0.1.0", lifespan=lifespan)
+# 静态资源启动时一次性读入：内容哈希 ETag + 预压缩变体，HTML/CSS 中的引用带上版本号
+assets = AssetStore({"/ui": "frontend", "/photos": "photos"})
+app.mount("/ui", assets.app("/ui"), name="ui")
 
-app = FastAPI(title="RedDream-KG-QA", version="0.1.0")
-app.mount("/ui", StaticFiles(directory="frontend", html=True), name="ui")
-app.mount("/photos", StaticFiles(directory="photos"), name="photos")
+
+@app.exception_handler(Overloaded)
+async def overloaded(_request: Request, exc: Overloaded):
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": str(exc.retry_after)})
+
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout(_request: Request, exc: PoolTimeout):
+    # 会话池排队超时是本进程的背压，不是数据库故障：不降级，让客户端稍后重试
+    return JSONResponse(
+        {"detail": str(exc)}, status_code=503, headers={"Retry-After": str(QA_ADMISSION_RETRY_AFTER)}
+    )
 
 
 class QARequest(BaseModel):
     question: str
-@app.get("/")
-def root():
-    return RedirectResponse(url="/ui/")
+    page: Optional[str] = None  # 上一页响应中的 next 令牌（events/cooccur/chapter_events/search 的键集分页）
+    profile: bool = False  # 以 PROFILE 执行并返回执行计划与各阶段耗时（需 config.QA_PROFILE_ENABLED）
 
 
+class QABatchRequest(BaseModel):
+    questions: List[str]
 
-@app.post("/qa")
-def qa(req: QARequest):
-    payload = detect_intent(req.question)
-    cypher, params = build_query(payload)
-    rows = run_query(cypher, params)
-    answer = format_answer(payload["intent"], payload, rows)
+
+def _result(
+    payload, cypher, params, rows, answer, cached: bool, next_page: Optional[str] = None, degraded: bool = False
+) -> dict:
+    engine = engine_of(payload["intent"], degraded)
     return {
         "intent": payload["intent"],
         "payload": payload,
-        "cypher": cypher,
+        # 只有 Neo4j 实际执行的查询才返回 Cypher；进程内引擎回答时由 engine 指明
+        "engine": engine,
+        "cypher": cypher if engine == "neo4j" else None,
         "params": params,
         "rows": rows[:10],
         "answer": answer,
+        "cached": cached,
+        "next": next_page,
+        # Neo4j 不可用时由本地快照回答，结果可能与数据库不一致
+        "degraded": degraded,
     }
 
 
+def _apply_page(req: QARequest, intent: str, params: dict) -> None:
+    """把请求中的分页令牌解析为模板的 $after；令牌无效或属于别的问题时返回 400。"""
+    if req.page:
+        try:
+            params["after"] = decode_token(req.page, intent, params)
+        except PageTokenError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+
+@app.get("/")
+def root():
+    return RedirectResponse(url="/ui/")
+
+
+@app.api_route("/photos/{name}", methods=["GET", "HEAD"])
+async def photo(name: str, request: Request, w: Optional[int] = None, format: Optional[str] = None):
+    """原图（无参数）或按需生成的缩放/转码变体：?w=宽度&format=webp|jpeg|png|auto。"""
+    if w is None and format is None:
+        return assets.response(request, f"/photos/{name}")
+    return await get_photo_variants().response(request, name, w, format)
+
+
+
+@app.post("/qa")
+async def qa(req: QARequest, request: Request):
+    # 异步路径：查询在会话池中排队，不占用 Starlette 线程池
+    if req.profile and not QA_PROFILE_ENABLED:
+        raise HTTPException(status_code=403, detail="未开启剖析（config.QA_PROFILE_ENABLED）")
+    t_start = time.perf_counter()
+    metrics = get_metrics()
+    timings: dict = {}
+    with metrics.track("/qa"):
+        with metrics.stage("detect_intent", into=timings) as t:
+            payload = detect_intent(req.question)
+            t.intent = intent = payload["intent"]
+        with metrics.stage("build_query", intent, into=timings):
+            cypher, params = build_query(payload)
+        _apply_page(req, intent, params)
+        cache = get_cache()
+        key = cache.make_key(intent, params, await cache.generation())
+        # 剖析请求绕过缓存，保证计划来自一次真实执行
+        hit = None if req.profile else await cache.get(key)
+        prof = None
+        degraded = False
+        if hit is not None:
+            rows, answer, next_page = hit["rows"], hit["answer"], hit.get("next")
+        else:
+            with metrics.stage("run_query", intent, into=timings):
+                rows = None
+                if req.profile:
+                    rows, prof = await profile_query(intent, cypher, params)
+                if rows is None:
+                    # 相同查询合并为一次执行，再按意图限流
+                    rows, degraded = await run_query_admitted(
+                        key, intent, lambda: execute_resilient(intent, cypher, params)
+                    )
+            metrics.record_rows(intent, len(rows))
+            rows, next_page = split_page(intent, params, rows)
+            with metrics.stage("format_answer", intent, into=timings):
+                answer = format_answer(intent, payload, rows)
+            # 降级结果不缓存，数据库恢复后立即回到正常结果
+            if not degraded:
+                cache.put(key, {"rows": rows[:10], "answer": answer, "next": next_page})
+        result = _result(payload, cypher, params, rows, answer, hit is not None, next_page, degraded)
+        total_ms = sum(timings.values()) * 1000
+        if req.profile:
+            result["profile"] = {
+                "timings_ms": {k: round(v * 1000, 3) for k, v in timings.items()},
+                "total_ms": round(total_ms, 3),
+                **(prof or {"db_hits": None, "operators": [], "plan": None}),
+            }
+        elif hit is None and not degraded and 0 < QA_PROFILE_SLOW_MS < total_ms:
+            log_slow(intent, cypher, params, timings)
+        qlog = get_query_log()
+        if qlog is not None:
+            qlog.write(
+                {
+                    "ts": round(time.time(), 3),
+                    "question": req.question,
+                    "page": req.page,
+                    "payload": payload,
+                    "intent": intent,
+                    "cypher_hash": cypher_hash(cypher),
+                    "latency_ms": round((time.perf_counter() - t_start) * 1000, 3),
+                    "rows": len(rows),
+                    "cached": hit is not None,
+                    "degraded": degraded,
+                }
+            )
+        return json_response(request, result)
+
+
+def _frame(kind: str, data: dict, fmt: str) -> bytes:
+    body = json.dumps(data, ensure_ascii=False, default=str)
+    if fmt == "sse":
+        return f"event: {kind}\ndata: {body}\n\n".encode("utf-8")
+    return (json.dumps({"type": kind, **data}, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+@app.post("/qa/stream")
+async def qa_stream(req: QARequest, request: Request, format: str = "ndjson"):
+    """流式问答：先推送意图与实体，再逐行推送查询结果，最后推送格式化答案。
+
+    format=ndjson（默认，每行一个 JSON，带 type 字段）或 sse（text/event-stream）。
+    客户端断开后停止读取游标并归还会话，不写入缓存。answer 帧带下一页令牌 next 与 degraded（Neo4j
+    不可用时由本地快照回答）；令牌无效或该意图繁忙（准入拒绝，带 retry_after）时只推送一个 error 帧。
+    """
+    fmt = "sse" if format == "sse" else "ndjson"
+
+    metrics = get_metrics()
+
+    async def frames():
+        with metrics.track("/qa/stream"):
+            with metrics.stage("detect_intent") as t:
+                payload = detect_intent(req.question)
+                t.intent = intent = payload["intent"]
+            with metrics.stage("build_query", intent):
+                cypher, params = build_query(payload)
+            try:
+                _apply_page(req, intent, params)
+            except HTTPException as exc:
+                # 响应头已发出，无效令牌以 error 帧告知
+                yield _frame("error", {"detail": exc.detail}, fmt)
+                return
+            engine = engine_of(intent)
+            yield _frame(
+                "intent",
+                {
+                    "intent": intent,
+                    "payload": payload,
+                    "engine": engine,
+                    "cypher": cypher if engine == "neo4j" else None,
+                    "params": params,
+                },
+                fmt,
+            )
+
+            cache = get_cache()
+            key = cache.make_key(intent, params, await cache.generation())
+            hit = await cache.get(key)
+            if hit is not None:
+                for row in hit["rows"]:
+                    yield _frame("row", {"row": row}, fmt)
+                yield _frame(
+                    "answer", {"answer": hit["answer"], "cached": True, "next": hit.get("next"), "degraded": False}, fmt
+                )
+                return
+
+            # 流式查询逐行推送，不做合并，但同样占用该意图的执行名额直到游标读完
+            slot = get_admission().slot(intent)
+            try:
+                await slot.__aenter__()
+            except Overloaded as exc:
+                yield _frame("error", {"detail": str(exc), "retry_after": exc.retry_after}, fmt)
+                return
+            # run_query 只计首行之前与逐行读取游标的时间，不含把帧写给客户端的时间
+            rows = []
+            elapsed = 0.0
+            stream = ResilientStream(intent, cypher, params)
+            agen = stream.rows()
+            try:
+                while True:
+                    t0 = time.perf_counter()
+                    try:
+                        row = await agen.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    except PoolTimeout as exc:
+                        yield _frame("error", {"detail": str(exc), "retry_after": QA_ADMISSION_RETRY_AFTER}, fmt)
+                        return
+                    finally:
+                        elapsed += time.perf_counter() - t0
+                    if await request.is_disconnected():
+                        return
+                    rows.append(row)
+                    # 分页模板多取的一行只用于生成 next，不推送
+                    if len(rows) <= PAGE_SIZE or intent not in PAGED_INTENTS:
+                        yield _frame("row", {"row": row}, fmt)
+            finally:
+                await agen.aclose()
+                await slot.__aexit__(None, None, None)
+                metrics.observe("qa_stage_seconds", elapsed, stage="run_query", intent=intent)
+            metrics.record_rows(intent, len(rows))
+            rows, next_page = split_page(intent, params, rows)
+            with metrics.stage("format_answer", intent):
+                answer = format_answer(intent, payload, rows)
+            if not stream.degraded:
+                cache.put(key, {"rows": rows[:10], "answer": answer, "next": next_page})
+            yield _frame(
+                "answer", {"answer": answer, "cached": False, "next": next_page, "degraded": stream.degraded}, fmt
+            )
+
+    media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    return StreamingResponse(frames(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/qa/batch")
+async def qa_batch(req: QABatchRequest, request: Request):
+    """批量问答：按意图分组，每组一次 UNWIND 执行，结果按输入顺序返回。"""
+    if len(req.questions) > QA_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"单次最多 {QA_BATCH_MAX} 个问题")
+    metrics = get_metrics()
+    with metrics.track("/qa/batch"):
+        return json_response(request, await _qa_batch(req.questions, metrics))
+
+
+async def _run_group(intent: str, params_list: list, metrics) -> tuple:
+    # 一组 UNWIND 占一个执行名额；返回 (结果列表, 是否降级)
+    async with get_admission().slot(intent):
+        with metrics.stage("run_query", intent):
+            return await execute_batch_resilient(intent, params_list)
+
+
+async def _qa_batch(questions: List[str], metrics) -> dict:
+    payloads = []
+    for q in questions:
+        with metrics.stage("detect_intent") as t:
+            payloads.append(detect_intent(q))
+            t.intent = payloads[-1]["intent"]
+    built = []
+    for p in payloads:
+        with metrics.stage("build_query", p["intent"]):
+            built.append(build_query(p))
+    cache = get_cache()
+    generation = await cache.generation()
+    keys = [cache.make_key(p["intent"], params, generation) for p, (_, params) in zip(payloads, built)]
+    hits = await cache.get_many(keys)
+
+    # 未命中的问题按意图分组
+    groups: dict = {}
+    for i, (p, hit) in enumerate(zip(payloads, hits)):
+        if hit is None:
+            groups.setdefault(p["intent"], []).append(i)
+    intents = list(groups)
+    grouped_rows = await asyncio.gather(
+        *(_run_group(intent, [built[i][1] for i in groups[intent]], metrics) for intent in intents)
+    )
+
+    rows_of = {}
+    degraded_of = {}
+    for intent, (rows_list, degraded) in zip(intents, grouped_rows):
+        for i, rows in zip(groups[intent], rows_list):
+            rows_of[i] = rows
+            degraded_of[i] = degraded
+    results = []
+    for i, (payload, (cypher, params)) in enumerate(zip(payloads, built)):
+        if hits[i] is not None:
+            hit = hits[i]
+            results.append(_result(payload, cypher, params, hit["rows"], hit["answer"], True, hit.get("next")))
+            continue
+        rows = rows_of[i]
+        metrics.record_rows(payload["intent"], len(rows))
+        rows, next_page = split_page(payload["intent"], params, rows)
+        with metrics.stage("format_answer", payload["intent"]):
+            answer = format_answer(payload["intent"], payload, rows)
+        if not degraded_of[i]:
+            cache.put(keys[i], {"rows": rows[:10], "answer": answer, "next": next_page})
+        results.append(_result(payload, cypher, params, rows, answer, False, next_page, degraded_of[i]))
+    return {"count": len(results), "results": results}
+
+
+@app.get("/graph/ego")
+async def graph_ego(
+    name: str,
+    request: Request,
+    depth: int = Query(1, ge=1, le=QA_GRAPH_MAX_DEPTH),
+    limit: int = Query(QA_GRAPH_MAX_NODES, ge=1, le=QA_GRAPH_MAX_NODES),
+):
+    """以 name 为中心、depth 跳以内的人物关系子图（ECharts graph 格式：categories/nodes/links），最多 limit 个节点。"""
+    with get_metrics().track("/graph/ego"):
+        data, cached = await ego_graph(name, depth, limit)
+        if data is None:
+            raise HTTPException(status_code=404, detail=f"未找到人物：{name}")
+        return json_response(request, {**data, "cached": cached})
+
+
+@app.get("/suggest")
+def suggest(request: Request, q: str = "", limit: int = Query(QA_SUGGEST_LIMIT, ge=1, le=QA_SUGGEST_LIMIT)):
+    """输入联想：以 q 为前缀（或人名/标题中间片段）的人名与事件标题，按热度排序。"""
+    return json_response(request, {"q": q, "items": get_suggest_index().suggest(q, limit)})
+
+
+@app.get("/qa/cache")
+def qa_cache_stats():
+    return get_cache().stats()
+
+
+@app.get("/health")
+def health():
+    """存活探针：进程能处理请求即返回 200，不检查依赖；neo4j 为熔断器状态（open 时 /qa 降级回答），
+    artifacts 为词典、联想字典树、抽取模型等运行时制品的当前版本（loaded=false 表示本进程未加载），indexes 为由图谱构建的派生索引对应的图谱代号与来源。"""
+    return {
+        "status": "ok",
+        "uptime_s": round(time.time() - warmup_state.started_at, 1),
+        "neo4j": get_breaker().as_dict(),
+        "artifacts": get_artifacts().versions(),
+        "indexes": {"path": path_index_info(), "ego": ego_index_info()},
+    }
+
+
+@app.post("/admin/reload")
+async def admin_reload(request: Request, name: Optional[str] = None):
+    """立即重建运行时制品（name 为逗号分隔的制品名，缺省为全部已加载的），建好后原子替换，在途请求不受影响。
+
+    需带 X-Admin-Token 请求头（config.QA_ADMIN_TOKEN）；未设置口令时接口停用（反向代理后无法可靠判断来源）。任一制品构建失败时
+    返回 500，失败的制品保留旧版本。prefork 部署下只作用于接收请求的 worker，全部 worker 请用 SIGHUP。
+    """
+    if not QA_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="未设置 config.QA_ADMIN_TOKEN，接口已停用")
+    if not hmac.compare_digest(request.headers.get("x-admin-token", ""), QA_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="口令错误")
+    names = [n.strip() for n in (name or "").split(",") if n.strip()] or None
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, get_artifacts().reload, names)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=f"未知制品：{exc.args[0]}") from None
+    failed = any(v["error"] for v in result.values())
+    return JSONResponse({"reloaded": result}, status_code=500 if failed else 200)
+
+
+@app.get("/ready")
+def ready():
+    """就绪探针：启动预热完成前返回 503，附当前阶段、尝试次数与错误；完成后返回各阶段耗时。"""
+    return JSONResponse(warmup_state.as_dict(), status_code=200 if warmup_state.ready else 503)
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus 文本格式的运行指标（阶段耗时直方图、空结果/错误/重连计数、在途请求数）。"""
+    return PlainTextResponse(get_metrics().render(), media_type=METRICS_CONTENT_TYPE)
+
+
 def main():
-    # 为 Windows PowerShell 环境提供一键运行入口
+    # 为 Windows PowerShell 环境提供一键运行入口（单进程）；多核部署见 scripts.qa_prefork
     # 延迟导入，避免在未安装时模块导入即失败
     import uvicorn
-    uvicorn.run("scripts.qa_service:app", host="127.0.0.1", port=8000, reload=False)
+    uvicorn.run("scripts.qa_service:app", host=QA_HOST, port=QA_PORT, reload=False)
 
 
 if __name__ == "__main__":
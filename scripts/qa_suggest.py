@@ -0,0 +1,113 @@
+"""
+/suggest 输入联想：人名与事件标题的前缀补全，每次按键只做一次字典树查找。
+
+- 词条：name_dict.txt、persons_unique.txt 中的人名（type = person），kg_events.csv 中的事件标题（type = event）
+- 热度：人物为参与的事件数（kg_event_edges.csv）+ 关系数（relation.txt），事件为参与人数
+- 匹配：除整串前缀外，人名与标题从第二个字起的后缀也插入字典树（“黛玉”→ 林黛玉，“葬花”→ 林黛玉葬花），
+  排序时整串前缀匹配优先，其次按热度降序、文本升序
+- 构建时按上述顺序插入，每个节点只保留前 QA_SUGGEST_LIMIT 个词条，查询即沿前缀走到节点直接返回，
+  耗时只与输入长度有关
+- 源文件变化：由制品注册表（qa_artifacts，制品名 suggest）在后台线程重建，建好后整体替换；
+  重建期间继续使用旧索引
+"""
+from __future__ import annotations
+
+import csv
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import QA_SUGGEST_LIMIT
+
+ROOT = Path(__file__).resolve().parent.parent
+NAME_FILES = (ROOT / "name_dict.txt", ROOT / "persons_unique.txt")
+EVENTS_CSV = ROOT / "kg_events.csv"
+EDGES_CSV = ROOT / "kg_event_edges.csv"
+RELATION_TXT = ROOT / "relation.txt"
+SOURCES = (*NAME_FILES, EVENTS_CSV, EDGES_CSV, RELATION_TXT)
+
+
+def _load_entries() -> List[Tuple[str, str, int]]:
+    """读取源文件，返回 [(文本, 类型, 热度)]。"""
+    person_events: Counter = Counter()
+    event_people: Counter = Counter()
+    if EDGES_CSV.exists():
+        with EDGES_CSV.open("r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                src = row.get("src") or row.get("\ufeffsrc")
+                dst = row.get("dst")
+                if src and dst:
+                    person_events[src.strip()] += 1
+                    event_people[dst.strip()] += 1
+    relations: Counter = Counter()
+    if RELATION_TXT.exists():
+        with RELATION_TXT.open("r", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) >= 3 and row[0].strip() and row[1].strip():
+                    relations[row[0].strip()] += 1
+                    relations[row[1].strip()] += 1
+
+    names = set()
+    for p in NAME_FILES:
+        if p.exists():
+            with p.open("r", encoding="utf-8") as f:
+                names.update(line.split()[0] for line in f if line.strip())
+    entries = [(n, "person", person_events[n] + relations[n]) for n in sorted(names)]
+    titles: Dict[str, int] = {}
+    if EVENTS_CSV.exists():
+        with EVENTS_CSV.open("r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                eid = row.get("id") or row.get("\ufeffid")
+                title = (row.get("title") or "").strip()
+                if title:
+                    titles[title] = max(titles.get(title, 0), event_people[eid])
+    entries.extend((t, "event", s) for t, s in sorted(titles.items()))
+    return entries
+
+
+class SuggestIndex:
+    def __init__(self, entries: List[Tuple[str, str, int]], limit: int = QA_SUGGEST_LIMIT) -> None:
+        self.size = len(entries)
+        self.items = [{"text": t, "type": k, "score": s} for t, k, s in entries]
+        # (整串前缀优先, 热度降序, 文本) 排好序后依次插入，节点内词条天然有序
+        inserts = []
+        for i, (text, _, score) in enumerate(entries):
+            key = text.lower()
+            # 整串 + 长度不小于 2 的后缀
+            for start in range(max(1, len(key) - 1)):
+                inserts.append(((start > 0, -score, text), key[start:], i))
+        inserts.sort(key=lambda x: x[0])
+        # 节点：[子节点 {字: 节点}, 词条下标列表]
+        self._root: list = [{}, []]
+        for _, key, i in inserts:
+            node = self._root
+            for ch in key:
+                nxt = node[0].get(ch)
+                if nxt is None:
+                    nxt = node[0][ch] = [{}, []]
+                node = nxt
+                self._add(node, i, limit)
+
+    @staticmethod
+    def _add(node: list, i: int, limit: int) -> None:
+        top = node[1]
+        if len(top) < limit and i not in top:
+            top.append(i)
+
+    def suggest(self, prefix: str, limit: int = QA_SUGGEST_LIMIT) -> List[Dict[str, Any]]:
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        node = self._root
+        for ch in prefix:
+            node = node[0].get(ch)
+            if node is None:
+                return []
+        return [self.items[i] for i in node[1][:limit]]
+
+
+def get_suggest_index() -> SuggestIndex:
+    """首次调用时同步构建；之后源文件变化时在后台重建并替换（见 qa_artifacts）。"""
+    from scripts.qa_artifacts import get_artifacts
+
+    return get_artifacts().get("suggest")
@@ -0,0 +1,185 @@
+"""
+问答服务启动预热与就绪状态。
+
+服务启动后在后台依次执行（各步计时，完成后以一行日志输出冷启动耗时分解）：
+1. lexicons：加载人名词典（qa_intent）与输入联想字典树（qa_suggest）
+2. backend：memory 后端加载进程内图引擎与全文索引；neo4j 后端建立会话池并执行 RETURN 1 校验连接
+3. path_index：构建人物路径索引（path 意图固定由它回答）与 /graph/ego 的关系子图索引
+4. templates：qa_cypher.build_query 的每个模板以代表性参数各执行一次；neo4j 后端另执行一次
+   UNWIND 批量形式，让数据库的计划缓存同时覆盖 /qa 与 /qa/batch
+5. hot_questions：按查询日志（qa_log）中最热的 QA_WARMUP_HOT_QUESTIONS 个问句预先写入答案缓存
+   （与 /qa 相同：split_page 取首页与下一页令牌，再 format_answer）；只统计当前日志文件的最后
+   QA_WARMUP_LOG_RECORDS 条记录，并在线程池中读取，不阻塞 /ready、/health
+
+单个模板或热门问句执行失败只记入 warnings 并跳过，不影响就绪（连接已由 backend 一步校验）；
+其余步骤失败（例如 Neo4j 尚未启动）时记录错误，QA_WARMUP_RETRY_INTERVAL 秒后从头重试。
+预热完成前 GET /ready 返回 503，GET /health 只反映进程存活。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional
+
+from config import QA_BACKEND, QA_WARMUP_HOT_QUESTIONS, QA_WARMUP_LOG_RECORDS, QA_WARMUP_RETRY_INTERVAL
+
+# 借用 uvicorn 的日志器：默认日志配置下 INFO 级别即可输出到终端
+logger = logging.getLogger("uvicorn.error")
+
+SAMPLE_PAYLOAD: Dict[str, Any] = {"who": "林黛玉", "A": "贾宝玉", "B": "林黛玉", "chap": "3", "kw": "林黛玉葬花"}
+INTENTS = ("panci", "events", "relation", "path", "cooccur", "chapter_events", "search")
+
+
+class WarmupState:
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.ready = False
+        self.stage: Optional[str] = None
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.warnings: Dict[str, str] = {}
+        self.timings_ms: Dict[str, float] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "stage": self.stage,
+            "attempts": self.attempts,
+            "error": self.error,
+            "warnings": self.warnings,
+            "timings_ms": self.timings_ms,
+        }
+
+
+state = WarmupState()
+
+
+async def _lexicons() -> None:
+    from scripts.qa_intent import load_lexicons
+    from scripts.qa_suggest import get_suggest_index
+
+    load_lexicons()
+    get_suggest_index()
+
+
+async def _backend() -> None:
+    if QA_BACKEND == "memory":
+        from scripts.qa_memgraph import get_memgraph
+
+        get_memgraph().text_index()
+        return
+    from scripts.qa_pool import get_pool
+
+    rows = await get_pool().run("RETURN 1 AS ok")
+    if not rows or rows[0].get("ok") != 1:
+        raise RuntimeError("Neo4j 连接校验失败")
+
+
+async def _path_index() -> None:
+    from scripts.qa_graph import get_ego_index
+    from scripts.qa_path import get_path_index
+
+    get_path_index()
+    get_ego_index()
+
+
+def _warn(name: str, exc: BaseException) -> None:
+    state.warnings[name] = f"{type(exc).__name__}: {exc}"
+    logger.warning("预热 %s 失败，已跳过：%s", name, state.warnings[name])
+
+
+async def _templates() -> None:
+    from scripts.qa_cypher import build_query, execute, execute_batch
+
+    for intent in INTENTS:
+        cypher, params = build_query({"intent": intent, **SAMPLE_PAYLOAD})
+        try:
+            await execute(intent, cypher, params)
+        except Exception as exc:
+            _warn(intent, exc)
+        if QA_BACKEND != "memory" and intent != "path":
+            try:
+                await execute_batch(intent, [params])
+            except Exception as exc:
+                _warn(f"{intent}[batch]", exc)
+
+
+def _read_hot(n: int) -> List[str]:
+    """当前日志文件最后 QA_WARMUP_LOG_RECORDS 条记录中最热的 n 个问句（阻塞读文件，在线程池中调用）。"""
+    from scripts.qa_log import read_records
+
+    tail = deque(
+        (r.get("question") for r in read_records(include_rotated=False) if r.get("question")),
+        maxlen=QA_WARMUP_LOG_RECORDS,
+    )
+    return [q for q, _ in Counter(tail).most_common(n)]
+
+
+async def _hot_questions() -> None:
+    if QA_WARMUP_HOT_QUESTIONS <= 0:
+        return
+    from scripts.qa_answer import format_answer
+    from scripts.qa_cache import get_cache
+    from scripts.qa_cypher import build_query, execute_resilient
+    from scripts.qa_intent import detect_intent
+    from scripts.qa_page import split_page
+
+    hot = await asyncio.get_running_loop().run_in_executor(None, _read_hot, QA_WARMUP_HOT_QUESTIONS)
+    cache = get_cache()
+    generation = await cache.generation()
+    for question in hot:
+        payload = detect_intent(question)
+        cypher, params = build_query(payload)
+        key = cache.make_key(payload["intent"], params, generation)
+        # peek 不计入命中率统计
+        if await cache.peek(key) is not None:
+            continue
+        try:
+            rows, degraded = await execute_resilient(payload["intent"], cypher, params)
+        except Exception as exc:
+            _warn(f"hot:{question}", exc)
+            continue
+        if degraded:
+            continue
+        # 与 /qa 写入的缓存项一致：首页行、答案与下一页令牌
+        rows, next_page = split_page(payload["intent"], params, rows)
+        answer = format_answer(payload["intent"], payload, rows)
+        cache.put(key, {"rows": rows[:10], "answer": answer, "next": next_page})
+
+
+STEPS = (
+    ("lexicons", _lexicons),
+    ("backend", _backend),
+    ("path_index", _path_index),
+    ("templates", _templates),
+    ("hot_questions", _hot_questions),
+)
+
+
+async def warm_up() -> None:
+    """执行全部预热步骤，失败后按间隔重试，直至成功。"""
+    while True:
+        state.attempts += 1
+        state.timings_ms = {}
+        state.warnings = {}
+        t_all = time.perf_counter()
+        try:
+            for name, step in STEPS:
+                state.stage = name
+                t0 = time.perf_counter()
+                await step()
+                state.timings_ms[name] = round((time.perf_counter() - t0) * 1000, 1)
+        except Exception as exc:
+            state.error = f"{state.stage}: {type(exc).__name__}: {exc}"
+            logger.warning("预热失败（第 %d 次），%.0f 秒后重试：%s", state.attempts, QA_WARMUP_RETRY_INTERVAL, state.error)
+            await asyncio.sleep(QA_WARMUP_RETRY_INTERVAL)
+            continue
+        state.timings_ms["total"] = round((time.perf_counter() - t_all) * 1000, 1)
+        state.stage = None
+        state.error = None
+        state.ready = True
+        breakdown = " | ".join(f"{k} {v} ms" for k, v in state.timings_ms.items())
+        logger.info("预热完成（后端 %s，第 %d 次尝试）：%s", QA_BACKEND, state.attempts, breakdown)
+        return
@@ -13,6 +13,7 @@ import argparse
 from typing import Set, Tuple
 
 from config import get_graph
+from scripts.graph_generation import bump_generation
 
 
 def load_allowed(path: str) -> Set[Tuple[str, str, str]]:
@@ -33,7 +34,7 @@ def build_current(graph) -> Set[Tuple[str, str, str]]:
     data = graph.run(
         """
         MATCH (p:Person)-[r:INVOLVED]->(e:Event)
-        RETURN coalesce(p.name,p.Name) AS src, e.id AS dst, r.type AS type
+        RETURN p.name AS src, e.id AS dst, r.type AS type
         """
     ).data()
     cur: Set[Tuple[str, str, str]] = set()
@@ -53,8 +54,7 @@ def delete_extra(graph, extras: Set[Tuple[str, str, str]]) -> int:
     for src, dst, rtype in extras:
         tx.run(
             """
-            MATCH (p:Person)-[r:INVOLVED {type:$rtype}]->(e:Event {id:$dst})
-            WHERE p.name=$src OR p.Name=$src
+            MATCH (p:Person {name:$src})-[r:INVOLVED {type:$rtype}]->(e:Event {id:$dst})
             DELETE r
             """,
             src=src,
@@ -80,7 +80,8 @@ def main():
     print(f"CSV 边数: {len(allowed)} | 图中边数: {len(current)} | 需删除: {len(extras)}")
     if extras:
         n = delete_extra(graph, extras)
-        print(f"已删除多余 INVOLVED 边: {n}")
+        gen = bump_generation(graph)
+        print(f"已删除多余 INVOLVED 边: {n}（图谱代号 {gen}）")
     else:
         print("无需删除，多余边为 0")
 
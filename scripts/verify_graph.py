@@ -31,7 +31,7 @@ def main():
         graph,
         """
         MATCH (p:Person)-[r:INVOLVED {type:'拥有判词'}]->(e:Event)
-        RETURN coalesce(p.name,p.Name) AS person, e.id AS event_id, e.title AS title
+        RETURN p.name AS person, e.id AS event_id, e.title AS title
         ORDER BY person
         LIMIT 10
         """,
@@ -43,8 +43,7 @@ def main():
     rows = q(
         graph,
         """
-        MATCH (p:Person)-[r:INVOLVED]->(e:Event)
-        WHERE coalesce(p.name,p.Name)='王熙凤'
+        MATCH (p:Person {name:'王熙凤'})-[r:INVOLVED]->(e:Event)
         RETURN r.type AS type, e.id AS event_id, e.title AS title
         ORDER BY event_id
         LIMIT 5
@@ -57,8 +56,7 @@ def main():
     cnt_rows = q(
         graph,
         """
-        MATCH (p:Person)-[r:INVOLVED]->(e:Event)
-        WHERE coalesce(p.name,p.Name)='林黛玉'
+        MATCH (p:Person {name:'林黛玉'})-[r:INVOLVED]->(e:Event)
         RETURN count(r) AS c
         """,
     )
@@ -66,8 +64,7 @@ def main():
     rows = q(
         graph,
         """
-        MATCH (p:Person)-[r:INVOLVED]->(e:Event)
-        WHERE coalesce(p.name,p.Name)='林黛玉'
+        MATCH (p:Person {name:'林黛玉'})-[r:INVOLVED]->(e:Event)
         RETURN r.type AS type, e.id AS event_id, e.title AS title
         ORDER BY event_id
         LIMIT 5
@@ -79,8 +76,7 @@ def main():
     rows = q(
         graph,
         """
-        MATCH (p:Person)-[r:INVOLVED]->(e:Event)
-        WHERE coalesce(p.name,p.Name)='贾宝玉'
+        MATCH (p:Person {name:'贾宝玉'})-[r:INVOLVED]->(e:Event)
         RETURN r.type AS type, e.id AS event_id, e.title AS title
         ORDER BY event_id
         LIMIT 8
@@ -93,8 +89,7 @@ def main():
     rows = q(
         graph,
         """
-        MATCH (p:Person)-[r:INVOLVED]->(e:Event)
-        WHERE coalesce(p.name,p.Name)='薛宝钗'
+        MATCH (p:Person {name:'薛宝钗'})-[r:INVOLVED]->(e:Event)
         RETURN r.type AS type, e.id AS event_id, e.title AS title
         ORDER BY event_id
         LIMIT 7
@@ -108,7 +103,7 @@ def main():
         graph,
         """
         MATCH (:Person {name:'贾宝玉'})-[r:RELATION]-(p)
-        RETURN r.type AS type, coalesce(p.name,p.Name) AS other
+        RETURN r.type AS type, p.name AS other
         LIMIT 5
         """,
     )
@@ -119,7 +114,7 @@ def main():
     rels = graph.run(
         """
         MATCH (a:Person)-[r:RELATION]->(b:Person)
-        RETURN coalesce(a.name,a.Name) AS src, r.type AS rel, coalesce(b.name,b.Name) AS dst
+        RETURN a.name AS src, r.type AS rel, b.name AS dst
         LIMIT 10
         """
     ).data()
@@ -0,0 +1,62 @@
+"""
+测试公共夹具：一张手工构造的小图谱（relation.txt / kg_events.csv / kg_event_edges.csv 三个文件），
+规模小到可以按 Cypher 语义逐条写出各模板在 Neo4j 上应返回的结果。
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# 贾政→贾宝玉 的“爸爸”归一为“父亲”后与第一行重复，王夫人的“妈妈”归一为“母亲”
+RELATIONS = """\
+贾政,贾宝玉,父亲,贾家荣国府,贾家荣国府
+贾宝玉,贾政,儿子,贾家荣国府,贾家荣国府
+贾政,贾宝玉,爸爸,贾家荣国府,贾家荣国府
+王夫人,贾宝玉,妈妈,王家,贾家荣国府
+贾宝玉,林黛玉,表兄,贾家荣国府,林家
+林如海,林黛玉,父亲,林家,林家
+"""
+
+EVENTS = [
+    ("EV01", "黛玉进府", "林黛玉初到荣国府拜见贾母，随后在园中闲逛", "001.txt", "林黛玉"),
+    ("EV02", "共读西厢", "宝玉黛玉在桃树下共读西厢记", "002.txt", "贾宝玉"),
+    *[(f"EV{i:02d}", f"宝玉杂事{i}", "宝玉在园中闲逛", f"{i:03d}.txt", "贾宝玉") for i in range(3, 13)],
+    ("EV_P", "黛玉判词", "可叹停机德，堪怜咏絮才", "005.txt", "林黛玉"),
+]
+
+# 贾宝玉,EV03 重复一行（导入时 MERGE 去重）；EVX 不在 kg_events.csv 中，只有 id
+EDGES = [
+    *[("贾宝玉", f"EV{i:02d}", "参与") for i in range(1, 13)],
+    ("贾宝玉", "EV05", "涉及"),
+    ("贾宝玉", "EV03", "参与"),
+    ("林黛玉", "EV01", "参与"),
+    ("林黛玉", "EV02", "参与"),
+    ("林黛玉", "EV_P", "拥有判词"),
+    ("王夫人", "EV01", "涉及"),
+    ("贾雨村", "EV12", "参与"),
+    ("甄士隐", "EVX", "参与"),
+]
+
+
+@pytest.fixture(scope="session")
+def data_files(tmp_path_factory):
+    d = tmp_path_factory.mktemp("graph")
+    (d / "relation.txt").write_text(RELATIONS, encoding="utf-8")
+    lines = ["id,title,sentence,chapter,person"] + [",".join(row) for row in EVENTS]
+    (d / "kg_events.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    lines = ["src,dst,type"] + [",".join(row) for row in EDGES]
+    (d / "kg_event_edges.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return {"events": d / "kg_events.csv", "edges": d / "kg_event_edges.csv", "relations": d / "relation.txt"}
+
+
+@pytest.fixture(scope="session")
+def graph(data_files):
+    from scripts.qa_memgraph import MemGraph
+
+    return MemGraph.from_files(**data_files)
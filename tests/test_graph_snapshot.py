@@ -0,0 +1,39 @@
+"""二进制快照（graph_snapshot.SnapshotGraph）与解析数据文件得到的 MemGraph 结构与查询结果逐项一致。"""
+from __future__ import annotations
+
+import pytest
+
+from scripts.graph_snapshot import GraphSnapshot, write_snapshot
+from scripts.qa_cypher import build_query
+
+
+@pytest.fixture()
+def snap_graph(graph, tmp_path):
+    path = tmp_path / "kg_snapshot.bin"
+    write_snapshot(graph, path)
+    g = GraphSnapshot(path).to_memgraph()
+    yield g
+    g.close()
+
+
+def test_adjacency_order(graph, snap_graph):
+    # 贾宝玉的关系边入、出交错（贾政→贾宝玉 在 贾宝玉→林黛玉 之前），邻居顺序须与原始边顺序一致
+    assert list(snap_graph.rel_adj["贾宝玉"]) == graph.rel_adj["贾宝玉"] == ["贾政", "王夫人", "林黛玉"]
+    assert {k: list(v) for k, v in snap_graph.rel_adj.items()} == graph.rel_adj
+    assert {k: list(v) for k, v in snap_graph.rel_pair.items()} == graph.rel_pair
+    assert {k: list(v) for k, v in snap_graph.inv_by_person.items()} == graph.inv_by_person
+    assert {k: list(v) for k, v in snap_graph.inv_by_event.items()} == graph.inv_by_event
+    # rel_edges 按起点分组（同一起点内保持原始顺序）
+    by_src = lambda edges: sorted(edges, key=lambda e: list(graph.persons).index(e[0]))
+    assert list(snap_graph.rel_edges) == by_src(graph.rel_edges)
+
+
+def test_queries(graph, snap_graph):
+    persons = list(graph.persons)
+    payloads = [{"intent": i, "who": p} for p in persons for i in ("panci", "events", "cooccur")]
+    payloads += [{"intent": i, "A": a, "B": b} for a in persons for b in persons for i in ("relation", "path")]
+    payloads += [{"intent": "chapter_events", "chap": c} for c in ("1", "5", "012")]
+    payloads += [{"intent": "search", "terms": t} for t in (["黛玉"], ["闲逛"], ["西厢", "判词"])]
+    for payload in payloads:
+        _, params = build_query(payload)
+        assert snap_graph.query(payload["intent"], params) == graph.query(payload["intent"], params), payload
@@ -0,0 +1,154 @@
+"""
+进程内图引擎（qa_memgraph）与 Cypher 模板的一致性：参数取自 qa_cypher.build_query（与服务相同），
+期望结果按各模板在 Neo4j 上的语义对夹具图谱逐条写出。
+
+- 无 ORDER BY 的模板（relation）按集合比较；带 ORDER BY 的模板逐行比较，并沿下一页令牌翻完全部页
+- path：夹具中的最短路径唯一，逐节点比较
+- search：Lucene 打分与进程内索引不同，只比较命中的事件集合
+
+连接真实 Neo4j 的全量对照见 scripts.check_memgraph_parity。
+"""
+from __future__ import annotations
+
+from typing import Dict, List
+
+import pytest
+
+from scripts.qa_cypher import build_query
+from scripts.qa_page import PAGE_SIZE, decode_token, split_page
+
+
+def run(graph, payload: Dict) -> List[dict]:
+    _, params = build_query(payload)
+    return graph.query(payload["intent"], params)
+
+
+def walk(graph, payload: Dict) -> List[List[dict]]:
+    """沿 next 令牌翻完全部页，返回各页的行。"""
+    pages, after = [], None
+    while True:
+        _, params = build_query({**payload, "after": after})
+        page, token = split_page(payload["intent"], params, graph.query(payload["intent"], params))
+        pages.append(page)
+        if token is None:
+            return pages
+        after = decode_token(token, payload["intent"], params)
+
+
+def person(name: str, cate: str) -> dict:
+    return {"name": name, "cate": cate}
+
+
+def test_panci(graph):
+    assert run(graph, {"intent": "panci", "who": "林黛玉"}) == [
+        {"title": "黛玉判词", "sentence": "可叹停机德，堪怜咏絮才", "chapter": "005.txt"}
+    ]
+    assert run(graph, {"intent": "panci", "who": "贾宝玉"}) == []
+    assert run(graph, {"intent": "panci", "who": None}) == []
+
+
+def test_events_pages_keep_both_edges_of_one_event(graph):
+    pages = walk(graph, {"intent": "events", "who": "贾宝玉"})
+    keys = [(r["id"], r["rtype"]) for page in pages for r in page]
+    # ORDER BY id, rtype：EV05 的“参与”“涉及”是两行；EV03 的重复边只算一次
+    expected = [(f"EV{i:02d}", "参与") for i in range(1, 13)]
+    expected.insert(5, ("EV05", "涉及"))
+    assert keys == expected
+    assert [len(p) for p in pages] == [PAGE_SIZE, 3]
+    assert pages[0][0] == {"id": "EV01", "rtype": "参与", "title": "黛玉进府",
+                           "sentence": "林黛玉初到荣国府拜见贾母，随后在园中闲逛", "chapter": "001.txt"}
+
+
+def test_events_for_event_missing_from_csv(graph):
+    assert run(graph, {"intent": "events", "who": "甄士隐"}) == [
+        {"id": "EVX", "rtype": "参与", "title": None, "sentence": None, "chapter": None}
+    ]
+    assert run(graph, {"intent": "events", "who": "不存在的人"}) == []
+
+
+@pytest.mark.parametrize(
+    "a, b, types",
+    [
+        ("贾政", "贾宝玉", {"父亲", "儿子"}),
+        ("贾宝玉", "贾政", {"父亲", "儿子"}),
+        ("王夫人", "贾宝玉", {"母亲"}),
+        ("林黛玉", "贾宝玉", {"表兄"}),
+        ("贾政", "林如海", set()),
+    ],
+)
+def test_relation(graph, a, b, types):
+    rows = run(graph, {"intent": "relation", "A": a, "B": b})
+    assert len(rows) == len(types)
+    assert {r["rtype"] for r in rows} == types
+
+
+def test_path_through_relations(graph):
+    assert run(graph, {"intent": "path", "A": "贾政", "B": "林黛玉"}) == [
+        {"p": [
+            person("贾政", "贾家荣国府"), "RELATION",
+            person("贾宝玉", "贾家荣国府"), "RELATION",
+            person("林黛玉", "林家"),
+        ]}
+    ]
+
+
+def test_path_through_events(graph):
+    ev12 = {"id": "EV12", "title": "宝玉杂事12", "sentence": "宝玉在园中闲逛", "chapter": "012.txt", "person": "贾宝玉"}
+    assert run(graph, {"intent": "path", "A": "林如海", "B": "贾雨村"}) == [
+        {"p": [
+            person("林如海", "林家"), "RELATION",
+            person("林黛玉", "林家"), "RELATION",
+            person("贾宝玉", "贾家荣国府"), "INVOLVED",
+            ev12, "INVOLVED",
+            {"name": "贾雨村"},
+        ]}
+    ]
+
+
+@pytest.mark.parametrize("a, b", [("甄士隐", "贾政"), ("贾政", "贾政"), ("贾政", "不存在的人")])
+def test_path_none(graph, a, b):
+    assert run(graph, {"intent": "path", "A": a, "B": b}) == []
+
+
+def test_cooccur(graph):
+    rows = [r for page in walk(graph, {"intent": "cooccur", "who": "贾宝玉"}) for r in page]
+    assert rows == [
+        {"id": "EV01", "other": "林黛玉", "title": "黛玉进府", "chapter": "001.txt"},
+        {"id": "EV01", "other": "王夫人", "title": "黛玉进府", "chapter": "001.txt"},
+        {"id": "EV02", "other": "林黛玉", "title": "共读西厢", "chapter": "002.txt"},
+        {"id": "EV12", "other": "贾雨村", "title": "宝玉杂事12", "chapter": "012.txt"},
+    ]
+    # DISTINCT：EV05 上贾宝玉自己的两条边不产生共现
+    assert [(r["id"], r["other"]) for r in run(graph, {"intent": "cooccur", "who": "林黛玉"})] == [
+        ("EV01", "王夫人"), ("EV01", "贾宝玉"), ("EV02", "贾宝玉"),
+    ]
+
+
+def test_chapter_events(graph):
+    rows = [r for page in walk(graph, {"intent": "chapter_events", "chap": "1"}) for r in page]
+    # CONTAINS '1'：001/010/011/012
+    assert [r["id"] for r in rows] == ["EV01", "EV10", "EV11", "EV12"]
+    assert rows[0] == {"id": "EV01", "title": "黛玉进府", "sentence": "林黛玉初到荣国府拜见贾母，随后在园中闲逛",
+                       "chapter": "001.txt"}
+    assert run(graph, {"intent": "chapter_events", "chap": None}) == []
+
+
+@pytest.mark.parametrize(
+    "terms, ids",
+    [
+        (["黛玉"], {"EV01", "EV02", "EV_P"}),
+        (["西厢", "判词"], {"EV02", "EV_P"}),
+        (["闲逛"], {"EV01", *(f"EV{i:02d}" for i in range(3, 13))}),
+        (["葬花"], set()),
+        ([], set()),
+    ],
+)
+def test_search(graph, terms, ids):
+    pages = walk(graph, {"intent": "search", "terms": terms})
+    got = [r["id"] for page in pages for r in page]
+    assert len(got) == len(set(got))
+    assert set(got) == ids
+    # 任一检索词在标题或正文中出现即命中（Lucene OR 查询）
+    for page in pages:
+        for r in page:
+            assert any(t in r["title"] or t in r["sentence"] for t in terms)
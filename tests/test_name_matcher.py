@@ -0,0 +1,24 @@
+"""NameMatcher.longest 与“词典按长度降序逐个 find、跳过已标注位置”的旧做法逐条一致。"""
+from __future__ import annotations
+
+import pytest
+
+from scripts.bench_name_matcher import naive_longest
+from scripts.name_matcher import NameMatcher
+
+
+@pytest.mark.parametrize(
+    "names, text, expected",
+    [
+        # 同长度重叠：词典中靠前者先占位，而不是最左者
+        (["玉钗黛", "宝玉钗"], "宝玉钗黛", [(1, 4, "玉钗黛")]),
+        (["宝玉钗", "玉钗黛"], "宝玉钗黛", [(0, 3, "宝玉钗")]),
+        # 长词优先，嵌套的短名不再单独命中
+        (["宝玉", "贾宝玉"], "贾宝玉见了宝玉", [(0, 3, "贾宝玉"), (5, 7, "宝玉")]),
+        # 同一人名的重叠出现：先左后右
+        (["哈哈"], "哈哈哈", [(0, 2, "哈哈")]),
+    ],
+)
+def test_longest_matches_dictionary_scan(names, text, expected):
+    by_len = sorted(names, key=len, reverse=True)
+    assert NameMatcher(names).longest(text) == expected == naive_longest(text, by_len)